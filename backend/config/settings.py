@@ -30,6 +30,62 @@ class Settings(BaseSettings):
     azure_storage_connection_string: str = ""
     azure_storage_container: str = ""
     
+    # RPA task leasing
+    rpa_lease_seconds: int = 300
+    rpa_lease_max_seconds: int = 3600
+    rpa_claim_max_tasks: int = 100
+    rpa_batch_max_items: int = 1000
+    rpa_long_poll_max_seconds: int = 30
+    rpa_result_settle_seconds: int = 10  # Result counts unfinished this long are completed by the next report
+
+    # Password hashing (bcrypt runs on a dedicated thread pool)
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64
+
+    # Event converter worker (change stream on eventos, adaptive polling
+    # where change streams are unavailable)
+    converter_change_stream: bool = True  # Requires a replica set
+    converter_stream_retry_seconds: int = 300
+    converter_batch_size: int = 100
+    converter_poll_min_seconds: float = 0.5
+    converter_poll_max_seconds: float = 10
+    event_lease_seconds: int = 60  # Renewed while an event is processed
+
+    # Task status monitor worker (reads changed RPA tasks after a watermark)
+    task_monitor_batch_size: int = 500
+    task_monitor_interval_seconds: float = 5
+    task_monitor_lag_seconds: int = 5
+
+    # Progress streaming (SSE)
+    progress_change_stream: bool = False  # Requires a replica set
+    progress_keepalive_seconds: int = 15
+    progress_poll_seconds: float = 5  # One query per API process, while no change stream runs
+    progress_ticket_seconds: int = 60  # Lifetime of the ticket that opens a stream
+    changes_lag_seconds: int = 5  # /solicitacoes/changes skips changes younger than this
+
+    # CNJ validation (disable the mod-97 check digit test for fake test data)
+    cnj_validate_check_digit: bool = True
+
+    # CNJ result cache (reuse results fetched for other solicitacoes of the
+    # same client; overridable per client with config_rpa.cache_max_age_hours;
+    # entries are removed by a TTL index once older than the longest max age)
+    cnj_cache_max_age_hours: int = 72
+
+    # Excel uploads (spooled to a temp file and parsed as a stream on a
+    # process pool; uploads beyond max_pending get a 503)
+    excel_upload_max_mb: int = 50
+    excel_parse_workers: int = 2
+    excel_parse_max_pending: int = 8
+    excel_async_threshold_mb: int = 2  # Larger uploads are processed as background jobs
+    upload_job_ttl_hours: int = 24
+    upload_job_stale_seconds: int = 120  # Jobs without a heartbeat this long were interrupted
+    upload_job_retry_seconds: float = 5  # Wait for a parsing slot when the pool is saturated
+
+    # Caches
+    cliente_registry_ttl_seconds: int = 300
+    auth_cache_ttl_seconds: int = 60
+    auth_cache_max_entries: int = 10000
+
     # API
     api_v1_prefix: str = "/api"
     cors_origins: List[str] = ["http://localhost:5173", "http://localhost:3000"]
@@ -5,6 +5,7 @@ import logging
 from typing import Optional
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from pymongo import MongoClient
+from pymongo.errors import PyMongoError
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -62,13 +63,46 @@ class DatabaseManager:
             await self.db.solicitacoes.create_index("cliente_id")
             await self.db.solicitacoes.create_index("status")
             await self.db.solicitacoes.create_index("created_at")
-            await self.db.solicitacoes.create_index([("user_id", 1), ("created_at", -1)])
+            await self.db.solicitacoes.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)])
+            await self.db.solicitacoes.create_index([("user_id", 1), ("updated_at", 1), ("_id", 1)])
 
             # Events collection indexes (for event-driven architecture)
             await self.db.eventos.create_index("solicitacao_id")
             await self.db.eventos.create_index("tipo_evento")
             await self.db.eventos.create_index("processado")
             await self.db.eventos.create_index("created_at")
+            await self.db.eventos.create_index(
+                [("processado", 1), ("tipo_evento", 1), ("created_at", 1)]
+            )
+
+            # Per-CNJ tasks (one document per solicitacao/CNJ pair)
+            await self.db.solicitacao_cnjs.create_index(
+                [("solicitacao_id", 1), ("cnj", 1)], unique=True
+            )
+            await self.db.solicitacao_cnjs.create_index(
+                [("solicitacao_id", 1), ("status", 1), ("cnj", 1)]
+            )
+            await self.db.solicitacao_cnjs.create_index(
+                [("status", 1), ("created_at", 1)]
+            )
+            await self.db.solicitacao_cnjs.create_index(
+                [("cliente_codigo", 1), ("status", 1), ("created_at", 1)]
+            )
+            # Only CNJs whose result is being counted carry a contagem
+            await self.db.solicitacao_cnjs.create_index("contagem", sparse=True)
+
+            # Cached CNJ results expire once no client can reuse them
+            # (imported here: the workers package imports this module)
+            from workers.cnj_cache import CnjResultCache
+            await CnjResultCache(self.db).init_ttl_index()
+
+            # RPA tasks live in the RPA system's collection; failures there
+            # are logged without stopping startup
+            await self.init_rpa_task_indexes()
+
+            # Upload jobs collection indexes (expired jobs are removed by MongoDB)
+            await self.db.upload_jobs.create_index("expira_em", expireAfterSeconds=0)
+            await self.db.upload_jobs.create_index("user_id")
 
             logger.info("Database indexes created successfully")
 
@@ -76,6 +110,41 @@ class DatabaseManager:
             logger.error(f"Error creating indexes: {e}")
             raise
 
+    async def init_rpa_task_indexes(self) -> bool:
+        """
+        Initialize the portal's indexes on the RPA ``tasks`` collection
+
+        Databases written before event leases may hold duplicate portal
+        tasks, which make the unique index fail. The error is logged
+        instead of raised so the API and the workers still start; remove
+        the duplicates with ``python -m scripts.dedupe_rpa_tasks``.
+
+        Returns:
+            True if every index exists
+        """
+        try:
+            # Changed portal tasks, read in order by the task status monitor
+            await self.db.tasks.create_index(
+                [("portal_metadata.source", 1), ("updated_at", 1), ("_id", 1)]
+            )
+
+            # RPA tasks created by the portal: one per (solicitacao, CNJ), so
+            # retried events never duplicate a task (other RPA tasks are left out)
+            await self.db.tasks.create_index(
+                [("portal_metadata.solicitacao_id", 1), ("process_number", 1)],
+                unique=True,
+                partialFilterExpression={"portal_metadata.solicitacao_id": {"$exists": True}},
+            )
+
+            return True
+
+        except PyMongoError as e:
+            logger.error(
+                f"Error creating RPA task indexes: {e} "
+                "(duplicate portal tasks? run: python -m scripts.dedupe_rpa_tasks)"
+            )
+            return False
+
 
 # Global database instance
 db_manager = DatabaseManager()
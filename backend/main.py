@@ -1,8 +1,15 @@
 """
 FastAPI application entry point for Portal de Automação RPA
 """
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from config.settings import settings
+from database import db_manager
+from utils.auth import password_pool
+from utils.clientes import cliente_registry
+from utils.excel_parser import excel_pool
+from utils.notifier import progress_broker
 from routers import auth, solicitacoes, clientes, documentos, rpa
 
 app = FastAPI(
@@ -18,8 +25,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+@app.on_event("startup")
+async def startup():
+    """Create database indexes and warm up caches on startup"""
+    await db_manager.init_indexes()
+    await cliente_registry.load(db_manager.db)
+    app.state.background_tasks = [
+        asyncio.create_task(cliente_registry.watch(db_manager.db)),
+    ]
+
+    # The poller idles while the change stream delivers progress
+    app.state.background_tasks.append(
+        asyncio.create_task(
+            progress_broker.poll(db_manager.db, settings.progress_poll_seconds)
+        )
+    )
+
+    if settings.progress_change_stream:
+        app.state.background_tasks.append(
+            asyncio.create_task(progress_broker.watch(db_manager.db))
+        )
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background tasks and close database connection on shutdown"""
+    for task in app.state.background_tasks:
+        task.cancel()
+    password_pool.shutdown()
+    excel_pool.shutdown()
+    await db_manager.close()
+
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(clientes.router, prefix="/api/clientes", tags=["clientes"])
@@ -1,19 +1,27 @@
 """
 Models package
 """
-from .status import SolicitacaoStatus, EventoTipo
+from .status import SolicitacaoStatus, EventoTipo, UploadJobStatus
 from .usuario import Usuario, UsuarioCreate, UsuarioLogin, UsuarioResponse
 from .cliente import Cliente, ClienteCreate, ClienteResponse
 from .solicitacao import (
     Solicitacao,
     SolicitacaoCreate,
     SolicitacaoResponse,
+    SolicitacaoCreateResponse,
+    CnjInvalido,
+    SolicitacaoSummary,
+    SolicitacaoChanges,
+    StreamTicket,
     ResultadoProcessamento,
+    ResultadosPage,
+    UploadJobResponse,
 )
 
 __all__ = [
     "SolicitacaoStatus",
     "EventoTipo",
+    "UploadJobStatus",
     "Usuario",
     "UsuarioCreate",
     "UsuarioLogin",
@@ -24,5 +32,12 @@ __all__ = [
     "Solicitacao",
     "SolicitacaoCreate",
     "SolicitacaoResponse",
+    "SolicitacaoCreateResponse",
+    "CnjInvalido",
+    "SolicitacaoSummary",
+    "SolicitacaoChanges",
+    "StreamTicket",
     "ResultadoProcessamento",
+    "ResultadosPage",
+    "UploadJobResponse",
 ]
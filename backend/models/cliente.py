@@ -35,6 +35,7 @@ class Cliente(BaseModel):
                 "config_rpa": {
                     "portal_url": "https://portal.agibank.com.br",
                     "timeout": 30,
+                    "cache_max_age_hours": 72,
                 },
             }
         }
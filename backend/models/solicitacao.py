@@ -6,7 +6,7 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
 from .usuario import PyObjectId
-from .status import SolicitacaoStatus
+from .status import SolicitacaoStatus, UploadJobStatus
 
 
 class ResultadoProcessamento(BaseModel):
@@ -22,7 +22,7 @@ class ResultadoProcessamento(BaseModel):
     class Config:
         json_schema_extra = {
             "example": {
-                "cnj": "0001234-56.2024.8.00.0000",
+                "cnj": "0001234-06.2024.8.00.0000",
                 "status": "concluido",
                 "documentos_encontrados": 3,
                 "documentos_urls": [
@@ -41,10 +41,9 @@ class Solicitacao(BaseModel):
     user_id: str  # ID of the user who created the request
     cliente_id: str  # ID of the client (company)
     servico: str = "buscar_documentos"  # Service type (only one for MVP)
-    cnjs: List[str]  # List of CNJ process numbers
     status: SolicitacaoStatus = SolicitacaoStatus.PENDENTE
     resultados: List[ResultadoProcessamento] = Field(default_factory=list)
-    total_cnjs: int
+    total_cnjs: int  # The CNJs themselves live in solicitacao_cnjs
     cnjs_processados: int = 0
     cnjs_sucesso: int = 0
     cnjs_erro: int = 0
@@ -63,7 +62,6 @@ class Solicitacao(BaseModel):
                 "user_id": "507f1f77bcf86cd799439011",
                 "cliente_id": "507f1f77bcf86cd799439012",
                 "servico": "buscar_documentos",
-                "cnjs": ["0001234-56.2024.8.00.0000", "0001234-56.2024.8.00.0001"],
                 "status": "pendente",
                 "total_cnjs": 2,
             }
@@ -82,7 +80,7 @@ class SolicitacaoCreate(BaseModel):
             "example": {
                 "cliente_id": "507f1f77bcf86cd799439012",
                 "servico": "buscar_documentos",
-                "cnjs": ["0001234-56.2024.8.00.0000", "0001234-56.2024.8.00.0001"],
+                "cnjs": ["0001234-06.2024.8.00.0000", "0001234-03.2024.8.00.0001"],
             }
         }
 
@@ -115,7 +113,7 @@ class SolicitacaoResponse(BaseModel):
                 "cliente_id": "507f1f77bcf86cd799439012",
                 "cliente_nome": "Agibank",
                 "servico": "buscar_documentos",
-                "cnjs": ["0001234-56.2024.8.00.0000"],
+                "cnjs": ["0001234-06.2024.8.00.0000"],
                 "status": "concluido",
                 "total_cnjs": 1,
                 "cnjs_processados": 1,
@@ -123,7 +121,7 @@ class SolicitacaoResponse(BaseModel):
                 "cnjs_erro": 0,
                 "resultados": [
                     {
-                        "cnj": "0001234-56.2024.8.00.0000",
+                        "cnj": "0001234-06.2024.8.00.0000",
                         "status": "concluido",
                         "documentos_encontrados": 3,
                     }
@@ -132,3 +130,142 @@ class SolicitacaoResponse(BaseModel):
                 "updated_at": "2024-01-01T10:30:00",
             }
         }
+
+
+class CnjInvalido(BaseModel):
+    """A submitted CNJ that was not accepted"""
+
+    indice: int  # Position in the submitted list
+    valor: str
+    erro: str
+
+
+class SolicitacaoCreateResponse(SolicitacaoResponse):
+    """Response schema for a created solicitação"""
+
+    # Submitted CNJs left out of the solicitação
+    cnjs_invalidos: List[CnjInvalido] = []
+
+
+class SolicitacaoSummary(BaseModel):
+    """Summary schema for solicitação listings (no CNJ list or results)"""
+
+    id: str
+    user_id: str
+    cliente_id: str
+    cliente_nome: Optional[str] = None  # Populated via join
+    servico: str
+    status: SolicitacaoStatus
+    total_cnjs: int
+    cnjs_processados: int
+    cnjs_sucesso: int
+    cnjs_erro: int
+    created_at: datetime
+    updated_at: datetime
+    iniciado_em: Optional[datetime] = None
+    concluido_em: Optional[datetime] = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "id": "507f1f77bcf86cd799439013",
+                "user_id": "507f1f77bcf86cd799439011",
+                "cliente_id": "507f1f77bcf86cd799439012",
+                "cliente_nome": "Agibank",
+                "servico": "buscar_documentos",
+                "status": "em_execucao",
+                "total_cnjs": 5000,
+                "cnjs_processados": 1200,
+                "cnjs_sucesso": 1150,
+                "cnjs_erro": 50,
+                "created_at": "2024-01-01T10:00:00",
+                "updated_at": "2024-01-01T10:30:00",
+            }
+        }
+
+
+class SolicitacaoChanges(BaseModel):
+    """Response schema for incremental solicitação sync"""
+
+    changes: List[SolicitacaoSummary]
+    since: str  # Token to pass on the next request
+    has_more: bool = False  # More changes are available right away
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "changes": [],
+                "since": "WyIyMDI0LTAxLTAxVDEwOjMwOjAwIiwiNTA3ZjFmNzdiY2Y4NmNkNzk5NDM5MDEzIl0",
+                "has_more": False,
+            }
+        }
+
+
+class StreamTicket(BaseModel):
+    """Response schema for a progress stream ticket"""
+
+    ticket: str  # Pass as ``ticket`` to /solicitacoes/stream
+    expires_in: int  # Seconds the ticket can be used to open a stream
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ticket": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
+                "expires_in": 60,
+            }
+        }
+
+
+class ResultadosPage(BaseModel):
+    """Response schema for one page of a solicitação's results"""
+
+    resultados: List[ResultadoProcessamento]
+    total: int  # Matching results across all pages
+    next_cursor: Optional[str] = None  # Pass as ``cursor`` for the next page
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "resultados": [
+                    {
+                        "cnj": "0001234-06.2024.8.00.0000",
+                        "status": "erro",
+                        "documentos_encontrados": 0,
+                        "erro": "Processo não encontrado",
+                    }
+                ],
+                "total": 1,
+                "next_cursor": None,
+            }
+        }
+
+
+
+class UploadJobResponse(BaseModel):
+    """Response schema for a background spreadsheet upload job"""
+
+    id: str
+    status: UploadJobStatus
+    filename: Optional[str] = None
+    cliente_id: str
+    servico: str
+    solicitacao_id: Optional[str] = None  # Set once the job is concluido
+    total_cnjs: Optional[int] = None
+    erro: Optional[str] = None  # Set if the job failed
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "id": "507f1f77bcf86cd799439014",
+                "status": "concluido",
+                "filename": "processos.xlsx",
+                "cliente_id": "507f1f77bcf86cd799439012",
+                "servico": "buscar_documentos",
+                "solicitacao_id": "507f1f77bcf86cd799439013",
+                "total_cnjs": 250000,
+                "created_at": "2024-01-01T10:00:00",
+                "updated_at": "2024-01-01T10:00:40",
+            }
+        }
@@ -24,6 +24,15 @@ class SolicitacaoStatus(str, Enum):
     CANCELADO = "cancelado"                    # Request cancelled by user
 
 
+class UploadJobStatus(str, Enum):
+    """Status for background spreadsheet upload jobs"""
+
+    PENDENTE = "pendente"        # File received, waiting for a parser
+    EM_EXECUCAO = "em_execucao"  # Parsing and creating the solicitacao
+    CONCLUIDO = "concluido"      # Solicitacao created (see solicitacao_id)
+    ERRO = "erro"                # Parsing or validation failed (see erro)
+
+
 class EventoTipo(str, Enum):
     """Event types for event-driven architecture"""
 
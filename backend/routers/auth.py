@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
 from database import get_database
 from models import UsuarioLogin, UsuarioCreate, UsuarioResponse
-from utils.auth import hash_password, verify_password, create_access_token
+from utils.auth import hash_password_async, verify_password_async, create_access_token
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -37,7 +37,7 @@ async def login(credentials: UsuarioLogin, db=Depends(get_database)):
             )
 
         # Verify password
-        if not verify_password(credentials.senha, user["senha_hash"]):
+        if not await verify_password_async(credentials.senha, user["senha_hash"]):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password",
@@ -103,7 +103,7 @@ async def register(user_data: UsuarioCreate, db=Depends(get_database)):
             )
 
         # Hash password
-        senha_hash = hash_password(user_data.senha)
+        senha_hash = await hash_password_async(user_data.senha)
 
         # Create user document
         user_doc = {
@@ -7,6 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from database import get_database
 from models import ClienteResponse
 from utils.auth import get_current_user
+from utils.clientes import cliente_registry
 
 logger = logging.getLogger(__name__)
 
@@ -31,14 +32,8 @@ async def list_clientes(
         List of clients
     """
     try:
-        # Build query
-        query = {}
-        if ativo_apenas:
-            query["ativo"] = True
-
         # Find clients
-        cursor = db.clientes.find(query).sort("nome", 1)
-        clientes = await cursor.to_list(length=None)
+        clientes = await cliente_registry.list(db, ativo_apenas=ativo_apenas)
 
         # Convert to response model
         clientes_response = [
@@ -82,9 +77,7 @@ async def get_cliente(
         Client information
     """
     try:
-        from bson import ObjectId
-
-        cliente = await db.clientes.find_one({"_id": ObjectId(cliente_id)})
+        cliente = await cliente_registry.get_by_id(db, cliente_id)
 
         if not cliente:
             raise HTTPException(
@@ -9,7 +9,9 @@ from bson import ObjectId
 from database import get_database
 from models import SolicitacaoStatus
 from utils.auth import get_current_user
+from utils.clientes import cliente_registry
 from workers.azure_storage import AzureStorageHandler
+from workers.cnj_tasks import CnjTaskStore, CONCLUIDO, PENDENTE
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -51,8 +53,19 @@ async def get_documentos(
                 detail="Access denied",
             )
 
+        # Results with documents to download
+        cursor = db.solicitacao_cnjs.find(
+            {
+                "solicitacao_id": solicitacao_id,
+                "status": CONCLUIDO,
+                "documentos_encontrados": {"$gt": 0},
+            },
+            {"cnj": 1, "status": 1, "documentos_encontrados": 1},
+        )
+        resultados = await cursor.to_list(length=None)
+
         # Check if solicitacao has results
-        if not sol.get("resultados"):
+        if not resultados:
             return {
                 "solicitacao_id": solicitacao_id,
                 "status": sol["status"],
@@ -61,7 +74,7 @@ async def get_documentos(
             }
 
         # Get client info
-        cliente = await db.clientes.find_one({"_id": ObjectId(sol["cliente_id"])})
+        cliente = await cliente_registry.get_by_id(db, sol["cliente_id"])
 
         if not cliente:
             raise HTTPException(
@@ -85,44 +98,42 @@ async def get_documentos(
         # Generate download URLs for each CNJ with documents
         documentos_response = []
 
-        for resultado in sol["resultados"]:
+        for resultado in resultados:
             cnj = resultado["cnj"]
 
-            # Only process successful results with documents
-            if resultado.get("status") == "concluido" and resultado.get("documentos_encontrados", 0) > 0:
-                # List files for this CNJ
-                try:
-                    files = azure_handler.list_files_by_cnj(
-                        cliente_codigo=cliente["codigo"],
-                        cnj=cnj
+            # List files for this CNJ
+            try:
+                files = azure_handler.list_files_by_cnj(
+                    cliente_codigo=cliente["codigo"],
+                    cnj=cnj
+                )
+
+                # Generate SAS URLs for each file
+                cnj_documentos = []
+                for file_info in files:
+                    sas_url = azure_handler.generate_sas_url(
+                        blob_path=file_info["name"],
+                        expiry_hours=24  # URLs expire in 24 hours
                     )
 
-                    # Generate SAS URLs for each file
-                    cnj_documentos = []
-                    for file_info in files:
-                        sas_url = azure_handler.generate_sas_url(
-                            blob_path=file_info["name"],
-                            expiry_hours=24  # URLs expire in 24 hours
-                        )
-
-                        if sas_url:
-                            cnj_documentos.append({
-                                "filename": file_info["name"].split("/")[-1],  # Get just filename
-                                "size_bytes": file_info["size"],
-                                "download_url": sas_url,
-                                "expires_in_hours": 24,
-                            })
-
-                    if cnj_documentos:
-                        documentos_response.append({
-                            "cnj": cnj,
-                            "total_documentos": len(cnj_documentos),
-                            "documentos": cnj_documentos,
+                    if sas_url:
+                        cnj_documentos.append({
+                            "filename": file_info["name"].split("/")[-1],  # Get just filename
+                            "size_bytes": file_info["size"],
+                            "download_url": sas_url,
+                            "expires_in_hours": 24,
                         })
 
-                except Exception as e:
-                    logger.warning(f"Error getting documents for CNJ {cnj}: {e}")
-                    continue
+                if cnj_documentos:
+                    documentos_response.append({
+                        "cnj": cnj,
+                        "total_documentos": len(cnj_documentos),
+                        "documentos": cnj_documentos,
+                    })
+
+            except Exception as e:
+                logger.warning(f"Error getting documents for CNJ {cnj}: {e}")
+                continue
 
         return {
             "solicitacao_id": solicitacao_id,
@@ -179,19 +190,16 @@ async def get_documentos_by_cnj(
             )
 
         # Find result for this CNJ
-        resultado = next(
-            (r for r in sol.get("resultados", []) if r["cnj"] == cnj),
-            None
-        )
+        resultado = await CnjTaskStore(db).get(solicitacao_id, cnj)
 
-        if not resultado:
+        if not resultado or resultado["status"] == PENDENTE:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"CNJ {cnj} not found in this solicitacao",
             )
 
         # Get client info
-        cliente = await db.clientes.find_one({"_id": ObjectId(sol["cliente_id"])})
+        cliente = await cliente_registry.get_by_id(db, sol["cliente_id"])
 
         # Initialize Azure Storage
         azure_handler = AzureStorageHandler(
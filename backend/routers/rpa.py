@@ -1,15 +1,21 @@
 """
 RPA endpoints - For RPA system to consume and update tasks
 """
+import asyncio
 import logging
-from typing import List, Optional
+from typing import Any, Awaitable, Callable, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import datetime, timedelta
 from bson import ObjectId
+from pymongo import ReturnDocument
 
+from config.settings import settings
 from database import get_database
 from models import SolicitacaoStatus
+from utils.clientes import cliente_registry
+from utils.notifier import task_notifier, progress_broker, progress_update
+from workers.cnj_tasks import CnjTaskStore, SOLICITACAO_STATE_PROJECTION
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +39,7 @@ class TaskRPA(BaseModel):
         json_schema_extra = {
             "example": {
                 "id": "690dc9d4538b6f438726e053",
-                "process_number": "0001234-56.2024.8.00.0000",
+                "process_number": "0001234-06.2024.8.00.0000",
                 "client_name": "agibank",
                 "status": "pending",
                 "solicitacao_id": "690dc9d4538b6f438726e053",
@@ -60,12 +66,126 @@ class TaskUpdateRequest(BaseModel):
                 "status": "completed",
                 "documentos_encontrados": 5,
                 "documentos_urls": [
-                    "documentos/agibank/0001234-56_2024_8_00_0000/doc1.pdf"
+                    "documentos/agibank/0001234-06_2024_8_00_0000/doc1.pdf"
                 ],
             }
         }
 
 
+class TaskResultItem(TaskUpdateRequest):
+    """Result of a single CNJ inside a batch report"""
+
+    solicitacao_id: str
+    cnj: str
+
+
+class TaskBatchRequest(BaseModel):
+    """Batch of task results reported by a bot"""
+
+    results: List[TaskResultItem] = Field(..., min_length=1)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "results": [
+                    {
+                        "solicitacao_id": "690dc9d4538b6f438726e053",
+                        "cnj": "0001234-06.2024.8.00.0000",
+                        "status": "completed",
+                        "documentos_encontrados": 2,
+                        "documentos_urls": [
+                            "documentos/agibank/0001234-06_2024_8_00_0000/doc1.pdf"
+                        ],
+                    },
+                    {
+                        "solicitacao_id": "690dc9d4538b6f438726e053",
+                        "cnj": "0005678-75.2023.8.26.0200",
+                        "status": "failed",
+                        "erro": "Processo não encontrado",
+                    },
+                ]
+            }
+        }
+
+
+class TaskLease(TaskRPA):
+    """Task leased to a single RPA bot"""
+
+    lease_owner: str
+    lease_expira_em: datetime
+
+
+class TaskClaimRequest(BaseModel):
+    """Request to lease pending tasks to a bot"""
+
+    bot_id: str = Field(..., min_length=1, description="Unique identifier of the bot")
+    limit: int = Field(default=10, ge=1, description="Maximum number of tasks to lease")
+    lease_seconds: Optional[int] = Field(
+        default=None, ge=1, description="Lease duration (defaults to server setting)"
+    )
+    client_name: Optional[str] = Field(
+        default=None, description="Filter by client code (e.g. agibank)"
+    )
+    wait: int = Field(
+        default=0, ge=0, description="Seconds to wait for tasks when none are available"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {"bot_id": "bot-01", "limit": 10, "lease_seconds": 300, "wait": 20}
+        }
+
+
+class TaskLeaseRequest(BaseModel):
+    """Request to renew or release leased tasks"""
+
+    bot_id: str = Field(..., min_length=1, description="Unique identifier of the bot")
+    task_ids: List[str] = Field(..., min_length=1, description="Composite task IDs")
+    lease_seconds: Optional[int] = Field(
+        default=None, ge=1, description="New lease duration (renew only)"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "bot_id": "bot-01",
+                "task_ids": ["690dc9d4538b6f438726e053_0001234-06.2024.8.00.0000"],
+            }
+        }
+
+
+# ==================== Helpers ====================
+
+
+def _lease_duration(lease_seconds: Optional[int]) -> timedelta:
+    """Clamp the requested lease duration to the configured bounds"""
+    seconds = lease_seconds or settings.rpa_lease_seconds
+    return timedelta(seconds=min(seconds, settings.rpa_lease_max_seconds))
+
+
+async def _long_poll(fetch: Callable[[], Awaitable[List[Any]]], wait: int) -> List[Any]:
+    """
+    Run ``fetch`` and, while it finds nothing, wait for new tasks
+
+    The request sleeps until ``task_notifier`` reports new work or ``wait``
+    seconds pass, so idle bots do not query the database in a loop. A final
+    check on timeout catches work created by other API processes.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(wait, settings.rpa_long_poll_max_seconds)
+
+    while True:
+        listener = task_notifier.listen()
+        result = await fetch()
+        remaining = deadline - loop.time()
+
+        if result or remaining <= 0:
+            return result
+
+        if not await task_notifier.wait(listener, remaining):
+            return await fetch()
+
+
 # ==================== Endpoints ====================
 
 
@@ -73,63 +193,49 @@ class TaskUpdateRequest(BaseModel):
 async def get_pending_tasks(
     client_name: Optional[str] = None,
     limit: int = 50,
+    wait: int = 0,
     db=Depends(get_database),
 ):
     """
     Get pending tasks for RPA to process
 
     Args:
-        client_name: Filter by client (optional)
+        client_name: Filter by client code (optional, e.g. agibank)
         limit: Maximum number of tasks to return
+        wait: Seconds to hold the request open until tasks are available
+            (long polling, capped by the server)
         db: Database instance
 
     Returns:
         List of pending tasks
     """
     try:
-        # Build query
-        query = {"status": SolicitacaoStatus.PENDENTE.value}
-
-        if client_name:
-            query["cliente_id"] = client_name
+        store = CnjTaskStore(db)
 
-        # Find pending solicitacoes
-        cursor = (
-            db.solicitacoes.find(query)
-            .sort("created_at", 1)  # FIFO
-            .limit(limit)
+        # Tasks without a result and not leased to a bot, oldest first
+        pending = await _long_poll(
+            lambda: store.pending(limit, cliente_codigo=client_name), wait
         )
 
-        solicitacoes = await cursor.to_list(length=limit)
+        # Get client info for all tasks
+        clientes = await cliente_registry.get_many(db, (doc["cliente_id"] for doc in pending))
 
-        # Convert to tasks (one task per CNJ)
         tasks = []
-        for sol in solicitacoes:
-            # Get client info
-            cliente = await db.clientes.find_one({"_id": ObjectId(sol["cliente_id"])})
+        for doc in pending:
+            cliente = clientes.get(doc["cliente_id"])
 
             if not cliente:
                 continue
 
-            # Create a task for each CNJ
-            for cnj in sol["cnjs"]:
-                # Check if this CNJ already has a result
-                existing_result = next(
-                    (r for r in sol.get("resultados", []) if r["cnj"] == cnj),
-                    None
-                )
-
-                # Only return if not yet processed
-                if not existing_result:
-                    task = TaskRPA(
-                        id=f"{sol['_id']}_{cnj}",  # Composite ID
-                        process_number=cnj,
-                        client_name=cliente["codigo"],
-                        status="pending",
-                        solicitacao_id=str(sol["_id"]),
-                        created_at=sol["created_at"].isoformat(),
-                    )
-                    tasks.append(task)
+            task = TaskRPA(
+                id=doc["_id"],  # Composite ID
+                process_number=doc["cnj"],
+                client_name=cliente["codigo"],
+                status="pending",
+                solicitacao_id=doc["solicitacao_id"],
+                created_at=doc["created_at"].isoformat(),
+            )
+            tasks.append(task)
 
         logger.info(f"Returning {len(tasks)} pending tasks for RPA")
         return tasks
@@ -142,6 +248,202 @@ async def get_pending_tasks(
         )
 
 
+@router.post("/tasks/claim", response_model=List[TaskLease])
+async def claim_tasks(
+    claim: TaskClaimRequest,
+    db=Depends(get_database),
+):
+    """
+    Atomically lease pending tasks to a bot
+
+    Each returned task is leased exclusively to ``bot_id`` until
+    ``lease_expira_em``. Other bots will not receive it from this endpoint
+    or from ``/tasks/pending`` until the lease is released, expires or the
+    result is reported.
+
+    Args:
+        claim: Claim request
+        db: Database instance
+
+    Returns:
+        List of leased tasks
+    """
+    try:
+        limit = min(claim.limit, settings.rpa_claim_max_tasks)
+        lease = _lease_duration(claim.lease_seconds)
+
+        store = CnjTaskStore(db)
+
+        # The lease starts when the tasks are claimed, not when the request
+        # arrived, so a long poll does not shorten it
+        leased = await _long_poll(
+            lambda: store.claim(
+                claim.bot_id,
+                limit,
+                datetime.utcnow() + lease,
+                cliente_codigo=claim.client_name,
+            ),
+            claim.wait,
+        )
+
+        clientes = await cliente_registry.get_many(db, (doc["cliente_id"] for doc in leased))
+
+        tasks = []
+        for doc in leased:
+            cliente = clientes.get(doc["cliente_id"])
+
+            tasks.append(
+                TaskLease(
+                    id=doc["_id"],
+                    process_number=doc["cnj"],
+                    client_name=cliente["codigo"] if cliente else "",
+                    status="pending",
+                    solicitacao_id=doc["solicitacao_id"],
+                    created_at=doc["created_at"].isoformat(),
+                    lease_owner=doc["lease_owner"],
+                    lease_expira_em=doc["lease_expira_em"],
+                )
+            )
+
+        logger.info(f"Leased {len(tasks)} tasks to bot {claim.bot_id}")
+        return tasks
+
+    except Exception as e:
+        logger.error(f"Error claiming tasks: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+
+
+@router.post("/tasks/leases/renew")
+async def renew_task_leases(
+    renew: TaskLeaseRequest,
+    db=Depends(get_database),
+):
+    """
+    Extend the leases a bot still holds
+
+    Args:
+        renew: Lease renewal request
+        db: Database instance
+
+    Returns:
+        Renewed task IDs and the ones whose lease was lost
+    """
+    try:
+        expira_em = datetime.utcnow() + _lease_duration(renew.lease_seconds)
+
+        renewed = set(
+            await CnjTaskStore(db).renew(renew.bot_id, renew.task_ids, expira_em)
+        )
+        lost = [task_id for task_id in renew.task_ids if task_id not in renewed]
+
+        if lost:
+            logger.warning(f"Bot {renew.bot_id} lost {len(lost)} leases")
+
+        return {
+            "success": True,
+            "bot_id": renew.bot_id,
+            "renewed": [task_id for task_id in renew.task_ids if task_id in renewed],
+            "lost": lost,
+            "lease_expira_em": expira_em,
+        }
+
+    except Exception as e:
+        logger.error(f"Error renewing leases: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+
+
+@router.post("/tasks/leases/release")
+async def release_task_leases(
+    release: TaskLeaseRequest,
+    db=Depends(get_database),
+):
+    """
+    Give leased tasks back so other bots can claim them
+
+    Args:
+        release: Lease release request
+        db: Database instance
+
+    Returns:
+        Number of released leases
+    """
+    try:
+        released = await CnjTaskStore(db).release(release.bot_id, release.task_ids)
+
+        if released:
+            task_notifier.notify()
+
+        logger.info(f"Bot {release.bot_id} released {released} leases")
+
+        return {
+            "success": True,
+            "bot_id": release.bot_id,
+            "released": released,
+        }
+
+    except Exception as e:
+        logger.error(f"Error releasing leases: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+
+
+@router.post("/tasks/results:batch")
+async def update_task_status_batch(
+    batch: TaskBatchRequest,
+    db=Depends(get_database),
+):
+    """
+    Report many task results in one call
+
+    Results are applied with one bulk write per solicitacao. A failing item
+    does not affect the others; check each entry of ``results``.
+
+    Args:
+        batch: Task results
+        db: Database instance
+
+    Returns:
+        Per-item outcomes
+    """
+    if len(batch.results) > settings.rpa_batch_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch limited to {settings.rpa_batch_max_items} results",
+        )
+
+    try:
+        outcomes = await CnjTaskStore(db).record_results(
+            [item.model_dump() for item in batch.results]
+        )
+
+        updated = sum(1 for outcome in outcomes if outcome["success"])
+
+        logger.info(f"Batch of {len(outcomes)} task results: {updated} updated")
+
+        return {
+            "success": updated == len(outcomes),
+            "total": len(outcomes),
+            "updated": updated,
+            "failed": len(outcomes) - updated,
+            "results": outcomes,
+        }
+
+    except Exception as e:
+        logger.error(f"Error updating task status batch: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+
+
 @router.put("/tasks/{solicitacao_id}/{cnj}")
 async def update_task_status(
     solicitacao_id: str,
@@ -162,93 +464,27 @@ async def update_task_status(
         Updated task status
     """
     try:
-        # Get solicitacao
-        sol = await db.solicitacoes.find_one({"_id": ObjectId(solicitacao_id)})
-
-        if not sol:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Solicitacao not found",
-            )
+        # Store the result on the CNJ task, update the counters and
+        # finalize the solicitacao when this was its last CNJ
+        result = await CnjTaskStore(db).record_result(
+            solicitacao_id=solicitacao_id,
+            cnj=cnj,
+            status=update_data.status,
+            documentos_encontrados=update_data.documentos_encontrados,
+            documentos_urls=update_data.documentos_urls,
+            erro=update_data.erro,
+        )
 
-        # Check if CNJ exists in solicitacao
-        if cnj not in sol["cnjs"]:
+        if result is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"CNJ {cnj} not found in this solicitacao",
             )
 
-        # Create or update result for this CNJ
-        resultado = {
-            "cnj": cnj,
-            "status": update_data.status,
-            "documentos_encontrados": update_data.documentos_encontrados,
-            "documentos_urls": update_data.documentos_urls,
-            "erro": update_data.erro,
-            "processado_em": datetime.utcnow(),
-        }
-
-        # Check if result already exists
-        existing_idx = next(
-            (i for i, r in enumerate(sol.get("resultados", []))
-             if r["cnj"] == cnj),
-            None
-        )
-
-        if existing_idx is not None:
-            # Update existing result
-            await db.solicitacoes.update_one(
-                {"_id": ObjectId(solicitacao_id)},
-                {
-                    "$set": {
-                        f"resultados.{existing_idx}": resultado,
-                        "updated_at": datetime.utcnow(),
-                    }
-                }
-            )
-        else:
-            # Add new result
-            await db.solicitacoes.update_one(
-                {"_id": ObjectId(solicitacao_id)},
-                {
-                    "$push": {"resultados": resultado},
-                    "$inc": {
-                        "cnjs_processados": 1,
-                        "cnjs_sucesso": 1 if update_data.status == "completed" else 0,
-                        "cnjs_erro": 1 if update_data.status == "failed" else 0,
-                    },
-                    "$set": {"updated_at": datetime.utcnow()},
-                }
-            )
-
-        # Check if all CNJs are processed
-        updated_sol = await db.solicitacoes.find_one({"_id": ObjectId(solicitacao_id)})
-
-        if updated_sol["cnjs_processados"] >= updated_sol["total_cnjs"]:
-            # All CNJs processed, update overall status
-            if updated_sol["cnjs_erro"] == updated_sol["total_cnjs"]:
-                # All failed
-                final_status = SolicitacaoStatus.ERRO
-            elif updated_sol["cnjs_sucesso"] > 0:
-                # At least one success
-                final_status = SolicitacaoStatus.CONCLUIDO
-            else:
-                # No documents found
-                final_status = SolicitacaoStatus.DOCUMENTOS_NAO_ENCONTRADOS
-
-            await db.solicitacoes.update_one(
-                {"_id": ObjectId(solicitacao_id)},
-                {
-                    "$set": {
-                        "status": final_status.value,
-                        "concluido_em": datetime.utcnow(),
-                        "updated_at": datetime.utcnow(),
-                    }
-                }
-            )
-
+        if result["solicitacao"] and result["solicitacao"]["finalizada"]:
             logger.info(
-                f"Solicitacao {solicitacao_id} completed with status: {final_status.value}"
+                f"Solicitacao {solicitacao_id} completed with status: "
+                f"{result['solicitacao']['finalizada']}"
             )
 
         logger.info(f"Task updated: {cnj} → {update_data.status}")
@@ -289,8 +525,13 @@ async def start_task_processing(
         Success confirmation
     """
     try:
+        # Keep other bots off this CNJ if it was not claimed first
+        await CnjTaskStore(db).hold(
+            solicitacao_id, cnj, datetime.utcnow() + _lease_duration(None)
+        )
+
         # Update solicitacao status to EM_EXECUCAO if still PENDENTE
-        await db.solicitacoes.update_one(
+        solicitacao = await db.solicitacoes.find_one_and_update(
             {
                 "_id": ObjectId(solicitacao_id),
                 "status": SolicitacaoStatus.PENDENTE.value,
@@ -299,11 +540,19 @@ async def start_task_processing(
                 "$set": {
                     "status": SolicitacaoStatus.EM_EXECUCAO.value,
                     "iniciado_em": datetime.utcnow(),
-                    "updated_at": datetime.utcnow(),
-                }
-            }
+                },
+                # Never moves back past a concurrent writer's timestamp
+                "$max": {"updated_at": datetime.utcnow()},
+            },
+            projection=SOLICITACAO_STATE_PROJECTION,
+            return_document=ReturnDocument.AFTER,
         )
 
+        if solicitacao:
+            progress_broker.publish_local(
+                solicitacao["user_id"], progress_update(solicitacao_id, solicitacao)
+            )
+
         logger.info(f"Task started: {cnj} in solicitacao {solicitacao_id}")
 
         return {
@@ -1,43 +1,189 @@
 """
 Solicitações router
 """
+import asyncio
+import json
 import logging
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from datetime import datetime
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+from fastapi import (
+    APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Form, Header, Query,
+    Request, Response,
+)
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from datetime import datetime, timedelta
 from bson import ObjectId
 
+from config.settings import settings
 from database import get_database
 from models import (
     SolicitacaoCreate,
     SolicitacaoResponse,
+    SolicitacaoCreateResponse,
+    CnjInvalido,
+    SolicitacaoSummary,
+    SolicitacaoChanges,
+    StreamTicket,
+    ResultadosPage,
+    UploadJobResponse,
     SolicitacaoStatus,
+    UploadJobStatus,
     EventoTipo,
 )
-from utils.auth import get_current_user
-from utils.excel_parser import parse_excel_cnjs, is_valid_cnj, clean_cnj
+from utils.auth import create_stream_ticket, get_current_user, get_current_user_from_ticket
+from utils.clientes import cliente_registry
+from utils.etag import cache_headers, etag_matches, weak_etag
+from utils.cnj import normalize_cnjs
+from utils.excel_parser import parse_excel_cnjs
+from utils.notifier import task_notifier, progress_broker, progress_update
+from utils.pagination import after_cursor, encode_cursor
 from workers.event_system import EventPublisher
+from workers.cnj_cache import CnjResultCache, max_age_for
+from workers.cnj_tasks import CnjTaskStore, EM_EXECUCAO, CONCLUIDO, ERRO, final_status
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[SolicitacaoResponse])
+# Response fields that are not stored on the solicitacao document (the
+# CNJs and their results live in solicitacao_cnjs)
+COMPUTED_FIELDS = {"id", "cliente_nome", "cnjs", "resultados"}
+
+# Defaults for fields missing from older documents
+FIELD_DEFAULTS = {"cnjs_processados": 0, "cnjs_sucesso": 0, "cnjs_erro": 0}
+
+# Fields that change whenever a solicitacao changes (its version for ETags)
+VERSION_FIELDS = ("updated_at", "status", "cnjs_processados", "cnjs_sucesso", "cnjs_erro")
+VERSION_PROJECTION = {field: 1 for field in ("user_id", "created_at") + VERSION_FIELDS}
+
+# Excel uploads are spooled to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+SUMMARY_FIELDS = list(SolicitacaoSummary.model_fields)
+DETAIL_FIELDS = list(SolicitacaoResponse.model_fields)
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated sparse fieldset
+
+    Args:
+        fields: Value of the ``fields`` query parameter
+
+    Returns:
+        Requested field names (always including ``id``), or None if not given
+
+    Raises:
+        HTTPException: If a field is unknown
+    """
+    if not fields:
+        return None
+
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in SolicitacaoResponse.model_fields]
+
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}",
+        )
+
+    return list(dict.fromkeys(["id"] + requested))
+
+
+def _projection(fields: List[str]) -> Dict[str, int]:
+    """
+    Build the MongoDB projection needed to serve some response fields
+
+    Args:
+        fields: Response field names
+
+    Returns:
+        Projection (always loads user_id, created_at and the version
+        fields, used for access checks, cursors and ETags)
+    """
+    projection = {field: 1 for field in fields if field not in COMPUTED_FIELDS}
+    projection.update(VERSION_PROJECTION)
+
+    if "cliente_nome" in fields:
+        projection["cliente_id"] = 1
+
+    return projection
+
+
+def _response_data(
+    sol: Dict[str, Any],
+    fields: List[str],
+    clientes: Dict[str, Dict[str, Any]],
+    resultados: Optional[List[Dict[str, Any]]] = None,
+    cnjs: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Build the response fields for a solicitacao document
+
+    Args:
+        sol: Solicitacao document (projected)
+        fields: Response field names
+        clientes: Clients by ID (for cliente_nome)
+        resultados: Per-CNJ results (when requested)
+        cnjs: CNJ process numbers (when requested)
+
+    Returns:
+        Mapping of field name to value
+    """
+    data = {}
+
+    for field in fields:
+        if field == "id":
+            data["id"] = str(sol["_id"])
+        elif field == "cliente_nome":
+            cliente = clientes.get(sol["cliente_id"])
+            data["cliente_nome"] = cliente["nome"] if cliente else "Unknown"
+        elif field == "resultados":
+            data["resultados"] = resultados or []
+        elif field == "cnjs":
+            data["cnjs"] = cnjs or []
+        else:
+            data[field] = sol.get(field, FIELD_DEFAULTS.get(field))
+
+    return data
+
+
+def _version(sol: Dict[str, Any]) -> tuple:
+    """Values identifying the current version of a solicitacao"""
+    return (str(sol["_id"]),) + tuple(sol.get(field) for field in VERSION_FIELDS)
+
+
+@router.get("/", response_model=List[SolicitacaoSummary])
 async def list_solicitacoes(
     skip: int = 0,
     limit: int = 50,
-    status: Optional[str] = None,
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
     current_user=Depends(get_current_user),
     db=Depends(get_database),
 ):
     """
     List user's solicitacoes
 
+    Newest first, as summaries without the CNJ list and results. When a
+    full page is returned, the ``X-Next-Cursor`` response header holds the
+    cursor for the next page. Responses carry an ETag; a request whose
+    If-None-Match matches the current page gets ``304 Not Modified``.
+
     Args:
-        skip: Number of records to skip
+        skip: Number of records to skip (ignored when a cursor is given)
         limit: Maximum number of records to return
-        status: Filter by status (optional)
+        status_filter: Filter by status (optional)
+        cursor: Cursor returned with the previous page (optional)
+        fields: Comma-separated response fields to return instead of the
+            summary (optional, e.g. ``id,status,cnjs_processados``)
+        if_none_match: ETag of the client's cached copy (optional)
         current_user: Current authenticated user
         db: Database instance
 
@@ -45,52 +191,93 @@ async def list_solicitacoes(
         List of solicitacoes
     """
     try:
+        selected = _parse_fields(fields) or SUMMARY_FIELDS
+
         # Build query
         query = {"user_id": str(current_user["_id"])}
 
-        if status:
-            query["status"] = status
+        if status_filter:
+            query["status"] = status_filter
 
-        # Find solicitacoes
-        cursor = (
-            db.solicitacoes.find(query)
-            .sort("created_at", -1)
-            .skip(skip)
-            .limit(limit)
-        )
+        if cursor:
+            try:
+                query.update(after_cursor("created_at", cursor))
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=str(e),
+                )
 
-        solicitacoes = await cursor.to_list(length=limit)
-
-        # Get client names for each solicitacao
-        solicitacoes_response = []
-        for sol in solicitacoes:
-            # Get client name
-            cliente = await db.clientes.find_one({"_id": ObjectId(sol["cliente_id"])})
-            cliente_nome = cliente["nome"] if cliente else "Unknown"
-
-            sol_response = SolicitacaoResponse(
-                id=str(sol["_id"]),
-                user_id=sol["user_id"],
-                cliente_id=sol["cliente_id"],
-                cliente_nome=cliente_nome,
-                servico=sol["servico"],
-                cnjs=sol["cnjs"],
-                status=sol["status"],
-                total_cnjs=sol["total_cnjs"],
-                cnjs_processados=sol.get("cnjs_processados", 0),
-                cnjs_sucesso=sol.get("cnjs_sucesso", 0),
-                cnjs_erro=sol.get("cnjs_erro", 0),
-                resultados=sol.get("resultados", []),
-                created_at=sol["created_at"],
-                updated_at=sol["updated_at"],
-                iniciado_em=sol.get("iniciado_em"),
-                concluido_em=sol.get("concluido_em"),
+        def find_page(projection):
+            # Uses the (user_id, created_at, _id) index
+            find_cursor = (
+                db.solicitacoes.find(query, projection)
+                .sort([("created_at", -1), ("_id", -1)])
             )
-            solicitacoes_response.append(sol_response)
+            if not cursor:
+                find_cursor = find_cursor.skip(skip)
+            return find_cursor.limit(limit).to_list(length=limit)
+
+        params = (skip, limit, status_filter, cursor, tuple(selected))
+
+        # Cheap check first: has anything on this page changed?
+        if if_none_match:
+            versions = await find_page(VERSION_PROJECTION)
+            etag = weak_etag(params, [_version(sol) for sol in versions])
+            if etag_matches(if_none_match, etag):
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers=cache_headers(etag),
+                )
+
+        solicitacoes = await find_page(_projection(selected))
+
+        headers = cache_headers(weak_etag(params, [_version(sol) for sol in solicitacoes]))
+        if solicitacoes and len(solicitacoes) == limit:
+            last = solicitacoes[-1]
+            headers["X-Next-Cursor"] = encode_cursor(last["created_at"], last["_id"])
+
+        # Get CNJs and results for the whole page in one query each, only
+        # if asked for
+        page_ids = [str(sol["_id"]) for sol in solicitacoes]
+
+        cnjs = {}
+        if "cnjs" in selected:
+            cnjs = await CnjTaskStore(db).cnjs_by_solicitacao(page_ids)
+
+        resultados = {}
+        if "resultados" in selected:
+            resultados = await CnjTaskStore(db).resultados_by_solicitacao(page_ids)
+
+        # Get client names for the whole page
+        clientes = {}
+        if "cliente_nome" in selected:
+            clientes = await cliente_registry.get_many(
+                db, (sol["cliente_id"] for sol in solicitacoes)
+            )
+
+        solicitacoes_response = [
+            _response_data(
+                sol,
+                selected,
+                clientes,
+                resultados.get(str(sol["_id"])),
+                cnjs.get(str(sol["_id"])),
+            )
+            for sol in solicitacoes
+        ]
+
+        # Sparse fieldsets bypass the summary response model
+        if not fields:
+            solicitacoes_response = [
+                SolicitacaoSummary(**data) for data in solicitacoes_response
+            ]
 
         logger.info(f"Listed {len(solicitacoes_response)} solicitacoes")
-        return solicitacoes_response
+        return JSONResponse(content=jsonable_encoder(solicitacoes_response), headers=headers)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing solicitacoes: {e}")
         raise HTTPException(
@@ -99,17 +286,181 @@ async def list_solicitacoes(
         )
 
 
+@router.get("/changes", response_model=SolicitacaoChanges)
+async def list_changes(
+    since: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=500),
+    current_user=Depends(get_current_user),
+    db=Depends(get_database),
+):
+    """
+    List the user's solicitacoes changed since a sync token
+
+    Call without ``since`` to get a token for the current state (and no
+    changes), then pass the returned token on each refresh to receive only
+    the solicitacoes whose ``updated_at`` advanced since the last call.
+    When ``has_more`` is true, call again right away with the new token.
+
+    Concurrent writers may commit out of ``updated_at`` order, so changes
+    younger than changes_lag_seconds are left for a later call; the token
+    never moves past a change that could still be followed by an older one.
+
+    Args:
+        since: Token returned by the previous call (optional)
+        limit: Maximum number of changes to return
+        current_user: Current authenticated user
+        db: Database instance
+
+    Returns:
+        Changed solicitacoes (oldest change first) and the next token
+    """
+    try:
+        query = {"user_id": str(current_user["_id"])}
+        settled = datetime.utcnow() - timedelta(seconds=settings.changes_lag_seconds)
+
+        # Bootstrap: the token for every settled change (the most recent
+        # changes may be returned again by the next call)
+        if not since:
+            return SolicitacaoChanges(
+                changes=[], since=encode_cursor(settled, ObjectId("f" * 24))
+            )
+
+        try:
+            query.update(after_cursor("updated_at", since, descending=False))
+            query["updated_at"] = {"$lte": settled}
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            )
+
+        # Uses the (user_id, updated_at, _id) index
+        solicitacoes = await (
+            db.solicitacoes.find(query, _projection(SUMMARY_FIELDS))
+            .sort([("updated_at", 1), ("_id", 1)])
+            .limit(limit)
+            .to_list(length=limit)
+        )
+
+        if not solicitacoes:
+            return SolicitacaoChanges(changes=[], since=since)
+
+        clientes = await cliente_registry.get_many(
+            db, (sol["cliente_id"] for sol in solicitacoes)
+        )
+
+        last = solicitacoes[-1]
+        return SolicitacaoChanges(
+            changes=[
+                SolicitacaoSummary(**_response_data(sol, SUMMARY_FIELDS, clientes))
+                for sol in solicitacoes
+            ],
+            since=encode_cursor(last["updated_at"], last["_id"]),
+            has_more=len(solicitacoes) == limit,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing solicitacao changes: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+
+
+@router.post("/stream/ticket", response_model=StreamTicket)
+async def create_progress_ticket(current_user=Depends(get_current_user)):
+    """
+    Issue a short-lived ticket that opens the user's progress stream
+
+    EventSource cannot send headers, so the stream is authenticated by a
+    query parameter. A ticket is used there instead of the access token so
+    URLs written to access logs expire within progress_ticket_seconds and
+    cannot call any other endpoint. Get a new ticket for each connection.
+
+    Args:
+        current_user: Current authenticated user
+
+    Returns:
+        Stream ticket
+    """
+    return StreamTicket(
+        ticket=create_stream_ticket(str(current_user["_id"])),
+        expires_in=settings.progress_ticket_seconds,
+    )
+
+
+@router.get("/stream")
+async def stream_progress(
+    request: Request,
+    current_user=Depends(get_current_user_from_ticket),
+):
+    """
+    Stream progress of the user's solicitacoes (Server-Sent Events)
+
+    Sends a ``progress`` event with the status and counters of a
+    solicitacao whenever they change (including new solicitacoes), and a
+    comment line as keep-alive. Without a change stream, changes written
+    by the workers and other API processes arrive within
+    progress_poll_seconds. Authenticated by a ``ticket`` query parameter
+    (see ``/stream/ticket``).
+
+    Args:
+        request: Incoming request (used to detect disconnects)
+        current_user: Current authenticated user
+
+    Returns:
+        text/event-stream response
+    """
+    user_id = str(current_user["_id"])
+    queue = progress_broker.subscribe(user_id)
+
+    async def events():
+        try:
+            yield "retry: 5000\n\n"
+
+            while not await request.is_disconnected():
+                try:
+                    update = await asyncio.wait_for(
+                        queue.get(), settings.progress_keepalive_seconds
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                yield f"event: progress\ndata: {json.dumps(jsonable_encoder(update))}\n\n"
+        finally:
+            progress_broker.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{solicitacao_id}", response_model=SolicitacaoResponse)
 async def get_solicitacao(
     solicitacao_id: str,
+    response: Response,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
     current_user=Depends(get_current_user),
     db=Depends(get_database),
 ):
     """
     Get solicitacao by ID
 
+    Responses carry an ETag; a request whose If-None-Match matches the
+    current version gets ``304 Not Modified`` after a single point read.
+
     Args:
         solicitacao_id: Solicitacao ID
+        response: Response (used to set cache headers)
+        fields: Comma-separated response fields to return (optional,
+            e.g. ``id,status,cnjs_processados``)
+        if_none_match: ETag of the client's cached copy (optional)
         current_user: Current authenticated user
         db: Database instance
 
@@ -117,7 +468,11 @@ async def get_solicitacao(
         Solicitacao information
     """
     try:
-        sol = await db.solicitacoes.find_one({"_id": ObjectId(solicitacao_id)})
+        selected = _parse_fields(fields) or DETAIL_FIELDS
+
+        # Read just the version first; the full document only if it changed
+        projection = VERSION_PROJECTION if if_none_match else _projection(selected)
+        sol = await db.solicitacoes.find_one({"_id": ObjectId(solicitacao_id)}, projection)
 
         if not sol:
             raise HTTPException(
@@ -132,30 +487,47 @@ async def get_solicitacao(
                 detail="Access denied",
             )
 
+        if if_none_match:
+            etag = weak_etag(tuple(selected), _version(sol))
+            if etag_matches(if_none_match, etag):
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers=cache_headers(etag),
+                )
+
+            sol = await db.solicitacoes.find_one(
+                {"_id": ObjectId(solicitacao_id)}, _projection(selected)
+            )
+
+            if not sol:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Solicitacao not found",
+                )
+
+        headers = cache_headers(weak_etag(tuple(selected), _version(sol)))
+
+        cnjs = None
+        if "cnjs" in selected:
+            cnjs = await CnjTaskStore(db).cnjs(solicitacao_id)
+
+        resultados = None
+        if "resultados" in selected:
+            resultados = await CnjTaskStore(db).resultados(solicitacao_id)
+
         # Get client name
-        cliente = await db.clientes.find_one({"_id": ObjectId(sol["cliente_id"])})
-        cliente_nome = cliente["nome"] if cliente else "Unknown"
-
-        sol_response = SolicitacaoResponse(
-            id=str(sol["_id"]),
-            user_id=sol["user_id"],
-            cliente_id=sol["cliente_id"],
-            cliente_nome=cliente_nome,
-            servico=sol["servico"],
-            cnjs=sol["cnjs"],
-            status=sol["status"],
-            total_cnjs=sol["total_cnjs"],
-            cnjs_processados=sol.get("cnjs_processados", 0),
-            cnjs_sucesso=sol.get("cnjs_sucesso", 0),
-            cnjs_erro=sol.get("cnjs_erro", 0),
-            resultados=sol.get("resultados", []),
-            created_at=sol["created_at"],
-            updated_at=sol["updated_at"],
-            iniciado_em=sol.get("iniciado_em"),
-            concluido_em=sol.get("concluido_em"),
-        )
+        clientes = {}
+        if "cliente_nome" in selected:
+            clientes = await cliente_registry.get_many(db, [sol["cliente_id"]])
+
+        data = _response_data(sol, selected, clientes, resultados, cnjs)
 
-        return sol_response
+        # Sparse fieldsets bypass the response model
+        if fields:
+            return JSONResponse(content=jsonable_encoder(data), headers=headers)
+
+        response.headers.update(headers)
+        return SolicitacaoResponse(**data)
 
     except HTTPException:
         raise
@@ -167,70 +539,177 @@ async def get_solicitacao(
         )
 
 
-@router.post("/", response_model=SolicitacaoResponse, status_code=status.HTTP_201_CREATED)
-async def create_solicitacao(
-    solicitacao_data: SolicitacaoCreate,
+@router.get("/{solicitacao_id}/resultados", response_model=ResultadosPage)
+async def list_resultados(
+    solicitacao_id: str,
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    cursor: Optional[str] = None,
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=500),
     current_user=Depends(get_current_user),
     db=Depends(get_database),
 ):
     """
-    Create new solicitacao
+    List the per-CNJ results of a solicitacao, one page at a time
+
+    Results are ordered by CNJ. Pass the returned ``next_cursor`` as
+    ``cursor`` to get the next page.
 
     Args:
-        solicitacao_data: Solicitacao creation data
+        solicitacao_id: Solicitacao ID
+        status_filter: Only results with this status (em_execucao,
+            concluido or erro; optional)
+        cursor: Cursor returned with the previous page (optional)
+        skip: Number of results to skip (ignored when a cursor is given)
+        limit: Maximum number of results to return
         current_user: Current authenticated user
         db: Database instance
 
     Returns:
-        Created solicitacao
+        Page of results
     """
     try:
-        # Verify client exists
-        cliente = await db.clientes.find_one(
-            {"_id": ObjectId(solicitacao_data.cliente_id)}
+        if status_filter and status_filter not in (EM_EXECUCAO, CONCLUIDO, ERRO):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid status filter",
+            )
+
+        sol = await db.solicitacoes.find_one(
+            {"_id": ObjectId(solicitacao_id)}, {"user_id": 1}
         )
 
-        if not cliente:
+        if not sol:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="Client not found",
+                detail="Solicitacao not found",
             )
 
-        # Validate and clean CNJs
-        valid_cnjs = []
-        for cnj in solicitacao_data.cnjs:
-            cleaned = clean_cnj(cnj)
-            if is_valid_cnj(cleaned):
-                valid_cnjs.append(cleaned)
-            else:
-                logger.warning(f"Invalid CNJ skipped: {cnj}")
-
-        if not valid_cnjs:
+        # Verify user owns this solicitacao
+        if sol["user_id"] != str(current_user["_id"]):
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No valid CNJ numbers provided",
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied",
             )
 
-        # Create solicitacao document
-        sol_doc = {
-            "user_id": str(current_user["_id"]),
-            "cliente_id": solicitacao_data.cliente_id,
-            "servico": solicitacao_data.servico,
-            "cnjs": valid_cnjs,
-            "status": SolicitacaoStatus.PENDENTE.value,
-            "total_cnjs": len(valid_cnjs),
-            "cnjs_processados": 0,
-            "cnjs_sucesso": 0,
-            "cnjs_erro": 0,
-            "resultados": [],
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow(),
-        }
+        page = await CnjTaskStore(db).resultados_page(
+            solicitacao_id,
+            status=status_filter,
+            after=cursor,
+            skip=skip,
+            limit=limit,
+        )
+
+        return ResultadosPage(**page)
 
-        # Insert solicitacao
-        result = await db.solicitacoes.insert_one(sol_doc)
-        solicitacao_id = str(result.inserted_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing resultados: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+
+
+async def _create_solicitacao(
+    solicitacao_data: SolicitacaoCreate, user_id: str, db
+) -> SolicitacaoCreateResponse:
+    """
+    Create a solicitacao, its per-CNJ tasks and the processing event
+
+    Shared by the JSON endpoint, synchronous uploads and upload jobs.
+
+    Args:
+        solicitacao_data: Solicitacao creation data
+        user_id: Owner user ID
+        db: Database instance
+
+    Returns:
+        Created solicitacao, with the submitted CNJs that were left out
+
+    Raises:
+        HTTPException: 404 if the client does not exist, 400 if no CNJ is valid
+    """
+    # Verify client exists
+    cliente = await cliente_registry.get_by_id(db, solicitacao_data.cliente_id)
+
+    if not cliente:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client not found",
+        )
+
+    # Validate, format and dedupe CNJs (each CNJ is tracked once per solicitacao)
+    normalized = normalize_cnjs(solicitacao_data.cnjs)
+    valid_cnjs = normalized["cnjs"]
+
+    invalidos = [
+        CnjInvalido(indice=item["index"], valor=str(item["value"]), erro=item["erro"])
+        for item in normalized["invalid"]
+    ]
+
+    if invalidos:
+        logger.warning(
+            f"Skipped {len(invalidos)} invalid CNJs, e.g. "
+            f"{[item.valor for item in invalidos[:3]]}"
+        )
+
+    if not valid_cnjs:
+        detail = "No valid CNJ numbers provided"
+        if invalidos:
+            detail += (
+                f". Found {len(invalidos)} invalid CNJs, e.g. "
+                f"{[item.valor for item in invalidos[:3]]}"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail,
+        )
+
+    # Results fetched recently for the same client need no bot
+    cached = await CnjResultCache(db).fresh(
+        cliente["codigo"], valid_cnjs, max_age_for(cliente)
+    )
+
+    # Create solicitacao document (the CNJs are stored as per-CNJ tasks only)
+    now = datetime.utcnow()
+    sol_doc = {
+        "user_id": user_id,
+        "cliente_id": solicitacao_data.cliente_id,
+        "servico": solicitacao_data.servico,
+        "status": SolicitacaoStatus.PENDENTE.value,
+        "total_cnjs": len(valid_cnjs),
+        "cnjs_processados": len(cached),
+        "cnjs_sucesso": len(cached),
+        "cnjs_erro": 0,
+        "created_at": now,
+        "updated_at": now,
+    }
 
+    pending = len(valid_cnjs) - len(cached)
+    if not pending:
+        sol_doc["status"] = final_status(sol_doc)
+        sol_doc["concluido_em"] = now
+
+    # Insert solicitacao
+    result = await db.solicitacoes.insert_one(sol_doc)
+    solicitacao_id = str(result.inserted_id)
+
+    # Create one task per CNJ
+    await CnjTaskStore(db).create_for_solicitacao(
+        solicitacao_id=solicitacao_id,
+        cliente_id=solicitacao_data.cliente_id,
+        cnjs=valid_cnjs,
+        created_at=sol_doc["created_at"],
+        cliente_codigo=cliente["codigo"],
+        cached=cached,
+    )
+
+    # Other open pages of the user show the new solicitacao right away
+    progress_broker.publish_local(sol_doc["user_id"], progress_update(solicitacao_id, sol_doc))
+
+    if pending:
         # Publish event for processing
         event_publisher = EventPublisher(db)
         await event_publisher.publish_event(
@@ -243,27 +722,59 @@ async def create_solicitacao(
             },
         )
 
-        logger.info(f"Created solicitacao {solicitacao_id} with {len(valid_cnjs)} CNJs")
-
-        # Prepare response
-        sol_response = SolicitacaoResponse(
-            id=solicitacao_id,
-            user_id=sol_doc["user_id"],
-            cliente_id=sol_doc["cliente_id"],
-            cliente_nome=cliente["nome"],
-            servico=sol_doc["servico"],
-            cnjs=sol_doc["cnjs"],
-            status=sol_doc["status"],
-            total_cnjs=sol_doc["total_cnjs"],
-            cnjs_processados=0,
-            cnjs_sucesso=0,
-            cnjs_erro=0,
-            resultados=[],
-            created_at=sol_doc["created_at"],
-            updated_at=sol_doc["updated_at"],
-        )
+        # Wake bots long-polling for tasks
+        task_notifier.notify()
 
-        return sol_response
+    logger.info(
+        f"Created solicitacao {solicitacao_id} with {len(valid_cnjs)} CNJs "
+        f"({len(cached)} answered from cache)"
+    )
+
+    # Prepare response
+    sol_response = SolicitacaoCreateResponse(
+        id=solicitacao_id,
+        user_id=sol_doc["user_id"],
+        cliente_id=sol_doc["cliente_id"],
+        cliente_nome=cliente["nome"],
+        servico=sol_doc["servico"],
+        cnjs=valid_cnjs,
+        status=sol_doc["status"],
+        total_cnjs=sol_doc["total_cnjs"],
+        cnjs_processados=sol_doc["cnjs_processados"],
+        cnjs_sucesso=sol_doc["cnjs_sucesso"],
+        cnjs_erro=0,
+        resultados=[],
+        created_at=sol_doc["created_at"],
+        updated_at=sol_doc["updated_at"],
+        cnjs_invalidos=invalidos,
+    )
+
+    return sol_response
+
+
+
+@router.post("/", response_model=SolicitacaoCreateResponse, status_code=status.HTTP_201_CREATED)
+async def create_solicitacao(
+    solicitacao_data: SolicitacaoCreate,
+    current_user=Depends(get_current_user),
+    db=Depends(get_database),
+):
+    """
+    Create new solicitacao
+
+    Invalid CNJs (bad format or check digits) are left out and listed in
+    ``cnjs_invalidos``; the request fails only if no CNJ is valid.
+
+    Args:
+        solicitacao_data: Solicitacao creation data
+        current_user: Current authenticated user
+        db: Database instance
+
+    Returns:
+        Created solicitacao
+    """
+    try:
+        return await _create_solicitacao(solicitacao_data, str(current_user["_id"]), db)
 
     except HTTPException:
         raise
@@ -275,8 +786,183 @@ async def create_solicitacao(
         )
 
 
-@router.post("/upload", response_model=SolicitacaoResponse, status_code=status.HTTP_201_CREATED)
+async def _spool_upload(file: UploadFile, max_bytes: int) -> str:
+    """
+    Copy an upload to a temporary file, chunk by chunk
+
+    Args:
+        file: Uploaded file
+        max_bytes: Maximum accepted size
+
+    Returns:
+        Path of the temporary file (the caller removes it)
+
+    Raises:
+        HTTPException: 413 if the upload is larger than ``max_bytes``
+    """
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    size = 0
+
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"File too large (max {max_bytes // (1024 * 1024)} MB)",
+                    )
+                spool.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    return path
+
+
+def _job_response(job: Dict[str, Any]) -> UploadJobResponse:
+    """Build the API representation of an upload job document"""
+    return UploadJobResponse(id=str(job["_id"]), **{
+        field: job.get(field) for field in UploadJobResponse.model_fields if field != "id"
+    })
+
+
+async def _keep_job_alive(db, job_id: ObjectId):
+    """Refresh a running job's updated_at until cancelled (heartbeat)"""
+    while True:
+        await asyncio.sleep(settings.upload_job_stale_seconds / 3)
+        await db.upload_jobs.update_one(
+            {"_id": job_id}, {"$set": {"updated_at": datetime.utcnow()}}
+        )
+
+
+async def _parse_job_upload(path: str) -> List[str]:
+    """
+    Parse the upload of an accepted job
+
+    Unlike synchronous uploads, a job is not rejected when the parsing pool
+    is saturated: it waits and retries until a slot frees up.
+    """
+    while True:
+        try:
+            return await parse_excel_cnjs(path)
+        except HTTPException as e:
+            if e.status_code != status.HTTP_503_SERVICE_UNAVAILABLE:
+                raise
+
+        await asyncio.sleep(settings.upload_job_retry_seconds)
+
+
+async def _fail_stale_job(db, job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fail a job whose process stopped (e.g. restarted) before finishing
+
+    Running jobs refresh ``updated_at`` every upload_job_stale_seconds / 3;
+    a pending or running job older than upload_job_stale_seconds lost its
+    process and will never finish.
+
+    Args:
+        db: Database instance
+        job: Upload job document
+
+    Returns:
+        The job, marked as erro if it was stale
+    """
+    active = [UploadJobStatus.PENDENTE.value, UploadJobStatus.EM_EXECUCAO.value]
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.upload_job_stale_seconds)
+
+    if job["status"] not in active or job["updated_at"] >= cutoff:
+        return job
+
+    interrupted = {
+        "status": UploadJobStatus.ERRO.value,
+        "erro": "Processing was interrupted, please upload the file again",
+        "updated_at": datetime.utcnow(),
+    }
+
+    # Conditional: a heartbeat may have landed since the job was read
+    result = await db.upload_jobs.update_one(
+        {"_id": job["_id"], "status": {"$in": active}, "updated_at": {"$lt": cutoff}},
+        {"$set": interrupted},
+    )
+
+    if not result.modified_count:
+        return await db.upload_jobs.find_one({"_id": job["_id"]}) or job
+
+    logger.warning(f"Upload job {job['_id']} was interrupted")
+    return dict(job, **interrupted)
+
+
+async def _run_upload_job(
+    db, job_id: ObjectId, path: str, solicitacao_data: Dict[str, Any], user_id: str
+):
+    """
+    Parse a spooled upload and create its solicitacao in the background
+
+    The outcome (solicitacao_id or erro) is stored on the job document;
+    the spooled file is removed when done. ``updated_at`` is refreshed
+    while the job runs, so jobs lost to a restart can be told apart (see
+    ``_fail_stale_job``).
+
+    Args:
+        db: Database instance
+        job_id: Upload job ID
+        path: Spooled upload
+        solicitacao_data: cliente_id and servico for the solicitacao
+        user_id: Owner user ID
+    """
+    outcome = {"status": UploadJobStatus.ERRO.value}
+    heartbeat = asyncio.create_task(_keep_job_alive(db, job_id))
+
+    try:
+        await db.upload_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {"status": UploadJobStatus.EM_EXECUCAO.value, "updated_at": datetime.utcnow()}},
+        )
+
+        cnjs = await _parse_job_upload(path)
+        solicitacao = await _create_solicitacao(
+            SolicitacaoCreate(cnjs=cnjs, **solicitacao_data), user_id, db
+        )
+
+        outcome = {
+            "status": UploadJobStatus.CONCLUIDO.value,
+            "solicitacao_id": solicitacao.id,
+            "total_cnjs": solicitacao.total_cnjs,
+        }
+        logger.info(f"Upload job {job_id} created solicitacao {solicitacao.id}")
+
+    except HTTPException as e:
+        outcome["erro"] = e.detail
+    except ValueError as e:
+        outcome["erro"] = str(e)
+    except Exception as e:
+        logger.error(f"Error running upload job {job_id}: {e}")
+        outcome["erro"] = "Internal server error"
+    finally:
+        heartbeat.cancel()
+        os.unlink(path)
+
+    try:
+        outcome["updated_at"] = datetime.utcnow()
+        await db.upload_jobs.update_one({"_id": job_id}, {"$set": outcome})
+    except Exception as e:
+        logger.error(f"Error storing outcome of upload job {job_id}: {e}")
+
+
+@router.post(
+    "/upload",
+    response_model=SolicitacaoResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        status.HTTP_202_ACCEPTED: {
+            "model": UploadJobResponse,
+            "description": "Large file accepted; poll the job at the Location header",
+        },
+    },
+)
 async def create_solicitacao_from_excel(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     cliente_id: str = Form(...),
     servico: str = Form(default="buscar_documentos"),
@@ -286,7 +972,14 @@ async def create_solicitacao_from_excel(
     """
     Create solicitacao from Excel file upload
 
+    Files up to excel_async_threshold_mb are processed right away (201).
+    Larger ones are processed by a background job: the response is
+    ``202 Accepted`` with the job, to be polled at
+    ``GET /upload/jobs/{job_id}`` until it is concluido or erro. Accepted
+    jobs wait for a parsing slot instead of failing with 503.
+
     Args:
+        background_tasks: Runs upload jobs after the response is sent
         file: Excel file with CNJ numbers
         cliente_id: Client ID
         servico: Service type
@@ -294,8 +987,10 @@ async def create_solicitacao_from_excel(
         db: Database instance
 
     Returns:
-        Created solicitacao
+        Created solicitacao, or the upload job for large files
     """
+    path = None
+
     try:
         # Validate file type
         if not file.filename.endswith(('.xlsx', '.xls')):
@@ -304,12 +999,54 @@ async def create_solicitacao_from_excel(
                 detail="Only Excel files (.xlsx, .xls) are supported",
             )
 
-        # Read file content
-        file_content = await file.read()
+        # Verify client exists before accepting the work
+        if not await cliente_registry.get_by_id(db, cliente_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Client not found",
+            )
+
+        # Spool the upload to disk and parse it as a stream
+        path = await _spool_upload(file, settings.excel_upload_max_mb * 1024 * 1024)
+        user_id = str(current_user["_id"])
+
+        if os.path.getsize(path) > settings.excel_async_threshold_mb * 1024 * 1024:
+            now = datetime.utcnow()
+            job = {
+                "user_id": user_id,
+                "status": UploadJobStatus.PENDENTE.value,
+                "filename": file.filename,
+                "cliente_id": cliente_id,
+                "servico": servico,
+                "created_at": now,
+                "updated_at": now,
+                "expira_em": now + timedelta(hours=settings.upload_job_ttl_hours),
+            }
+            job["_id"] = (await db.upload_jobs.insert_one(job)).inserted_id
+
+            # The job owns the spooled file from here on
+            background_tasks.add_task(
+                _run_upload_job,
+                db,
+                job["_id"],
+                path,
+                {"cliente_id": cliente_id, "servico": servico},
+                user_id,
+            )
+            path = None
+
+            logger.info(f"Accepted upload job {job['_id']} ({file.filename})")
+
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content=jsonable_encoder(_job_response(job)),
+                headers={
+                    "Location": f"{settings.api_v1_prefix}/solicitacoes/upload/jobs/{job['_id']}"
+                },
+            )
 
-        # Parse CNJs from Excel
         try:
-            cnjs = await parse_excel_cnjs(file_content)
+            cnjs = await parse_excel_cnjs(path)
         except ValueError as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -323,8 +1060,7 @@ async def create_solicitacao_from_excel(
             cnjs=cnjs,
         )
 
-        # Reuse the create_solicitacao logic
-        return await create_solicitacao(solicitacao_data, current_user, db)
+        return await _create_solicitacao(solicitacao_data, user_id, db)
 
     except HTTPException:
         raise
@@ -334,3 +1070,51 @@ async def create_solicitacao_from_excel(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error",
         )
+    finally:
+        if path:
+            os.unlink(path)
+
+
+@router.get("/upload/jobs/{job_id}", response_model=UploadJobResponse)
+async def get_upload_job(
+    job_id: str,
+    current_user=Depends(get_current_user),
+    db=Depends(get_database),
+):
+    """
+    Get the status of a background upload job
+
+    A job whose process stopped before finishing (e.g. a restart) is
+    reported, and stored, as erro.
+
+    Args:
+        job_id: Upload job ID
+        current_user: Current authenticated user
+        db: Database instance
+
+    Returns:
+        Upload job (``solicitacao_id`` is set once it is concluido)
+    """
+    try:
+        job = None
+        if ObjectId.is_valid(job_id):
+            job = await db.upload_jobs.find_one(
+                {"_id": ObjectId(job_id), "user_id": str(current_user["_id"])}
+            )
+
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload job not found",
+            )
+
+        return _job_response(await _fail_stale_job(db, job))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting upload job: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
@@ -0,0 +1,98 @@
+"""
+Benchmark: batch CNJ normalization
+Run: python -m scripts.bench_cnj_normalize [--count 1000000]
+
+Normalizes a mix of formatted CNJs, raw digits, numeric Excel cells,
+duplicates and garbage with the previous per-cell clean/validate code
+(shape check only) and with utils.cnj.normalize_cnjs, with and without
+the mod-97 check digit test ("no-dv"). No database is needed.
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.cnj import format_cnj, normalize_cnjs
+
+
+def random_cnj_digits(rng: random.Random) -> str:
+    """Random CNJ digits with valid check digits"""
+    numero = f"{rng.randrange(1, 10_000_000):07d}"
+    ano = str(rng.randrange(2000, 2025))
+    segmento = str(rng.randrange(1, 10))
+    tribunal = f"{rng.randrange(1, 28):02d}"
+    origem = f"{rng.randrange(0, 10_000):04d}"
+    dd = 98 - int(numero + ano + segmento + tribunal + origem) * 100 % 97
+    return f"{numero}{dd:02d}{ano}{segmento}{tribunal}{origem}"
+
+
+def make_inputs(count: int, seed: int = 42) -> list:
+    """Mixed inputs: 70% formatted, 10% raw digits, 10% numbers, 5% duplicates, 5% invalid"""
+    rng = random.Random(seed)
+    values = []
+
+    for _ in range(count):
+        roll = rng.random()
+        digits = random_cnj_digits(rng)
+
+        if roll < 0.70:
+            values.append(format_cnj(digits))
+        elif roll < 0.80:
+            values.append(digits)
+        elif roll < 0.90:
+            values.append(int(digits))
+        elif roll < 0.95 and values:
+            values.append(values[rng.randrange(len(values))])
+        else:
+            values.append(rng.choice(["N/A", "0001234-56.2024.8.00.0000", digits[:12], ""]))
+
+    return values
+
+
+def old_normalize(values: list) -> list:
+    """Previous code path: re.sub/re.match per cell, shape check only"""
+    valid = []
+    for value in values:
+        cnj = re.sub(r'[^\d\-.]', '', str(value).strip())
+        if re.match(r'^\d{7}-\d{2}\.\d{4}\.\d{1}\.\d{2}\.\d{4}$', cnj.strip()):
+            valid.append(cnj)
+    return list(dict.fromkeys(valid))
+
+
+def main(count: int):
+    print(f"🔢 Generating {count:,} inputs...")
+    values = make_inputs(count)
+
+    print(f"\n{'mode':<8} {'seconds':>8} {'per input':>10} {'valid':>9} {'invalid':>8}")
+
+    started = time.perf_counter()
+    old = old_normalize(values)
+    elapsed = time.perf_counter() - started
+    print(f"{'old':<8} {elapsed:>8.2f} {elapsed / count * 1e6:>8.2f}µs {len(old):>9,} {'-':>8}")
+
+    for name, check_digits in (("new", True), ("no-dv", False)):
+        started = time.perf_counter()
+        new = normalize_cnjs(values, check_digits=check_digits)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{name:<8} {elapsed:>8.2f} {elapsed / count * 1e6:>8.2f}µs "
+            f"{len(new['cnjs']):>9,} {len(new['invalid']):>8,}"
+        )
+
+    print(
+        "\nThe old path accepts only formatted strings and lets bad check digits "
+        "through; the new one also accepts raw digits and numeric cells."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    main(args.count)
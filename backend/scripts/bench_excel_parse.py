@@ -0,0 +1,172 @@
+"""
+Benchmark: Excel CNJ ingestion
+Run: python -m scripts.bench_excel_parse [--rows 10000,100000,1000000]
+
+Writes synthetic spreadsheets (a CNJ column plus a description column,
+stored like Excel saves them) and parses them with the previous full load_workbook code path and with
+the streaming read-only parser (utils.excel_parser.read_excel_cnjs).
+Peak memory is measured with tracemalloc in a separate run, so the
+reported times are not slowed down by it. No database is needed.
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from io import BytesIO
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import openpyxl
+
+from scripts.bench_cnj_normalize import random_cnj_digits
+from utils.cnj import format_cnj, normalize_cnjs
+from utils.excel_parser import read_excel_cnjs
+
+XLSX_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+OFFICE_DOC = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+CT_MAIN = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+
+# Minimal package parts around the sheet and its shared strings
+XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        f'<Override PartName="/xl/workbook.xml" ContentType="{CT_MAIN}.sheet.main+xml"/>'
+        f'<Override PartName="/xl/worksheets/sheet1.xml" ContentType="{CT_MAIN}.worksheet+xml"/>'
+        f'<Override PartName="/xl/sharedStrings.xml" ContentType="{CT_MAIN}.sharedStrings+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><Relationships xmlns="{PKG_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{OFFICE_DOC}" Target="xl/workbook.xml"/></Relationships>'
+    ),
+    "xl/workbook.xml": (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<workbook xmlns="{XLSX_NS}" xmlns:r="{REL_NS}"><sheets>'
+        '<sheet name="CNJs" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><Relationships xmlns="{PKG_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{REL_NS}/sharedStrings" Target="sharedStrings.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def write_sheet(path: Path, rows: int, seed: int = 42):
+    """
+    Write a spreadsheet with ``rows`` CNJs the way Excel saves it
+
+    openpyxl's write-only mode stores inline strings and no <dimension>,
+    which read-only parsing handles slower than real uploads; the parts
+    are written directly instead, with shared strings and a dimension.
+    """
+    rng = random.Random(seed)
+    last = rows + 1
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as xlsx:
+        for name, xml in XLSX_PARTS.items():
+            xlsx.writestr(name, xml)
+
+        with xlsx.open("xl/sharedStrings.xml", "w") as strings:
+            strings.write(
+                f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                f'<sst xmlns="{XLSX_NS}" count="{2 * last}" uniqueCount="{2 * last}">'
+                f'<si><t>CNJ</t></si><si><t>Descrição</t></si>'.encode()
+            )
+            for index in range(rows):
+                cnj = format_cnj(random_cnj_digits(rng))
+                strings.write(f"<si><t>{cnj}</t></si><si><t>Processo {index}</t></si>".encode())
+            strings.write(b"</sst>")
+
+        with xlsx.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(
+                f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                f'<worksheet xmlns="{XLSX_NS}"><dimension ref="A1:B{last}"/><sheetData>'.encode()
+            )
+            for row in range(1, last + 1):
+                sheet.write(
+                    f'<row r="{row}"><c r="A{row}" t="s"><v>{2 * row - 2}</v></c>'
+                    f'<c r="B{row}" t="s"><v>{2 * row - 1}</v></c></row>'.encode()
+                )
+            sheet.write(b"</sheetData></worksheet>")
+
+
+def old_parse(path: Path) -> list:
+    """Previous code path: read the upload into memory, full workbook, cell by cell"""
+    workbook = openpyxl.load_workbook(BytesIO(path.read_bytes()), data_only=True)
+    sheet = workbook.worksheets[0]
+
+    cnj_column = None
+    for col_idx, cell in enumerate(sheet[1], start=1):
+        if cell.value and str(cell.value).strip().upper() == "CNJ":
+            cnj_column = col_idx
+            break
+
+    values = []
+    for row_idx in range(2, sheet.max_row + 1):
+        cell = sheet.cell(row=row_idx, column=cnj_column)
+        if cell.value is not None and str(cell.value).strip():
+            values.append(cell.value)
+
+    workbook.close()
+    return sorted(normalize_cnjs(values)["cnjs"])
+
+
+def measure(parse, path: Path):
+    """Run ``parse`` twice: once timed, once under tracemalloc"""
+    started = time.perf_counter()
+    cnjs = parse(path)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    parse(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak, len(cnjs)
+
+
+def main(sizes: list, old_max_rows: int):
+    print(f"{'rows':>10} {'file':>8} {'mode':<7} {'seconds':>8} {'peak MB':>8} {'cnjs':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = Path(tmp) / f"cnjs_{rows}.xlsx"
+            print(f"📝 Writing {rows:,} rows...")
+            write_sheet(path, rows)
+            file_mb = path.stat().st_size / 1024 / 1024
+
+            modes = [("stream", read_excel_cnjs)]
+            if rows <= old_max_rows:
+                modes.insert(0, ("old", old_parse))
+
+            for name, parse in modes:
+                elapsed, peak, count = measure(parse, path)
+                print(
+                    f"{rows:>10,} {file_mb:>6.1f}MB {name:<7} {elapsed:>8.2f} "
+                    f"{peak / 1024 / 1024:>8.1f} {count:>10,}"
+                )
+
+            path.unlink()
+
+    print(f"\nℹ️  The old path is skipped above {old_max_rows:,} rows (--old-max-rows).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", default="10000,100000,1000000")
+    parser.add_argument("--old-max-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    main([int(rows) for rows in args.rows.split(",")], args.old_max_rows)
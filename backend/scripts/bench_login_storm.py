@@ -0,0 +1,96 @@
+"""
+Benchmark: latency of other requests during a login storm
+Run: python -m scripts.bench_login_storm [--logins 50] [--interval-ms 10]
+
+Simulates a burst of concurrent logins (bcrypt verifications) while a
+lightweight "health check" request runs every few milliseconds on the same
+event loop, and reports the health check latency percentiles with bcrypt
+running inline (old behaviour) and on the password hashing pool.
+No database is needed.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi import HTTPException
+from utils.auth import hash_password, verify_password, verify_password_async
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def health_probe(stop: asyncio.Event, interval: float, latencies: list):
+    """
+    Issue a cheap request every ``interval`` seconds and record its latency
+
+    The latency is how late the loop got to the request after it "arrived",
+    which is what a client calling /health would see.
+    """
+    while not stop.is_set():
+        arrival = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        latencies.append((time.perf_counter() - arrival) * 1000)
+
+
+async def login_inline(senha_hash: str):
+    """Login as before: bcrypt on the event loop"""
+    return verify_password("senha123", senha_hash)
+
+
+async def login_pool(senha_hash: str):
+    """Login with bcrypt on the password hashing pool"""
+    try:
+        return await verify_password_async("senha123", senha_hash)
+    except HTTPException:
+        return None  # rejected with 503
+
+
+async def storm(login, logins: int, interval: float, senha_hash: str):
+    latencies = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(health_probe(stop, interval, latencies))
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login(senha_hash) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe
+
+    rejected = sum(1 for result in results if result is None)
+    return latencies, elapsed, rejected
+
+
+async def main(logins: int, interval_ms: float):
+    senha_hash = hash_password("senha123")
+    interval = interval_ms / 1000
+
+    print(f"🔐 Login storm: {logins} concurrent logins, probe every {interval_ms}ms\n")
+    print(f"{'mode':<8} {'probes':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'storm s':>8} {'503s':>5}")
+
+    for name, login in (("inline", login_inline), ("pool", login_pool)):
+        latencies, elapsed, rejected = await storm(login, logins, interval, senha_hash)
+        print(
+            f"{name:<8} {len(latencies):>7} {statistics.median(latencies):>9.2f} "
+            f"{percentile(latencies, 99):>9.2f} {max(latencies):>9.2f} "
+            f"{elapsed:>8.2f} {rejected:>5}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--interval-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.logins, args.interval_ms))
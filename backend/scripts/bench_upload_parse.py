@@ -0,0 +1,95 @@
+"""
+Benchmark: latency of other requests while spreadsheets are parsed
+Run: python -m scripts.bench_upload_parse [--rows 100000] [--uploads 4] [--interval-ms 10]
+
+Parses a few large uploads concurrently while a lightweight "health check"
+request runs every few milliseconds on the same event loop, and reports
+the health check latency percentiles with parsing on the event loop (old
+behaviour), on a thread and on the Excel parsing process pool.
+No database is needed.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi import HTTPException
+
+from scripts.bench_excel_parse import write_sheet
+from scripts.bench_login_storm import health_probe, percentile
+from utils.excel_parser import excel_pool, parse_excel_cnjs, read_excel_cnjs
+
+
+async def parse_inline(path: str):
+    """Parse as before: openpyxl on the event loop"""
+    return read_excel_cnjs(path)
+
+
+async def parse_thread(path: str):
+    """Parse on a thread (still holds the GIL)"""
+    return await asyncio.to_thread(read_excel_cnjs, path)
+
+
+async def parse_pool(path: str):
+    """Parse on the Excel parsing process pool"""
+    try:
+        return await parse_excel_cnjs(path)
+    except HTTPException:
+        return None  # rejected with 503
+
+
+async def burst(parse, uploads: int, interval: float, path: str):
+    latencies = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(health_probe(stop, interval, latencies))
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(parse(path) for _ in range(uploads)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe
+
+    rejected = sum(1 for result in results if result is None)
+    return latencies, elapsed, rejected
+
+
+async def main(rows: int, uploads: int, interval_ms: float):
+    interval = interval_ms / 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "upload.xlsx"
+        print(f"📝 Writing {rows:,} rows...")
+        write_sheet(path, rows)
+
+        # Start the worker processes outside the measurement
+        await parse_pool(str(path))
+
+        print(f"📊 {uploads} concurrent uploads, probe every {interval_ms}ms\n")
+        print(f"{'mode':<8} {'probes':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'burst s':>8} {'503s':>5}")
+
+        for name, parse in (("inline", parse_inline), ("thread", parse_thread), ("pool", parse_pool)):
+            latencies, elapsed, rejected = await burst(parse, uploads, interval, str(path))
+            print(
+                f"{name:<8} {len(latencies):>7} {statistics.median(latencies):>9.2f} "
+                f"{percentile(latencies, 99):>9.2f} {max(latencies):>9.2f} "
+                f"{elapsed:>8.2f} {rejected:>5}"
+            )
+
+    excel_pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--uploads", type=int, default=4)
+    parser.add_argument("--interval-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.uploads, args.interval_ms))
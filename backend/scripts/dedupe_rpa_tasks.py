@@ -0,0 +1,108 @@
+"""
+Script to remove duplicate portal tasks from the RPA tasks collection
+Run: python -m scripts.dedupe_rpa_tasks [--dry-run]
+
+Before event leases, two converter replicas could process the same event
+and create the RPA tasks of a solicitacao twice. Those duplicates make the
+unique (portal_metadata.solicitacao_id, process_number) index fail. For
+each duplicated CNJ the most advanced task is kept (completed, then
+processing, failed, pending; the oldest on ties) and the others are
+deleted, then the indexes are created. Safe to run more than once.
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import db_manager
+
+BATCH_SIZE = 1000
+
+# Which duplicate to keep: lower rank wins
+STATUS_RANK = {"completed": 0, "processing": 1, "failed": 2, "pending": 3}
+
+DUPLICATES_PIPELINE = [
+    {"$match": {"portal_metadata.solicitacao_id": {"$exists": True}}},
+    {"$group": {
+        "_id": {
+            "solicitacao_id": "$portal_metadata.solicitacao_id",
+            "process_number": "$process_number",
+        },
+        "tasks": {"$push": {"_id": "$_id", "status": "$status", "created_at": "$created_at"}},
+        "count": {"$sum": 1},
+    }},
+    {"$match": {"count": {"$gt": 1}}},
+]
+
+
+def _keep_order(task: dict) -> tuple:
+    return (
+        STATUS_RANK.get(task.get("status"), len(STATUS_RANK)),
+        task.get("created_at") or datetime.max,
+        task["_id"],
+    )
+
+
+async def dedupe_tasks(db, dry_run: bool = False) -> int:
+    """
+    Delete duplicate portal tasks, keeping one per (solicitacao, CNJ)
+
+    Args:
+        db: Database instance
+        dry_run: Only count the duplicates
+
+    Returns:
+        Number of tasks deleted (or that would be deleted)
+    """
+    duplicates = []
+
+    cursor = db.tasks.aggregate(DUPLICATES_PIPELINE, allowDiskUse=True)
+    async for group in cursor:
+        keep, *extra = sorted(group["tasks"], key=_keep_order)
+        duplicates.extend(task["_id"] for task in extra)
+
+    if not dry_run:
+        for start in range(0, len(duplicates), BATCH_SIZE):
+            await db.tasks.delete_many({"_id": {"$in": duplicates[start:start + BATCH_SIZE]}})
+
+    return len(duplicates)
+
+
+async def main(dry_run: bool):
+    """Remove the duplicates and create the RPA task indexes"""
+    print("🧹 Looking for duplicate portal tasks...")
+
+    # Connect to MongoDB
+    db = db_manager.db
+
+    try:
+        removed = await dedupe_tasks(db, dry_run=dry_run)
+
+        if dry_run:
+            print(f"ℹ️  {removed} duplicate tasks found (dry run, nothing deleted)")
+            return
+
+        print(f"✅ {removed} duplicate tasks deleted")
+
+        print("📑 Creating indexes...")
+        if not await db_manager.init_rpa_task_indexes():
+            raise RuntimeError("RPA task indexes could not be created")
+        print("✅ Indexes created")
+
+    except Exception as e:
+        print(f"\n❌ Error removing duplicate tasks: {e}")
+        raise
+    finally:
+        await db_manager.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.dry_run))
@@ -0,0 +1,185 @@
+"""
+Script to move embedded CNJs and resultados into the solicitacao_cnjs collection
+Run: python -m scripts.migrate_solicitacao_cnjs
+
+Creates one task document per (solicitacao, CNJ) with the client code, so
+new results are cached. Each CNJ takes the state of its embedded result,
+else of its RPA task, so bots are not sent again after work that already
+started or finished. CNJs still processing are leased to the RPA for
+rpa_lease_seconds, like a task started without a claim. CNJs of finished
+solicitacoes that have neither are marked as erro. The counters of
+unfinished solicitacoes are recomputed from the new documents, then the
+``cnjs`` and ``resultados`` arrays are removed, as are the ``lotes`` arrays
+of reported CNJs. Safe to run more than once.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from datetime import datetime, timedelta
+from typing import Any, Dict
+from pymongo import UpdateOne
+from config.settings import settings
+from database import db_manager
+from workers.cnj_tasks import (
+    CnjTaskStore, EM_EXECUCAO, ERRO, FINAL_STATUSES, PENDENTE, normalize_status, task_id,
+)
+
+BATCH_SIZE = 1000
+
+# Result of the CNJs a finished solicitacao has no result for
+MISSING_RESULT = {
+    "status": ERRO,
+    "erro": "Sem resultado registrado antes da migração",
+}
+
+
+async def rpa_results(db, solicitacao_id: str) -> Dict[str, Dict[str, Any]]:
+    """State of the RPA tasks of a solicitacao, by CNJ"""
+    results = {}
+    cursor = db.tasks.find(
+        {"portal_metadata.solicitacao_id": solicitacao_id},
+        {"process_number": 1, "status": 1, "file_path": 1, "error_message": 1, "updated_at": 1},
+    )
+
+    async for task in cursor:
+        status = normalize_status(task.get("status", "pending"))
+        documentos_urls = []
+        if status != PENDENTE and task.get("file_path"):
+            documentos_urls = [task["file_path"]]
+        results[task["process_number"]] = {
+            "status": status,
+            "documentos_encontrados": len(documentos_urls),
+            "documentos_urls": documentos_urls,
+            "erro": task.get("error_message") if status == ERRO else None,
+            "processado_em": task.get("updated_at") if status != PENDENTE else None,
+        }
+
+    return results
+
+
+async def migrate_solicitacao(
+    db, store: CnjTaskStore, sol: dict, codigos: Dict[str, str]
+) -> int:
+    """
+    Create the task documents of a single solicitacao
+
+    Returns:
+        Number of CNJs that got a state other than pendente
+    """
+    solicitacao_id = str(sol["_id"])
+    cnjs = list(dict.fromkeys(sol.get("cnjs", [])))
+    finished = sol.get("status") in FINAL_STATUSES
+
+    await store.create_for_solicitacao(
+        solicitacao_id=solicitacao_id,
+        cliente_id=sol["cliente_id"],
+        cnjs=cnjs,
+        created_at=sol["created_at"],
+        cliente_codigo=codigos.get(sol["cliente_id"]),
+    )
+
+    # RPA task state first; embedded results (the last entry of a CNJ wins)
+    # are what the portal recorded, so they take precedence
+    results = await rpa_results(db, solicitacao_id)
+    for resultado in sol.get("resultados", []):
+        results[resultado["cnj"]] = {
+            "status": normalize_status(resultado.get("status", PENDENTE)),
+            "documentos_encontrados": resultado.get("documentos_encontrados", 0),
+            "documentos_urls": resultado.get("documentos_urls", []),
+            "erro": resultado.get("erro"),
+            "processado_em": resultado.get("processado_em"),
+        }
+
+    if finished:
+        for cnj in cnjs:
+            if results.get(cnj, {}).get("status", PENDENTE) == PENDENTE:
+                results[cnj] = dict(MISSING_RESULT, processado_em=sol.get("concluido_em"))
+
+    now = datetime.utcnow()
+    operations = []
+    for cnj, result in results.items():
+        if result["status"] == PENDENTE:
+            continue
+
+        update = dict(result, contabilizado=result["status"], updated_at=now)
+        if result["status"] == EM_EXECUCAO:
+            update["lease_owner"] = "rpa"
+            update["lease_expira_em"] = now + timedelta(seconds=settings.rpa_lease_seconds)
+
+        operations.append(UpdateOne({"_id": task_id(solicitacao_id, cnj)}, {"$set": update}))
+
+    for start in range(0, len(operations), BATCH_SIZE):
+        await db.solicitacao_cnjs.bulk_write(
+            operations[start:start + BATCH_SIZE], ordered=True
+        )
+
+    # Finished solicitacoes keep the counters they were finalized with
+    if not finished:
+        await store.recount(solicitacao_id)
+
+    await db.solicitacoes.update_one(
+        {"_id": sol["_id"]}, {"$unset": {"cnjs": "", "resultados": ""}}
+    )
+
+    return len(operations)
+
+
+async def migrate():
+    """Migrate every solicitacao that still embeds its CNJs or results"""
+    print("🚚 Migrating resultados to solicitacao_cnjs...")
+
+    # Connect to MongoDB
+    db = db_manager.db
+
+    try:
+        print("📑 Creating indexes...")
+        await db_manager.init_indexes()
+        print("✅ Indexes created")
+
+        codigos = {
+            str(cliente["_id"]): cliente["codigo"]
+            async for cliente in db.clientes.find({}, {"codigo": 1})
+        }
+
+        store = CnjTaskStore(db)
+        migrated = 0
+
+        cursor = db.solicitacoes.find(
+            {"$or": [{"cnjs": {"$exists": True}}, {"resultados": {"$exists": True}}]},
+            {
+                "cliente_id": 1,
+                "cnjs": 1,
+                "resultados": 1,
+                "status": 1,
+                "created_at": 1,
+                "concluido_em": 1,
+            },
+        )
+
+        async for sol in cursor:
+            copied = await migrate_solicitacao(db, store, sol, codigos)
+            migrated += 1
+            print(f"✅ Solicitacao {sol['_id']}: {len(sol.get('cnjs', []))} CNJs, {copied} results")
+
+        # Batch IDs earlier versions appended to every reported CNJ
+        result = await db.solicitacao_cnjs.update_many(
+            {"lotes": {"$exists": True}}, {"$unset": {"lotes": ""}}
+        )
+        if result.modified_count:
+            print(f"🧹 Removed batch IDs from {result.modified_count} CNJs")
+
+        print(f"\n✅ Migration completed: {migrated} solicitacoes migrated")
+
+    except Exception as e:
+        print(f"\n❌ Error migrating database: {e}")
+        raise
+    finally:
+        await db_manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -0,0 +1,210 @@
+"""
+Shared test fixtures
+
+Tests run against an in-memory MongoDB (mongomock-motor), so no server is
+needed. Run from the backend directory: python -m pytest
+"""
+import asyncio
+import random
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient, AsyncMongoMockCollection
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.status import SolicitacaoStatus
+
+
+@pytest.fixture
+def db():
+    """Empty in-memory database"""
+    return AsyncMongoMockClient()["portal_rpa_test"]
+
+
+# Collection methods that run one database command
+COMMAND_METHODS = (
+    "bulk_write",
+    "count_documents",
+    "delete_many",
+    "delete_one",
+    "find_one",
+    "find_one_and_update",
+    "insert_many",
+    "insert_one",
+    "update_many",
+    "update_one",
+)
+
+
+@pytest.fixture
+def interleaved(monkeypatch):
+    """
+    Make concurrent database calls interleave
+
+    mongomock runs every operation synchronously, so coroutines gathered
+    together would otherwise run one after the other. Each call now yields
+    to the event loop a random number of times before and after running.
+    """
+    rng = random.Random(1)
+
+    async def yield_randomly():
+        for _ in range(rng.randrange(4)):
+            await asyncio.sleep(0)
+
+    def make_wrapper(original):
+        async def wrapper(self, *args, **kwargs):
+            await yield_randomly()
+            result = await original(self, *args, **kwargs)
+            await yield_randomly()
+            return result
+
+        return wrapper
+
+    for name in COMMAND_METHODS:
+        monkeypatch.setattr(
+            AsyncMongoMockCollection, name, make_wrapper(getattr(AsyncMongoMockCollection, name))
+        )
+
+
+@pytest.fixture
+def mongo_commands(monkeypatch):
+    """
+    Record the database commands the code under test sends
+
+    Returns:
+        List of (collection, method) tuples, one per command (a cursor
+        counts once, when it is created)
+    """
+    commands = []
+
+    def make_wrapper(name, original):
+        def wrapper(self, *args, **kwargs):
+            commands.append((self.name, name))
+            return original(self, *args, **kwargs)
+
+        return wrapper
+
+    for name in COMMAND_METHODS + ("find", "aggregate"):
+        monkeypatch.setattr(
+            AsyncMongoMockCollection,
+            name,
+            make_wrapper(name, getattr(AsyncMongoMockCollection, name)),
+        )
+
+    return commands
+
+
+@pytest.fixture
+def api(db):
+    """
+    Test client of the API using the in-memory database
+
+    The startup handlers (index creation, change streams) are not run.
+    """
+    from fastapi.testclient import TestClient
+    from database import get_database
+    from main import app
+
+    app.dependency_overrides[get_database] = lambda: db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def user(db):
+    """Active user ID"""
+    result = asyncio.run(db.usuarios.insert_one(
+        {"email": "usuario@example.com", "nome": "Usuário", "ativo": True, "senha_hash": "x"}
+    ))
+    return str(result.inserted_id)
+
+
+@pytest.fixture
+def auth_headers(user):
+    """Authorization headers of the active user"""
+    from utils.auth import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token({'sub': user})}"}
+
+
+@pytest.fixture
+def cliente(db, monkeypatch):
+    """
+    Active client, visible through the in-memory client registry
+
+    Returns:
+        Client ID
+    """
+    from utils.clientes import cliente_registry
+
+    # The registry is process-wide; start each test from this database
+    monkeypatch.setattr(cliente_registry, "_lock", asyncio.Lock())
+    cliente_registry.invalidate()
+
+    cliente_id = ObjectId()
+    asyncio.run(db.clientes.insert_one(
+        {"_id": cliente_id, "nome": "Agibank", "codigo": "agibank", "ativo": True}
+    ))
+
+    yield str(cliente_id)
+    cliente_registry.invalidate()
+
+
+@pytest.fixture
+def create_solicitacao(db):
+    """
+    Factory inserting a pending solicitacao with one task per CNJ
+
+    Returns:
+        Async function (cnjs, user_id="user", cliente_id="cliente",
+        cliente_codigo=None) -> solicitacao ID
+    """
+    from workers.cnj_tasks import CnjTaskStore
+
+    async def create(
+        cnjs: List[str],
+        user_id: str = "user",
+        cliente_id: str = "cliente",
+        cliente_codigo: Optional[str] = None,
+    ) -> str:
+        now = datetime.utcnow()
+        result = await db.solicitacoes.insert_one({
+            "user_id": user_id,
+            "cliente_id": cliente_id,
+            "servico": "buscar_documentos",
+            "status": SolicitacaoStatus.PENDENTE.value,
+            "total_cnjs": len(cnjs),
+            "cnjs_processados": 0,
+            "cnjs_sucesso": 0,
+            "cnjs_erro": 0,
+            "created_at": now,
+            "updated_at": now,
+        })
+        solicitacao_id = str(result.inserted_id)
+        await CnjTaskStore(db).create_for_solicitacao(
+            solicitacao_id, cliente_id, cnjs, now, cliente_codigo=cliente_codigo
+        )
+        return solicitacao_id
+
+    return create
+
+
+def fake_cnjs(count: int, prefix: int = 0) -> List[str]:
+    """Distinct well-formed CNJs (check digits are not valid)"""
+    return [f"{prefix:07d}-00.2024.8.26.{index:04d}" for index in range(count)]
+
+
+def valid_cnjs(count: int, prefix: int = 0) -> List[str]:
+    """Distinct CNJs with valid check digits, in CNJ order"""
+    cnjs = []
+    for index in range(count):
+        numero, origem = f"{prefix + 1:07d}", f"{index:04d}"
+        dd = 98 - int(f"{numero}2024826{origem}") * 100 % 97
+        cnjs.append(f"{numero}-{dd:02d}.2024.8.26.{origem}")
+    return sorted(cnjs)
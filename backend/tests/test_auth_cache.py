@@ -0,0 +1,101 @@
+"""
+Tests for the cached token and user principal resolution
+"""
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from utils import auth
+from utils import cache as cache_module
+from utils.auth import create_access_token, invalidate_user
+from utils.cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock of the caches"""
+    now = [1000.0]
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def principal_cache(monkeypatch):
+    """Empty principal cache for the test"""
+    principals = TTLCache(maxsize=100, ttl=60)
+    monkeypatch.setattr(auth, "principal_cache", principals)
+    return principals
+
+
+def test_ttl_cache_expires_entries(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=5)
+    cache.set("c", 3, ttl=600)  # Never kept longer than the cache TTL
+
+    clock[0] += 5
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+    clock[0] += 55
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_the_least_recently_used_entry(clock):
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache) == 2
+
+
+def test_ttl_cache_skips_entries_already_expired():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("expired", 1, ttl=0)
+
+    assert cache.get("expired") is None
+    assert len(cache) == 0
+
+
+def test_token_is_not_cached_past_its_expiration(db, user, principal_cache, clock):
+    async def scenario():
+        token = create_access_token({"sub": user}, expires_delta=timedelta(seconds=5))
+        assert str((await auth._authenticate_token(token, db))["_id"]) == user
+
+        clock[0] += 6
+        assert principal_cache.get(("token", token)) is None
+
+    asyncio.run(scenario())
+
+
+def test_invalidated_user_is_reloaded(db, user, principal_cache, mongo_commands):
+    async def scenario():
+        token = create_access_token({"sub": user})
+        await auth._authenticate_token(token, db)
+
+        await db.usuarios.update_one({"_id": ObjectId(user)}, {"$set": {"ativo": False}})
+        mongo_commands.clear()
+
+        # Served from the cache until invalidated
+        assert (await auth._authenticate_token(token, db))["ativo"] is True
+        assert mongo_commands == []
+
+        invalidate_user(user)
+        with pytest.raises(HTTPException) as raised:
+            await auth._authenticate_token(token, db)
+        assert raised.value.status_code == 403
+        assert mongo_commands == [("usuarios", "find_one")]
+
+    asyncio.run(scenario())
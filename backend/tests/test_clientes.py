@@ -0,0 +1,100 @@
+"""
+Tests for the in-memory client registry
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from utils import clientes as clientes_module
+from utils.clientes import MISS_RELOAD_INTERVAL, ClienteRegistry
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock of the registry"""
+    now = [1000.0]
+    monkeypatch.setattr(clientes_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+async def add_cliente(db, codigo: str, **fields) -> str:
+    result = await db.clientes.insert_one(
+        dict({"nome": codigo.title(), "codigo": codigo, "ativo": True}, **fields)
+    )
+    return str(result.inserted_id)
+
+
+def test_lookups_are_served_from_memory_until_the_ttl(db, clock, mongo_commands):
+    async def scenario():
+        registry = ClienteRegistry(ttl_seconds=60)
+        agibank = await add_cliente(db, "agibank")
+        mongo_commands.clear()
+
+        assert (await registry.get_by_id(db, agibank))["codigo"] == "agibank"
+        assert (await registry.get_by_codigo(db, "agibank"))["_id"] == ObjectId(agibank)
+        assert [c["codigo"] for c in await registry.list(db)] == ["agibank"]
+        assert mongo_commands == [("clientes", "find")]
+
+        # A renamed client is picked up once the TTL expires
+        await db.clientes.update_one({"_id": ObjectId(agibank)}, {"$set": {"nome": "Agi"}})
+        clock[0] += 30
+        assert (await registry.get_by_id(db, agibank))["nome"] == "Agibank"
+
+        clock[0] += 31
+        assert (await registry.get_by_id(db, agibank))["nome"] == "Agi"
+        assert mongo_commands.count(("clientes", "find")) == 2
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_reloads_on_the_next_lookup(db, clock):
+    async def scenario():
+        registry = ClienteRegistry(ttl_seconds=60)
+        agibank = await add_cliente(db, "agibank")
+        await registry.load(db)
+
+        await db.clientes.update_one({"_id": ObjectId(agibank)}, {"$set": {"ativo": False}})
+        assert len(await registry.list(db)) == 1
+
+        registry.invalidate()
+        assert await registry.list(db) == []
+        assert len(await registry.list(db, ativo_apenas=False)) == 1
+
+    asyncio.run(scenario())
+
+
+def test_unknown_clients_reload_at_most_once_per_interval(db, clock, mongo_commands):
+    async def scenario():
+        registry = ClienteRegistry(ttl_seconds=60)
+        await registry.load(db)
+        clock[0] += MISS_RELOAD_INTERVAL + 1
+
+        # Created by another process after the registry loaded
+        creditas = await add_cliente(db, "creditas")
+        mongo_commands.clear()
+
+        assert (await registry.get_many(db, [creditas]))[creditas]["codigo"] == "creditas"
+        assert mongo_commands == [("clientes", "find")]
+
+        # Unknown IDs and codes do not reload again within the interval
+        assert await registry.get_many(db, [str(ObjectId())]) == {}
+        assert await registry.get_by_codigo(db, "desconhecido") is None
+        assert mongo_commands == [("clientes", "find")]
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_lookups_share_one_reload(db, clock, mongo_commands, interleaved):
+    async def scenario():
+        registry = ClienteRegistry(ttl_seconds=60)
+        agibank = await add_cliente(db, "agibank")
+        mongo_commands.clear()
+
+        found = await asyncio.gather(*(registry.get_by_id(db, agibank) for _ in range(20)))
+
+        assert all(cliente["codigo"] == "agibank" for cliente in found)
+        assert mongo_commands == [("clientes", "find")]
+
+    asyncio.run(scenario())
@@ -0,0 +1,58 @@
+"""
+Tests for CNJ normalization
+"""
+import random
+
+import pytest
+
+from scripts.bench_cnj_normalize import random_cnj_digits
+from utils.cnj import MAX_EXACT_FLOAT, format_cnj, normalize_cnj
+
+CNJ = "0001234-71.2024.8.26.0100"
+
+
+def test_normalizes_supported_representations():
+    digits = CNJ.replace("-", "").replace(".", "")
+
+    assert normalize_cnj(CNJ, check_digits=True) == CNJ
+    assert normalize_cnj(digits, check_digits=True) == CNJ
+    assert normalize_cnj(int(digits), check_digits=True) == CNJ
+    assert normalize_cnj(f" {digits[:7]} {digits[7:]} ", check_digits=True) == CNJ
+
+
+def test_exact_float_is_zero_filled():
+    # 16 significant digits still fit a double exactly
+    digits = "0000" + "5432101" + "1" * 9
+    value = float(int(digits))
+
+    assert value <= MAX_EXACT_FLOAT
+    assert normalize_cnj(value, check_digits=False) == format_cnj(digits)
+
+
+def test_float_above_double_precision_is_rejected():
+    with pytest.raises(ValueError, match="precision lost"):
+        normalize_cnj(float(int(CNJ.replace("-", "").replace(".", ""))), check_digits=False)
+
+
+def test_float_cnjs_never_become_other_processes():
+    rng = random.Random(97)
+    digits = [random_cnj_digits(rng) for _ in range(5000)]
+
+    accepted = 0
+    for expected in digits:
+        try:
+            cnj = normalize_cnj(float(int(expected)), check_digits=True)
+        except ValueError as e:
+            assert str(e) == "precision lost (numeric cell, store CNJs as text)"
+            continue
+
+        # Only numbers a double holds exactly are accepted
+        assert cnj == format_cnj(expected)
+        accepted += 1
+
+    assert accepted < len(digits) // 100
+
+
+def test_invalid_check_digits():
+    with pytest.raises(ValueError, match="invalid check digits"):
+        normalize_cnj("0001234-72.2024.8.26.0100", check_digits=True)
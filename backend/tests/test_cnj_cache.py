@@ -0,0 +1,70 @@
+"""
+Tests for the expiration of the CNJ result cache
+"""
+import asyncio
+
+from pymongo.errors import OperationFailure
+
+from config.settings import settings
+from workers.cnj_cache import CnjResultCache
+
+
+def ttl_of(indexes: dict) -> int:
+    [ttl] = [
+        index["expireAfterSeconds"]
+        for index in indexes.values()
+        if index["key"] == [("buscado_em", 1)]
+    ]
+    return ttl
+
+
+def test_ttl_is_the_longest_configured_max_age(db, monkeypatch):
+    monkeypatch.setattr(settings, "cnj_cache_max_age_hours", 72)
+
+    async def scenario():
+        await db.clientes.insert_many([
+            {"codigo": "agibank", "config_rpa": {"cache_max_age_hours": 168}},
+            {"codigo": "creditas", "config_rpa": {"cache_max_age_hours": 0}},
+            {"codigo": "outro"},
+        ])
+        await CnjResultCache(db).init_ttl_index()
+
+        assert ttl_of(await db.cnj_resultados_cache.index_information()) == 168 * 3600
+
+    asyncio.run(scenario())
+
+
+def test_ttl_defaults_to_the_setting(db, monkeypatch):
+    monkeypatch.setattr(settings, "cnj_cache_max_age_hours", 24)
+
+    async def scenario():
+        await CnjResultCache(db).init_ttl_index()
+
+        assert ttl_of(await db.cnj_resultados_cache.index_information()) == 24 * 3600
+
+    asyncio.run(scenario())
+
+
+def test_changed_ttl_updates_the_existing_index(db, monkeypatch):
+    monkeypatch.setattr(settings, "cnj_cache_max_age_hours", 24)
+    commands = []
+
+    async def existing_index(*args, **kwargs):
+        raise OperationFailure("Index already exists with different options", code=85)
+
+    async def command(*args, **kwargs):
+        commands.append((args, kwargs))
+
+    async def scenario():
+        cache = CnjResultCache(db)
+        monkeypatch.setattr(cache.collection, "create_index", existing_index)
+        monkeypatch.setattr(db, "command", command)
+
+        await cache.init_ttl_index()
+
+    asyncio.run(scenario())
+
+    assert commands == [(
+        ("collMod", "cnj_resultados_cache"),
+        {"index": {"keyPattern": {"buscado_em": 1}, "expireAfterSeconds": 24 * 3600}},
+    )]
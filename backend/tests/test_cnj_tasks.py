@@ -0,0 +1,248 @@
+"""
+Tests for the per-CNJ task store counters
+"""
+import asyncio
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import AutoReconnect
+
+from config.settings import settings
+from conftest import fake_cnjs
+from models.status import SolicitacaoStatus
+from workers.cnj_tasks import CONCLUIDO, EM_EXECUCAO, ERRO, CnjTaskStore
+
+
+async def counters_match_statuses(db, solicitacao_id: str) -> bool:
+    """Whether the stored counters agree with the per-CNJ statuses"""
+    solicitacao = await db.solicitacoes.find_one({"_id": ObjectId(solicitacao_id)})
+    statuses = [
+        doc["status"]
+        async for doc in db.solicitacao_cnjs.find({"solicitacao_id": solicitacao_id})
+    ]
+    return (
+        solicitacao["cnjs_processados"] == sum(s in (CONCLUIDO, ERRO) for s in statuses)
+        and solicitacao["cnjs_sucesso"] == statuses.count(CONCLUIDO)
+        and solicitacao["cnjs_erro"] == statuses.count(ERRO)
+    )
+
+
+def test_batch_write_overwritten_by_a_later_batch_is_still_counted(db, create_solicitacao):
+    async def scenario():
+        first, second = cnjs = fake_cnjs(2)
+        solicitacao_id = await create_solicitacao(cnjs)
+        store = CnjTaskStore(db)
+        bulk_write = store.collection.bulk_write
+        calls, later = [], []
+
+        async def interleaved_bulk_write(operations, **kwargs):
+            calls.append(operations)
+            if len(calls) > 1:
+                return await bulk_write(operations, **kwargs)
+
+            # A bot moves the second CNJ before this batch's write...
+            await store.record_result(solicitacao_id, second, EM_EXECUCAO)
+            result = await bulk_write(operations, **kwargs)
+            # ...and another batch writes the first CNJ right after it
+            later.append(asyncio.create_task(store.record_results([
+                {"solicitacao_id": solicitacao_id, "cnj": first, "status": ERRO},
+            ])))
+            await asyncio.sleep(0)
+            return result
+
+        store.collection.bulk_write = interleaved_bulk_write
+
+        outcomes = await store.record_results([
+            {"solicitacao_id": solicitacao_id, "cnj": first, "status": CONCLUIDO},
+            {"solicitacao_id": solicitacao_id, "cnj": second, "status": CONCLUIDO},
+        ])
+
+        assert all(outcome["success"] for outcome in outcomes)
+        assert all(outcome["success"] for outcome in await later[0])
+        assert await counters_match_statuses(db, solicitacao_id)
+
+        solicitacao = await db.solicitacoes.find_one({"_id": ObjectId(solicitacao_id)})
+        assert (solicitacao["cnjs_sucesso"], solicitacao["cnjs_erro"]) == (1, 1)
+
+    asyncio.run(scenario())
+
+
+def test_parallel_results_count_each_cnj_once_and_finalize_once(db, create_solicitacao, interleaved):
+    async def scenario():
+        cnjs = fake_cnjs(100)
+        solicitacao_id = await create_solicitacao(cnjs)
+        store = CnjTaskStore(db)
+
+        # Every CNJ is reported twice (a retried report) in parallel
+        reports = [
+            store.record_result(solicitacao_id, cnj, ERRO if index % 4 == 0 else CONCLUIDO)
+            for _ in range(2)
+            for index, cnj in enumerate(cnjs)
+        ]
+        results = await asyncio.gather(*reports)
+
+        finalized = [result for result in results if result["solicitacao"]["finalizada"]]
+        assert len(finalized) == 1
+        assert finalized[0]["solicitacao"]["finalizada"] == SolicitacaoStatus.CONCLUIDO.value
+
+        solicitacao = await db.solicitacoes.find_one({"_id": ObjectId(solicitacao_id)})
+        assert solicitacao["status"] == SolicitacaoStatus.CONCLUIDO.value
+        assert solicitacao["cnjs_processados"] == 100
+        assert solicitacao["cnjs_sucesso"] == 75
+        assert solicitacao["cnjs_erro"] == 25
+
+    asyncio.run(scenario())
+
+
+def test_parallel_batches_and_single_reports(db, create_solicitacao, interleaved):
+    async def scenario():
+        cnjs = fake_cnjs(100)
+        solicitacao_id = await create_solicitacao(cnjs)
+        store = CnjTaskStore(db)
+
+        batches = [
+            store.record_results([
+                {"solicitacao_id": solicitacao_id, "cnj": cnj, "status": CONCLUIDO}
+                for cnj in cnjs[start:start + 10]
+            ])
+            for start in range(0, 100, 10)
+        ]
+        singles = [
+            store.record_result(solicitacao_id, cnj, EM_EXECUCAO) for cnj in cnjs[::3]
+        ]
+        await asyncio.gather(*batches, *singles)
+
+        # Whatever the interleaving, the counters match the final statuses
+        assert await counters_match_statuses(db, solicitacao_id)
+
+        # Finish the CNJs a late "em_execucao" report moved back
+        late = [
+            doc["cnj"]
+            async for doc in db.solicitacao_cnjs.find(
+                {"solicitacao_id": solicitacao_id, "status": EM_EXECUCAO}
+            )
+        ]
+        results = await asyncio.gather(
+            *(store.record_result(solicitacao_id, cnj, CONCLUIDO) for cnj in late)
+        )
+
+        solicitacao = await db.solicitacoes.find_one({"_id": ObjectId(solicitacao_id)})
+        assert solicitacao["cnjs_processados"] == 100
+        assert solicitacao["status"] == SolicitacaoStatus.CONCLUIDO.value
+        assert sum(1 for result in results if result["solicitacao"]["finalizada"]) <= 1
+
+    asyncio.run(scenario())
+
+
+def test_repeated_batch_reports_do_not_grow_the_cnj_documents(db, create_solicitacao):
+    async def scenario():
+        [cnj] = fake_cnjs(1)
+        solicitacao_id = await create_solicitacao([cnj])
+        store = CnjTaskStore(db)
+
+        async def document():
+            return await db.solicitacao_cnjs.find_one({"solicitacao_id": solicitacao_id})
+
+        await store.record_results(
+            [{"solicitacao_id": solicitacao_id, "cnj": cnj, "status": EM_EXECUCAO}]
+        )
+        first = await document()
+
+        for status in [EM_EXECUCAO, CONCLUIDO, CONCLUIDO] * 5:
+            outcomes = await store.record_results(
+                [{"solicitacao_id": solicitacao_id, "cnj": cnj, "status": status}]
+            )
+            assert outcomes[0]["success"]
+
+        last = await document()
+        assert set(last) == set(first)
+        assert not any(isinstance(value, list) and value for value in last.values())
+        assert last["status"] == last["contabilizado"] == CONCLUIDO
+        assert await counters_match_statuses(db, solicitacao_id)
+
+    asyncio.run(scenario())
+
+
+def fail_once(store: CnjTaskStore, method: str, after_applying: bool):
+    """Make one call of a store method raise a network error"""
+    original = getattr(store, method)
+    calls = []
+
+    async def failing(*args, **kwargs):
+        calls.append(args)
+        if len(calls) > 1:
+            return await original(*args, **kwargs)
+        if after_applying:
+            # The server applied the update but the reply was lost
+            await original(*args, **kwargs)
+        raise AutoReconnect("connection reset")
+
+    setattr(store, method, failing)
+
+
+async def report(store: CnjTaskStore, batch: bool, solicitacao_id: str, cnj: str, status: str):
+    if batch:
+        [outcome] = await store.record_results(
+            [{"solicitacao_id": solicitacao_id, "cnj": cnj, "status": status}]
+        )
+        assert outcome["success"]
+    else:
+        assert await store.record_result(solicitacao_id, cnj, status)
+
+
+@pytest.mark.parametrize("batch", [False, True], ids=["single", "batch"])
+@pytest.mark.parametrize("after_applying", [False, True], ids=["lost", "applied"])
+def test_retry_after_a_failed_counter_update_is_counted_once(
+    db, create_solicitacao, batch, after_applying
+):
+    async def scenario():
+        first, second = cnjs = fake_cnjs(2)
+        solicitacao_id = await create_solicitacao(cnjs)
+        store = CnjTaskStore(db)
+        fail_once(store, "apply_counters", after_applying)
+
+        with pytest.raises(AutoReconnect):
+            await report(store, batch, solicitacao_id, first, CONCLUIDO)
+
+        # The bot retries right away, then reports the last CNJ
+        await asyncio.wait_for(report(store, batch, solicitacao_id, first, CONCLUIDO), 1)
+        await report(store, batch, solicitacao_id, second, ERRO)
+
+        solicitacao = await db.solicitacoes.find_one({"_id": ObjectId(solicitacao_id)})
+        assert (solicitacao["cnjs_processados"], solicitacao["cnjs_sucesso"]) == (2, 1)
+        assert solicitacao["status"] == SolicitacaoStatus.CONCLUIDO.value
+        assert await counters_match_statuses(db, solicitacao_id)
+
+    asyncio.run(scenario())
+
+
+def test_count_whose_reporter_vanished_is_completed_after_settle_time(
+    db, create_solicitacao, monkeypatch
+):
+    monkeypatch.setattr(settings, "rpa_result_settle_seconds", 0)
+
+    async def scenario():
+        [cnj] = fake_cnjs(1)
+        solicitacao_id = await create_solicitacao([cnj])
+        store = CnjTaskStore(db)
+
+        # Neither the counter update nor the interruption flag is written
+        fail_once(store, "apply_counters", after_applying=False)
+        update_many = store.collection.update_many
+
+        async def unreachable(*args, **kwargs):
+            raise AutoReconnect("connection reset")
+
+        store.collection.update_many = unreachable
+        with pytest.raises(AutoReconnect):
+            await store.record_result(solicitacao_id, cnj, CONCLUIDO)
+        store.collection.update_many = update_many
+
+        result = await store.record_result(solicitacao_id, cnj, CONCLUIDO)
+
+        solicitacao = await db.solicitacoes.find_one({"_id": ObjectId(solicitacao_id)})
+        assert solicitacao["cnjs_processados"] == 1
+        assert solicitacao["status"] == SolicitacaoStatus.CONCLUIDO.value
+        assert result["solicitacao"]["status"] == SolicitacaoStatus.CONCLUIDO.value
+
+    asyncio.run(scenario())
@@ -0,0 +1,68 @@
+"""
+Tests for the duplicate RPA task cleanup and the tasks indexes
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import database
+from scripts.dedupe_rpa_tasks import dedupe_tasks
+
+
+def portal_task(solicitacao_id: str, process_number: str, status: str, age: int = 0) -> dict:
+    return {
+        "process_number": process_number,
+        "client_name": "agibank",
+        "status": status,
+        "created_at": datetime.utcnow() - timedelta(minutes=age),
+        "portal_metadata": {"solicitacao_id": solicitacao_id, "source": "portal_web"},
+    }
+
+
+def test_duplicates_do_not_stop_startup_and_are_removed(db, monkeypatch):
+    monkeypatch.setattr(database.db_manager, "_db", db)
+
+    async def scenario():
+        await db.tasks.insert_many([
+            portal_task("s1", "cnj-1", "pending", age=2),
+            portal_task("s1", "cnj-1", "completed", age=1),
+            portal_task("s1", "cnj-1", "pending", age=0),
+            portal_task("s1", "cnj-2", "failed", age=1),
+            portal_task("s1", "cnj-2", "processing", age=0),
+            portal_task("s2", "cnj-1", "pending"),
+        ])
+
+        # Startup logs the failed unique index instead of raising
+        await database.db_manager.init_indexes()
+        assert not await database.db_manager.init_rpa_task_indexes()
+
+        assert await dedupe_tasks(db, dry_run=True) == 3
+        assert await db.tasks.count_documents({}) == 6
+
+        assert await dedupe_tasks(db) == 3
+        kept = {
+            (task["portal_metadata"]["solicitacao_id"], task["process_number"]): task["status"]
+            async for task in db.tasks.find({})
+        }
+        assert kept == {
+            ("s1", "cnj-1"): "completed",
+            ("s1", "cnj-2"): "processing",
+            ("s2", "cnj-1"): "pending",
+        }
+
+        assert await database.db_manager.init_rpa_task_indexes()
+        assert await dedupe_tasks(db) == 0
+
+    asyncio.run(scenario())
+
+
+def test_tasks_not_created_by_the_portal_are_left_alone(db):
+    async def scenario():
+        await db.tasks.insert_many([
+            {"process_number": "cnj-1", "status": "pending"},
+            {"process_number": "cnj-1", "status": "pending"},
+        ])
+
+        assert await dedupe_tasks(db) == 0
+        assert await db.tasks.count_documents({}) == 2
+
+    asyncio.run(scenario())
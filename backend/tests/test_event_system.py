@@ -0,0 +1,103 @@
+"""
+Tests for the solicitacao updater used by the task status monitor
+"""
+import asyncio
+import random
+
+import pytest
+from bson import ObjectId
+
+from conftest import fake_cnjs
+from models.status import SolicitacaoStatus
+from workers.cnj_tasks import CONCLUIDO, ERRO, RPA_STATUS_MAP, TERMINAL_STATUSES
+from workers.event_system import SolicitacaoUpdater
+
+FINAL_STATUSES = {
+    SolicitacaoStatus.CONCLUIDO.value,
+    SolicitacaoStatus.ERRO.value,
+    SolicitacaoStatus.DOCUMENTOS_NAO_ENCONTRADOS.value,
+}
+
+
+def test_repeated_and_intermediate_statuses_count_once(db, create_solicitacao):
+    async def scenario():
+        cnj, other = fake_cnjs(2)
+        solicitacao_id = await create_solicitacao([cnj, other])
+        updater = SolicitacaoUpdater(db)
+
+        for status in ("pending", "processing", "completed", "completed"):
+            result = await updater.add_cnj_result(
+                solicitacao_id, cnj, RPA_STATUS_MAP[status], ["blob/doc.pdf"]
+            )
+            assert result["solicitacao"]["finalizada"] is None
+
+        solicitacao = await db.solicitacoes.find_one({"_id": ObjectId(solicitacao_id)})
+        assert solicitacao["cnjs_processados"] == 1
+        assert solicitacao["cnjs_sucesso"] == 1
+        assert await db.solicitacao_cnjs.count_documents({"solicitacao_id": solicitacao_id}) == 2
+
+        result = await updater.add_cnj_result(solicitacao_id, other, ERRO, erro="timeout")
+        assert result["solicitacao"]["finalizada"] == SolicitacaoStatus.CONCLUIDO.value
+
+    asyncio.run(scenario())
+
+
+def test_unknown_cnj_is_not_counted(db, create_solicitacao):
+    async def scenario():
+        solicitacao_id = await create_solicitacao(fake_cnjs(1))
+
+        result = await SolicitacaoUpdater(db).add_cnj_result(
+            solicitacao_id, fake_cnjs(1, prefix=9)[0], CONCLUIDO
+        )
+
+        assert result is None
+        solicitacao = await db.solicitacoes.find_one({"_id": ObjectId(solicitacao_id)})
+        assert solicitacao["cnjs_processados"] == 0
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_random_status_sequences(db, create_solicitacao, seed):
+    rng = random.Random(seed)
+
+    async def scenario():
+        cnjs = fake_cnjs(rng.randint(1, 5))
+        solicitacao_id = await create_solicitacao(cnjs)
+        updater = SolicitacaoUpdater(db)
+
+        last = {}
+        finalizations = 0
+        for _ in range(rng.randint(1, 20)):
+            cnj = rng.choice(cnjs)
+            status = RPA_STATUS_MAP[rng.choice(list(RPA_STATUS_MAP))]
+            result = await updater.add_cnj_result(
+                solicitacao_id,
+                cnj,
+                status,
+                ["blob/doc.pdf"] if status == CONCLUIDO else [],
+                "failed" if status == ERRO else None,
+            )
+            last[cnj] = status
+            if result["solicitacao"]["finalizada"]:
+                finalizations += 1
+                # Only the update that gives the last CNJ a final result finalizes
+                assert len(last) == len(cnjs)
+                assert all(value in TERMINAL_STATUSES for value in last.values())
+
+        solicitacao = await db.solicitacoes.find_one({"_id": ObjectId(solicitacao_id)})
+
+        # Counters always reflect the latest status of every CNJ
+        assert solicitacao["cnjs_processados"] == sum(
+            value in TERMINAL_STATUSES for value in last.values()
+        )
+        assert solicitacao["cnjs_sucesso"] == list(last.values()).count(CONCLUIDO)
+        assert solicitacao["cnjs_erro"] == list(last.values()).count(ERRO)
+
+        # Finalized at most once, and always once every CNJ is done
+        assert finalizations <= 1
+        if solicitacao["cnjs_processados"] == len(cnjs):
+            assert finalizations == 1
+        assert (solicitacao["status"] in FINAL_STATUSES) == (finalizations == 1)
+
+    asyncio.run(scenario())
@@ -0,0 +1,72 @@
+"""
+Tests for parsing spreadsheets off the event loop
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from config.settings import settings
+from scripts.bench_excel_parse import write_sheet
+from utils import excel_parser
+from utils.excel_parser import ExcelParsePool, parse_excel_cnjs
+
+# Health checks must stay this fast while a large sheet is parsed; parsing
+# on the event loop stalls them for the whole parse (seconds)
+HEALTH_LATENCY_BOUND = 0.25
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """A parsing pool of its own, shut down after the test"""
+    pool = ExcelParsePool(workers=1, max_pending=2)
+    monkeypatch.setattr(excel_parser, "excel_pool", pool)
+    yield pool
+    pool.shutdown()
+
+
+def test_health_stays_responsive_during_a_large_parse(pool, tmp_path, monkeypatch):
+    from main import app
+
+    monkeypatch.setattr(settings, "cnj_validate_check_digit", False)
+    path = tmp_path / "processos.xlsx"
+    write_sheet(path, 50_000)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            parse = asyncio.create_task(parse_excel_cnjs(str(path)))
+
+            latencies = []
+            while not parse.done():
+                started = time.perf_counter()
+                response = await client.get("/health")
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200
+                await asyncio.sleep(0.01)
+
+            assert len(await parse) == 50_000
+
+        return latencies
+
+    latencies = asyncio.run(scenario())
+
+    # Enough checks ran while the sheet was being parsed
+    assert len(latencies) >= 20
+    assert max(latencies) < HEALTH_LATENCY_BOUND
+
+
+def test_saturated_pool_rejects_new_parses(pool, tmp_path):
+    path = tmp_path / "processos.xlsx"
+    write_sheet(path, 10)
+    pool._pending = pool.max_pending
+
+    async def scenario():
+        with pytest.raises(HTTPException) as raised:
+            await parse_excel_cnjs(str(path))
+        assert raised.value.status_code == 503
+        assert raised.value.headers["Retry-After"] == "5"
+
+    asyncio.run(scenario())
@@ -0,0 +1,103 @@
+"""
+Tests for waking long-polling RPA requests
+"""
+import asyncio
+
+import pytest
+
+from config.settings import settings
+from routers import rpa
+from utils.notifier import TaskNotifier
+
+
+@pytest.fixture
+def notifier(monkeypatch):
+    """A notifier bound to the test's event loop"""
+    notifier = TaskNotifier()
+    monkeypatch.setattr(rpa, "task_notifier", notifier)
+    return notifier
+
+
+def test_waiters_wake_once_per_notification():
+    async def scenario():
+        notifier = TaskNotifier()
+        listeners = [notifier.listen() for _ in range(3)]
+        waiters = [
+            asyncio.create_task(notifier.wait(listener, 1)) for listener in listeners
+        ]
+        await asyncio.sleep(0)
+
+        notifier.notify()
+        assert await asyncio.gather(*waiters) == [True, True, True]
+
+        # A listener registered after the notification waits for the next one
+        assert await notifier.wait(notifier.listen(), 0.05) is False
+
+    asyncio.run(scenario())
+
+
+def test_notification_between_check_and_wait_is_not_lost():
+    async def scenario():
+        notifier = TaskNotifier()
+        listener = notifier.listen()
+        notifier.notify()
+
+        assert await notifier.wait(listener, 0.05) is True
+
+    asyncio.run(scenario())
+
+
+def test_long_poll_returns_as_soon_as_tasks_are_created(notifier):
+    async def scenario():
+        tasks = []
+
+        async def fetch():
+            return list(tasks)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        poll = asyncio.create_task(rpa._long_poll(fetch, 10))
+        await asyncio.sleep(0.05)
+        assert not poll.done()
+
+        tasks.append("task")
+        notifier.notify()
+
+        assert await asyncio.wait_for(poll, 1) == ["task"]
+        assert loop.time() - started < 1
+
+    asyncio.run(scenario())
+
+
+def test_long_poll_returns_empty_after_the_capped_wait(notifier, monkeypatch):
+    monkeypatch.setattr(settings, "rpa_long_poll_max_seconds", 0.1)
+
+    async def scenario():
+        calls = []
+
+        async def fetch():
+            calls.append(asyncio.get_running_loop().time())
+            return []
+
+        started = asyncio.get_running_loop().time()
+        assert await asyncio.wait_for(rpa._long_poll(fetch, 30), 1) == []
+
+        # Checked once before waiting and once more on timeout
+        assert len(calls) == 2
+        assert calls[-1] - started >= 0.09
+
+    asyncio.run(scenario())
+
+
+def test_long_poll_without_wait_checks_once(notifier):
+    async def scenario():
+        calls = []
+
+        async def fetch():
+            calls.append(None)
+            return []
+
+        assert await rpa._long_poll(fetch, 0) == []
+        assert len(calls) == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,99 @@
+"""
+Tests for the migration of embedded CNJs and results to solicitacao_cnjs
+"""
+import asyncio
+from datetime import datetime
+
+from bson import ObjectId
+
+from scripts.migrate_solicitacao_cnjs import migrate_solicitacao
+from workers.cnj_tasks import CONCLUIDO, EM_EXECUCAO, ERRO, PENDENTE, CnjTaskStore
+
+
+def rpa_task(solicitacao_id: str, process_number: str, status: str, **fields) -> dict:
+    return dict(
+        process_number=process_number,
+        client_name="agibank",
+        status=status,
+        updated_at=datetime.utcnow(),
+        portal_metadata={"solicitacao_id": solicitacao_id, "source": "portal_web"},
+        **fields,
+    )
+
+
+async def migrated(db, sol: dict):
+    """Migrate a legacy solicitacao; returns its per-CNJ documents by CNJ and its new state"""
+    await db.solicitacoes.insert_one(sol)
+    stored = await db.solicitacoes.find_one({"_id": sol["_id"]})
+    await migrate_solicitacao(db, CnjTaskStore(db), stored, {"cliente": "agibank"})
+
+    docs = {
+        doc["cnj"]: doc
+        async for doc in db.solicitacao_cnjs.find({"solicitacao_id": str(sol["_id"])})
+    }
+    return docs, await db.solicitacoes.find_one({"_id": sol["_id"]})
+
+
+def legacy(status: str, cnjs, resultados, **counters) -> dict:
+    return dict(
+        _id=ObjectId(),
+        user_id="user",
+        cliente_id="cliente",
+        cnjs=cnjs,
+        resultados=resultados,
+        status=status,
+        total_cnjs=len(cnjs),
+        created_at=datetime.utcnow(),
+        **counters,
+    )
+
+
+def test_finished_solicitacao_sends_no_bot(db):
+    async def scenario():
+        sol = legacy(
+            "concluido",
+            ["a", "b", "c"],
+            [{"cnj": "a", "status": "concluido", "documentos_encontrados": 1},
+             {"cnj": "b", "status": "erro", "erro": "Processo não encontrado"}],
+            cnjs_processados=3, cnjs_sucesso=1, cnjs_erro=2,
+        )
+        docs, state = await migrated(db, sol)
+
+        assert {cnj: doc["status"] for cnj, doc in docs.items()} == {
+            "a": CONCLUIDO, "b": ERRO, "c": ERRO,
+        }
+        assert {doc["cliente_codigo"] for doc in docs.values()} == {"agibank"}
+        assert await CnjTaskStore(db).pending(10) == []
+
+        # Counters are kept; the arrays are gone
+        assert (state["cnjs_processados"], state["cnjs_sucesso"], state["cnjs_erro"]) == (3, 1, 2)
+        assert "cnjs" not in state and "resultados" not in state
+
+    asyncio.run(scenario())
+
+
+def test_unfinished_solicitacao_keeps_the_rpa_progress(db):
+    async def scenario():
+        sol = legacy("em_execucao", ["d", "e", "f", "g"], [{"cnj": "d", "status": "concluido"}])
+        solicitacao_id = str(sol["_id"])
+        await db.tasks.insert_many([
+            rpa_task(solicitacao_id, "d", "completed"),
+            rpa_task(solicitacao_id, "e", "processing"),
+            rpa_task(solicitacao_id, "f", "completed", file_path="agibank/f/doc.pdf"),
+            rpa_task(solicitacao_id, "g", "pending"),
+        ])
+
+        docs, state = await migrated(db, sol)
+
+        assert {cnj: doc["status"] for cnj, doc in docs.items()} == {
+            "d": CONCLUIDO, "e": EM_EXECUCAO, "f": CONCLUIDO, "g": PENDENTE,
+        }
+        assert docs["f"]["documentos_urls"] == ["agibank/f/doc.pdf"]
+
+        # Work already running stays with the RPA
+        assert docs["e"]["lease_owner"] == "rpa"
+        assert [doc["cnj"] for doc in await CnjTaskStore(db).pending(10)] == ["g"]
+
+        assert (state["cnjs_processados"], state["cnjs_sucesso"], state["cnjs_erro"]) == (2, 2, 0)
+
+    asyncio.run(scenario())
@@ -0,0 +1,121 @@
+"""
+Tests for progress delivery without a change stream
+"""
+import asyncio
+from datetime import datetime
+
+from bson import ObjectId
+
+from config.settings import settings
+from utils.auth import create_access_token, create_stream_ticket, get_current_user_from_ticket
+from utils.notifier import POLL_BATCH_SIZE, ProgressBroker
+
+
+def test_poll_delivers_changes_written_by_other_processes(db):
+    async def scenario():
+        broker = ProgressBroker()
+        queue = broker.subscribe("user")
+        poller = asyncio.create_task(broker.poll(db, interval=0.01))
+
+        # Written by a worker process: nothing is published in this process
+        solicitacao_id = ObjectId()
+        await db.solicitacoes.insert_one({
+            "_id": solicitacao_id,
+            "user_id": "user",
+            "status": "pendente",
+            "total_cnjs": 2,
+            "cnjs_processados": 0,
+            "updated_at": datetime.utcnow(),
+        })
+        await db.solicitacoes.insert_one(
+            {"user_id": "other", "status": "pendente", "updated_at": datetime.utcnow()}
+        )
+
+        created = await asyncio.wait_for(queue.get(), 1)
+        assert created["id"] == str(solicitacao_id)
+        assert created["status"] == "pendente"
+
+        await db.solicitacoes.update_one(
+            {"_id": solicitacao_id},
+            {"$set": {"cnjs_processados": 1, "updated_at": datetime.utcnow()}},
+        )
+
+        progressed = await asyncio.wait_for(queue.get(), 1)
+        assert progressed["cnjs_processados"] == 1
+
+        # Changes read again inside the overlap window are not repeated
+        await asyncio.sleep(0.1)
+        assert queue.empty()
+
+        poller.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_one_poll_query_serves_every_stream(db, mongo_commands):
+    async def scenario():
+        broker = ProgressBroker()
+        queues = {user: [broker.subscribe(user) for _ in range(10)] for user in ("a", "b")}
+        poller = asyncio.create_task(broker.poll(db, interval=0.05))
+
+        await db.solicitacoes.insert_one(
+            {"user_id": "a", "status": "pendente", "updated_at": datetime.utcnow()}
+        )
+        mongo_commands.clear()
+        await asyncio.sleep(0.12)
+        poller.cancel()
+
+        # About one query per interval, whatever the number of streams
+        assert 1 <= mongo_commands.count(("solicitacoes", "find")) <= 3
+
+        assert all(queue.qsize() == 1 for queue in queues["a"])
+        assert all(queue.empty() for queue in queues["b"])
+
+    asyncio.run(scenario())
+
+
+def test_poll_reads_every_change_beyond_one_batch(db):
+    async def scenario():
+        broker = ProgressBroker()
+        broker.queue_size = POLL_BATCH_SIZE * 2
+        queue = broker.subscribe("user")
+        poller = asyncio.create_task(broker.poll(db, interval=0.05))
+
+        # Changes with the same updated_at are told apart by _id
+        now = datetime.utcnow()
+        await db.solicitacoes.insert_many([
+            {"user_id": "user", "status": "pendente", "updated_at": now}
+            for _ in range(POLL_BATCH_SIZE + 10)
+        ])
+        await asyncio.sleep(0.08)
+        poller.cancel()
+
+        assert queue.qsize() == POLL_BATCH_SIZE + 10
+
+    asyncio.run(scenario())
+
+
+def test_stream_accepts_only_stream_tickets(api, db, user, auth_headers):
+    issued = api.post("/api/solicitacoes/stream/ticket", headers=auth_headers)
+    issued.raise_for_status()
+    ticket = issued.json()["ticket"]
+    assert issued.json()["expires_in"] == settings.progress_ticket_seconds
+
+    streamer = asyncio.run(get_current_user_from_ticket(ticket, db))
+    assert str(streamer["_id"]) == user
+
+    # The ticket cannot be used as an access token...
+    as_bearer = api.get("/api/solicitacoes/", headers={"Authorization": f"Bearer {ticket}"})
+    assert as_bearer.status_code == 401
+
+    # ...and access tokens no longer open streams from the URL
+    token = create_access_token({"sub": user})
+    assert api.get("/api/solicitacoes/stream", params={"ticket": token}).status_code == 401
+    assert api.get("/api/solicitacoes/stream", params={"token": token}).status_code == 422
+
+
+def test_expired_stream_ticket_is_rejected(api, user, monkeypatch):
+    monkeypatch.setattr(settings, "progress_ticket_seconds", -1)
+    ticket = create_stream_ticket(user)
+
+    assert api.get("/api/solicitacoes/stream", params={"ticket": ticket}).status_code == 401
@@ -0,0 +1,61 @@
+"""
+The number of database commands per request must not grow with the page size
+"""
+import asyncio
+
+import pytest
+
+from conftest import fake_cnjs
+
+PAGE_SIZES = (1, 10, 100)
+
+
+@pytest.fixture
+def solicitacoes(user, cliente, create_solicitacao):
+    """100 solicitacoes of the user with 3 CNJs each"""
+    async def create():
+        for index in range(100):
+            await create_solicitacao(
+                fake_cnjs(3, prefix=index), user_id=user, cliente_id=cliente
+            )
+
+    asyncio.run(create())
+
+
+def commands_per_page(api, mongo_commands, url: str, headers=None):
+    """Commands sent for each page size (after one warm-up request)"""
+    api.get(url.format(limit=1), headers=headers).raise_for_status()
+
+    counts = {}
+    for limit in PAGE_SIZES:
+        mongo_commands.clear()
+        response = api.get(url.format(limit=limit), headers=headers)
+        response.raise_for_status()
+        assert len(response.json()) == limit
+        counts[limit] = list(mongo_commands)
+
+    return counts
+
+
+@pytest.mark.parametrize(
+    "fields, expected",
+    [
+        ("", [("solicitacoes", "find")]),
+        (
+            "&fields=id,status,cliente_nome,resultados",
+            [("solicitacoes", "find"), ("solicitacao_cnjs", "find")],
+        ),
+    ],
+)
+def test_list_solicitacoes(api, auth_headers, solicitacoes, mongo_commands, fields, expected):
+    counts = commands_per_page(
+        api, mongo_commands, "/api/solicitacoes/?limit={limit}" + fields, auth_headers
+    )
+
+    assert counts[1] == counts[10] == counts[100] == expected
+
+
+def test_rpa_pending_tasks(api, solicitacoes, mongo_commands):
+    counts = commands_per_page(api, mongo_commands, "/api/rpa/tasks/pending?limit={limit}")
+
+    assert counts[1] == counts[10] == counts[100] == [("solicitacao_cnjs", "find")]
@@ -0,0 +1,100 @@
+"""
+Tests for leasing RPA tasks to bots
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from conftest import fake_cnjs
+from workers.cnj_tasks import CnjTaskStore, task_id
+
+
+def in_seconds(seconds: float) -> datetime:
+    return datetime.utcnow() + timedelta(seconds=seconds)
+
+
+def test_parallel_claims_never_share_a_task(db, create_solicitacao, interleaved):
+    async def scenario():
+        await create_solicitacao(fake_cnjs(50))
+        store = CnjTaskStore(db)
+
+        claims = await asyncio.gather(
+            *(store.claim(f"bot-{index}", 20, in_seconds(300)) for index in range(5))
+        )
+
+        claimed = [doc["_id"] for docs in claims for doc in docs]
+        assert len(claimed) == len(set(claimed)) == 50
+
+        for index, docs in enumerate(claims):
+            assert all(doc["lease_owner"] == f"bot-{index}" for doc in docs)
+
+        # Nothing is left for another bot while the leases are live
+        assert await store.claim("bot-late", 20, in_seconds(300)) == []
+        assert await store.pending(20) == []
+
+    asyncio.run(scenario())
+
+
+def test_only_the_owner_renews_or_releases_a_lease(db, create_solicitacao):
+    async def scenario():
+        solicitacao_id = await create_solicitacao(fake_cnjs(1))
+        store = CnjTaskStore(db)
+
+        [task] = await store.claim("bot-a", 1, in_seconds(300))
+        assert task["_id"] == task_id(solicitacao_id, fake_cnjs(1)[0])
+
+        assert await store.renew("bot-b", [task["_id"]], in_seconds(600)) == []
+        assert await store.release("bot-b", [task["_id"]]) == 0
+        assert await store.claim("bot-b", 1, in_seconds(300)) == []
+
+        assert await store.renew("bot-a", [task["_id"]], in_seconds(600)) == [task["_id"]]
+        assert await store.release("bot-a", [task["_id"]]) == 1
+
+        [reclaimed] = await store.claim("bot-b", 1, in_seconds(300))
+        assert reclaimed["_id"] == task["_id"]
+        assert reclaimed["lease_owner"] == "bot-b"
+
+    asyncio.run(scenario())
+
+
+def test_expired_lease_goes_to_the_next_bot(db, create_solicitacao):
+    async def scenario():
+        await create_solicitacao(fake_cnjs(1))
+        store = CnjTaskStore(db)
+
+        [task] = await store.claim("bot-a", 1, in_seconds(-1))
+
+        # The expired lease can no longer be renewed by its old owner...
+        assert await store.renew("bot-a", [task["_id"]], in_seconds(300)) == []
+
+        # ...and the task is available again
+        assert [doc["_id"] for doc in await store.pending(10)] == [task["_id"]]
+        [reclaimed] = await store.claim("bot-b", 1, in_seconds(300))
+        assert reclaimed["_id"] == task["_id"]
+
+        # The old owner cannot release the new owner's lease
+        assert await store.release("bot-a", [task["_id"]]) == 0
+
+    asyncio.run(scenario())
+
+
+def test_claim_and_pending_filter_by_client_code(api, db, cliente, create_solicitacao):
+    async def create():
+        await create_solicitacao(
+            fake_cnjs(2, prefix=1), cliente_id=cliente, cliente_codigo="agibank"
+        )
+        await create_solicitacao(
+            fake_cnjs(2, prefix=2), cliente_id="outro", cliente_codigo="outro"
+        )
+
+    asyncio.run(create())
+
+    pending = api.get("/api/rpa/tasks/pending", params={"client_name": "agibank"})
+    pending.raise_for_status()
+    assert sorted(task["process_number"] for task in pending.json()) == fake_cnjs(2, prefix=1)
+
+    claimed = api.post(
+        "/api/rpa/tasks/claim", json={"bot_id": "bot-01", "client_name": "agibank"}
+    )
+    claimed.raise_for_status()
+    assert sorted(task["process_number"] for task in claimed.json()) == fake_cnjs(2, prefix=1)
+    assert {task["client_name"] for task in claimed.json()} == {"agibank"}
@@ -0,0 +1,334 @@
+"""
+Tests for the solicitacao to RPA task converter
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockCollection
+from pymongo.errors import OperationFailure
+
+from conftest import fake_cnjs
+from config.settings import settings
+from models.status import EventoTipo
+from workers.event_system import EventPublisher
+from utils.pagination import encode_cursor
+from workers.solicitacao_to_task_worker import (
+    CONVERTER_STATE, MONITOR_STATE, SolicitacaoToTaskConverter, TaskStatusMonitor,
+)
+from workers.worker_state import WorkerState
+
+
+async def insert_task(db, process_number: str, age_seconds: float, **fields) -> dict:
+    """Insert a portal RPA task last changed ``age_seconds`` ago; returns it as stored"""
+    task = dict(
+        {
+            "process_number": process_number,
+            "client_name": "agibank",
+            "status": "completed",
+            "updated_at": datetime.utcnow() - timedelta(seconds=age_seconds),
+            "portal_metadata": {"solicitacao_id": "solicitacao", "source": "portal_web"},
+        },
+        **fields,
+    )
+    result = await db.tasks.insert_one(task)
+    return await db.tasks.find_one({"_id": result.inserted_id})
+
+
+class FakeChangeStream:
+    """
+    Change stream yielding scripted changes, then stopping the converter
+
+    Each script entry is a coroutine function returning the change; the
+    resume token follows the last change returned, as in a real stream.
+    """
+
+    def __init__(self, converter, script):
+        self.converter = converter
+        self.script = list(script)
+        self.resume_token = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def try_next(self):
+        if not self.script:
+            await self.converter.stop_monitoring()
+            return None
+        change = await self.script.pop(0)()
+        self.resume_token = change["_id"]
+        return change
+
+
+@pytest.fixture
+def change_streams(monkeypatch):
+    """
+    Replace ``eventos.watch`` (mongomock has no change streams)
+
+    Returns a dict: set ``open`` to a function of (resume_after) returning
+    the stream or raising; every ``resume_after`` is recorded in ``calls``.
+    """
+    streams = {"calls": [], "open": None}
+
+    def watch(self, pipeline, resume_after=None, **kwargs):
+        streams["calls"].append(resume_after)
+        return streams["open"](resume_after)
+
+    monkeypatch.setattr(AsyncMongoMockCollection, "watch", watch, raising=False)
+    monkeypatch.setattr(settings, "converter_change_stream", True)
+    return streams
+
+
+async def run_replicas(db, replicas: int, timeout: float = 10):
+    """Run converter replicas until no event is left to claim"""
+    converters = [SolicitacaoToTaskConverter(db) for _ in range(replicas)]
+    running = [asyncio.create_task(converter.start_monitoring()) for converter in converters]
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline and await db.eventos.count_documents(
+        {"processado": False, "lease_owner": {"$ne": "alive"}}
+    ):
+        await asyncio.sleep(0.01)
+
+    for converter in converters:
+        await converter.stop_monitoring()
+    await asyncio.gather(*running)
+
+
+def test_replicas_process_each_event_exactly_once(
+    db, cliente, create_solicitacao, interleaved, monkeypatch
+):
+    monkeypatch.setattr(settings, "converter_change_stream", False)
+    monkeypatch.setattr(settings, "converter_poll_min_seconds", 0.001)
+    monkeypatch.setattr(settings, "converter_poll_max_seconds", 0.01)
+
+    async def scenario():
+        publisher = EventPublisher(db)
+        solicitacoes = {}
+        for index in range(30):
+            cnjs = fake_cnjs(index % 4 + 1, prefix=index)
+            solicitacao_id = await create_solicitacao(cnjs, cliente_id=cliente)
+            await publisher.publish_event(EventoTipo.NOVA_SOLICITACAO, solicitacao_id)
+            solicitacoes[solicitacao_id] = cnjs
+
+        ids = list(solicitacoes)
+        now = datetime.utcnow()
+
+        # A worker that died mid-event: its lease expired and is claimed again
+        await db.eventos.update_one(
+            {"solicitacao_id": ids[0]},
+            {"$set": {"lease_owner": "dead", "lease_expira_em": now - timedelta(seconds=1)}},
+        )
+        # A worker still processing: its event is left alone
+        await db.eventos.update_one(
+            {"solicitacao_id": ids[1]},
+            {"$set": {"lease_owner": "alive", "lease_expira_em": now + timedelta(hours=1)}},
+        )
+
+        await run_replicas(db, replicas=3)
+
+        tasks = await db.tasks.find({}).to_list(length=None)
+        created = [
+            (task["portal_metadata"]["solicitacao_id"], task["process_number"]) for task in tasks
+        ]
+        expected = [
+            (solicitacao_id, cnj)
+            for solicitacao_id, cnjs in solicitacoes.items()
+            if solicitacao_id != ids[1]
+            for cnj in cnjs
+        ]
+
+        # No unique index here: only the leases keep replicas apart
+        assert sorted(created) == sorted(expected)
+
+        eventos = {
+            evento["solicitacao_id"]: evento
+            async for evento in db.eventos.find({})
+        }
+        assert eventos[ids[1]]["processado"] is False
+        assert eventos[ids[1]]["lease_owner"] == "alive"
+        assert eventos[ids[0]]["lease_owner"] != "dead"
+
+        processed = [evento for key, evento in eventos.items() if key != ids[1]]
+        assert all(evento["processado"] and evento["success"] for evento in processed)
+        assert all(evento["tentativas"] == 1 for evento in processed)
+
+        # Work was actually spread across the replicas
+        assert len({evento["lease_owner"] for evento in processed}) > 1
+
+    asyncio.run(scenario())
+
+
+def test_stream_events_create_tasks_and_save_the_resume_token(
+    db, cliente, create_solicitacao, change_streams
+):
+    async def scenario():
+        publisher = EventPublisher(db)
+        converter = SolicitacaoToTaskConverter(db)
+
+        # Published while no stream was open: caught up when it opens
+        earlier = await create_solicitacao(fake_cnjs(2, prefix=1), cliente_id=cliente)
+        await publisher.publish_event(EventoTipo.NOVA_SOLICITACAO, earlier)
+
+        later = await create_solicitacao(fake_cnjs(1, prefix=2), cliente_id=cliente)
+
+        async def new_event():
+            await publisher.publish_event(EventoTipo.NOVA_SOLICITACAO, later)
+            evento = await db.eventos.find_one({"solicitacao_id": later})
+            return {"_id": {"_data": "token-1"}, "documentKey": {"_id": evento["_id"]}}
+
+        change_streams["open"] = lambda resume_after: FakeChangeStream(converter, [new_event])
+        await converter.start_monitoring()
+
+        tasks = await db.tasks.find({}).to_list(length=None)
+        assert sorted(task["portal_metadata"]["solicitacao_id"] for task in tasks) == sorted(
+            [earlier, earlier, later]
+        )
+        assert await db.eventos.count_documents({"processado": False}) == 0
+
+        state = await WorkerState(db).get(CONVERTER_STATE)
+        assert state["resume_token"] == {"_data": "token-1"}
+
+        # A restarted worker resumes after the saved token
+        restarted = SolicitacaoToTaskConverter(db)
+        change_streams["open"] = lambda resume_after: FakeChangeStream(restarted, [])
+        await restarted.start_monitoring()
+
+        assert change_streams["calls"] == [None, {"_data": "token-1"}]
+
+    asyncio.run(scenario())
+
+
+def test_stale_resume_token_restarts_the_stream_and_catches_up(
+    db, cliente, create_solicitacao, change_streams
+):
+    async def scenario():
+        converter = SolicitacaoToTaskConverter(db)
+        await WorkerState(db).save(CONVERTER_STATE, resume_token={"_data": "expired"})
+
+        # Published while the worker was down, beyond the oplog window
+        solicitacao_id = await create_solicitacao(fake_cnjs(1), cliente_id=cliente)
+        await EventPublisher(db).publish_event(EventoTipo.NOVA_SOLICITACAO, solicitacao_id)
+
+        def open_stream(resume_after):
+            if resume_after is not None:
+                raise OperationFailure("Resume token not found", code=286)
+            return FakeChangeStream(converter, [])
+
+        change_streams["open"] = open_stream
+        await converter.start_monitoring()
+
+        assert change_streams["calls"] == [{"_data": "expired"}, None]
+        assert (await WorkerState(db).get(CONVERTER_STATE))["resume_token"] is None
+        assert await db.tasks.count_documents({}) == 1
+
+    asyncio.run(scenario())
+
+
+def test_polling_backs_off_while_idle_and_resets_on_events(db, monkeypatch):
+    monkeypatch.setattr(settings, "converter_poll_min_seconds", 1)
+    monkeypatch.setattr(settings, "converter_poll_max_seconds", 8)
+    sleep = asyncio.sleep
+    sleeps = []
+
+    async def recorded_sleep(seconds):
+        sleeps.append(seconds)
+        await sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", recorded_sleep)
+
+    async def scenario():
+        converter = SolicitacaoToTaskConverter(db)
+        converter.is_running = True
+        processed = [0, 0, 0, 0, 0, 3, 0]
+
+        async def process_pending():
+            if len(processed) == 1:
+                converter.is_running = False
+            return processed.pop(0)
+
+        converter._process_pending = process_pending
+        await converter._poll_events()
+
+    asyncio.run(scenario())
+
+    assert sleeps == [2, 4, 8, 8, 8, 1, 2]
+
+
+def test_monitor_reads_settled_changes_after_the_watermark(db, monkeypatch):
+    monkeypatch.setattr(settings, "task_monitor_lag_seconds", 5)
+
+    async def scenario():
+        monitor = TaskStatusMonitor(db)
+        oldest = await insert_task(db, "0000001-00.2024.8.26.0001", 60)
+        older = await insert_task(db, "0000002-00.2024.8.26.0001", 30)
+        # Changed within the lag window: a concurrent write may still commit
+        # with an earlier updated_at, so it is not read yet
+        recent = await insert_task(db, "0000003-00.2024.8.26.0001", 1)
+        await insert_task(
+            db, "0000004-00.2024.8.26.0001", 60,
+            portal_metadata={"solicitacao_id": "outra", "source": "rpa"},
+        )
+
+        changed = await monitor._changed_tasks(None)
+        assert [task["_id"] for task in changed] == [oldest["_id"], older["_id"]]
+
+        watermark = encode_cursor(older["updated_at"], older["_id"])
+        assert await monitor._changed_tasks(watermark) == []
+
+        # A write committed late with the watermark's updated_at (and a
+        # higher _id) is still read, as is the recent change once settled
+        tied = await insert_task(db, "0000005-00.2024.8.26.0001", 0, updated_at=older["updated_at"])
+        await db.tasks.update_one(
+            {"_id": recent["_id"]},
+            {"$set": {"updated_at": datetime.utcnow() - timedelta(seconds=10)}},
+        )
+
+        changed = await monitor._changed_tasks(watermark)
+        assert [task["_id"] for task in changed] == [tied["_id"], recent["_id"]]
+
+    asyncio.run(scenario())
+
+
+def test_monitor_saves_its_watermark_and_resumes_after_it(db, monkeypatch):
+    monkeypatch.setattr(settings, "task_monitor_lag_seconds", 5)
+    monkeypatch.setattr(settings, "task_monitor_interval_seconds", 0.01)
+    monkeypatch.setattr(settings, "task_monitor_batch_size", 2)
+
+    async def run_monitor(expected: int) -> list:
+        """Run a monitor until it handled ``expected`` tasks"""
+        monitor = TaskStatusMonitor(db)
+        handled = []
+
+        async def record(task):
+            handled.append(task["_id"])
+            if len(handled) == expected:
+                await monitor.stop_monitoring()
+
+        monitor._update_solicitacao_from_task = record
+        await asyncio.wait_for(monitor.start_monitoring(), 5)
+        return handled
+
+    async def scenario():
+        tasks = [
+            await insert_task(db, f"000000{index}-00.2024.8.26.0001", 60 - index)
+            for index in range(3)
+        ]
+
+        # Read in batches of two; the watermark follows the last task handled
+        assert await run_monitor(3) == [task["_id"] for task in tasks]
+        state = await WorkerState(db).get(MONITOR_STATE)
+        assert state["watermark"] == encode_cursor(tasks[-1]["updated_at"], tasks[-1]["_id"])
+
+        # A restarted monitor only reads what changed since
+        await db.tasks.update_one(
+            {"_id": tasks[0]["_id"]},
+            {"$set": {"status": "failed", "updated_at": datetime.utcnow() - timedelta(seconds=10)}},
+        )
+        assert await run_monitor(1) == [tasks[0]["_id"]]
+
+    asyncio.run(scenario())
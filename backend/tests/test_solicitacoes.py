@@ -0,0 +1,281 @@
+"""
+Tests for the solicitacoes endpoints
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from config.settings import settings
+from conftest import fake_cnjs, valid_cnjs
+from utils.pagination import decode_cursor, encode_cursor
+from workers.cnj_tasks import CONCLUIDO, EM_EXECUCAO, CnjTaskStore
+
+
+def create(api, auth_headers, cliente, cnjs):
+    response = api.post(
+        "/api/solicitacoes/", json={"cliente_id": cliente, "cnjs": cnjs}, headers=auth_headers
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_cnjs_are_served_from_the_per_cnj_documents(api, db, auth_headers, cliente):
+    cnjs = valid_cnjs(3)
+    created = create(api, auth_headers, cliente, list(reversed(cnjs)))
+    assert sorted(created["cnjs"]) == cnjs
+
+    # Only the count is stored on the solicitacao
+    stored = asyncio.run(db.solicitacoes.find_one({"_id": ObjectId(created["id"])}))
+    assert "cnjs" not in stored
+    assert stored["total_cnjs"] == 3
+
+    detail = api.get(f"/api/solicitacoes/{created['id']}", headers=auth_headers).json()
+    assert detail["cnjs"] == cnjs
+
+    listed = api.get("/api/solicitacoes/?fields=id,cnjs", headers=auth_headers).json()
+    assert listed == [{"id": created["id"], "cnjs": cnjs}]
+
+
+def test_cursor_pages_cover_the_listing_in_order(api, db, user, auth_headers, create_solicitacao):
+    base = datetime(2024, 1, 1)
+
+    async def create_all():
+        positions = []
+        # Pairs share created_at, so the order falls back to _id
+        for index in range(7):
+            solicitacao_id = await create_solicitacao(
+                fake_cnjs(1, prefix=index), user_id=user
+            )
+            created_at = base + timedelta(minutes=index // 2)
+            await db.solicitacoes.update_one(
+                {"_id": ObjectId(solicitacao_id)}, {"$set": {"created_at": created_at}}
+            )
+            positions.append((created_at, ObjectId(solicitacao_id)))
+        return positions
+
+    # Newest first
+    expected = [str(oid) for _, oid in sorted(asyncio.run(create_all()), reverse=True)]
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 3, "fields": "id"}
+        if cursor:
+            params["cursor"] = cursor
+        response = api.get("/api/solicitacoes/", params=params, headers=auth_headers)
+        response.raise_for_status()
+        pages.append([sol["id"] for sol in response.json()])
+
+        if len(pages) == 1:
+            # A solicitacao created while paging does not shift later pages
+            asyncio.run(create_solicitacao(fake_cnjs(1, prefix=99), user_id=user))
+
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [sid for page in pages for sid in page] == expected
+
+
+def test_cursor_round_trip_and_invalid_cursor(api, auth_headers):
+    position = (datetime(2024, 5, 6, 7, 8, 9, 123456), ObjectId())
+    assert decode_cursor(encode_cursor(*position)) == position
+
+    response = api.get(
+        "/api/solicitacoes/", params={"cursor": "not-a-cursor"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+
+def test_sparse_fields_return_only_the_requested_fields(api, auth_headers, cliente):
+    created = create(api, auth_headers, cliente, valid_cnjs(2))
+
+    # The listing returns summaries, without CNJs or results
+    [summary] = api.get("/api/solicitacoes/", headers=auth_headers).json()
+    assert summary["id"] == created["id"]
+    assert summary["cliente_nome"] == "Agibank"
+    assert "cnjs" not in summary and "resultados" not in summary
+
+    listed = api.get(
+        "/api/solicitacoes/", params={"fields": "status, cnjs_processados"}, headers=auth_headers
+    ).json()
+    assert listed == [{"id": created["id"], "status": "pendente", "cnjs_processados": 0}]
+
+    detail = api.get(
+        f"/api/solicitacoes/{created['id']}",
+        params={"fields": "total_cnjs,cliente_nome"},
+        headers=auth_headers,
+    ).json()
+    assert detail == {"id": created["id"], "total_cnjs": 2, "cliente_nome": "Agibank"}
+
+    unknown = api.get(
+        "/api/solicitacoes/", params={"fields": "status,senha_hash"}, headers=auth_headers
+    )
+    assert unknown.status_code == 400
+    assert "senha_hash" in unknown.json()["detail"]
+
+
+def test_unchanged_solicitacao_is_answered_with_304(api, db, auth_headers, cliente):
+    created = create(api, auth_headers, cliente, valid_cnjs(2))
+    urls = [f"/api/solicitacoes/{created['id']}", "/api/solicitacoes/"]
+
+    first = {url: api.get(url, headers=auth_headers) for url in urls}
+    for url, response in first.items():
+        assert response.headers["ETag"].startswith('W/"')
+        assert response.headers["Cache-Control"] == "private, no-cache"
+
+        revalidated = api.get(
+            url, headers=dict(auth_headers, **{"If-None-Match": response.headers["ETag"]})
+        )
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["ETag"] == response.headers["ETag"]
+
+    # Another fieldset is another representation
+    sparse = api.get(urls[0], params={"fields": "status"}, headers=auth_headers)
+    assert sparse.headers["ETag"] != first[urls[0]].headers["ETag"]
+
+    # A reported result changes every representation of the solicitacao
+    asyncio.run(CnjTaskStore(db).record_result(created["id"], created["cnjs"][0], CONCLUIDO))
+
+    for url, response in first.items():
+        changed = api.get(
+            url, headers=dict(auth_headers, **{"If-None-Match": response.headers["ETag"]})
+        )
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != response.headers["ETag"]
+
+
+def test_changes_committed_out_of_order_are_not_skipped(
+    api, db, user, auth_headers, create_solicitacao, monkeypatch
+):
+    monkeypatch.setattr(settings, "changes_lag_seconds", 5)
+    now = datetime.utcnow()
+
+    def changes(since):
+        response = api.get(
+            "/api/solicitacoes/changes", params={"since": since}, headers=auth_headers
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def write(index, age_seconds):
+        solicitacao_id = await create_solicitacao(fake_cnjs(1, prefix=index), user_id=user)
+        await db.solicitacoes.update_one(
+            {"_id": ObjectId(solicitacao_id)},
+            {"$set": {"updated_at": now - timedelta(seconds=age_seconds)}},
+        )
+        return solicitacao_id
+
+    token = encode_cursor(now - timedelta(minutes=1), ObjectId("0" * 24))
+    settled = asyncio.run(write(1, 10))
+    recent = asyncio.run(write(2, 1))
+
+    # Changes younger than the lag are left for a later call
+    first = changes(token)
+    assert [sol["id"] for sol in first["changes"]] == [settled]
+
+    # A writer that took its timestamp earlier commits after the recent one
+    late = asyncio.run(write(3, 2))
+    monkeypatch.setattr(settings, "changes_lag_seconds", 0)
+
+    second = changes(first["since"])
+    assert [sol["id"] for sol in second["changes"]] == [late, recent]
+    assert changes(second["since"])["changes"] == []
+
+
+def test_counter_updates_never_move_updated_at_back(db, create_solicitacao):
+    async def scenario():
+        [cnj] = fake_cnjs(1)
+        solicitacao_id = await create_solicitacao([cnj])
+        later = datetime.utcnow() + timedelta(seconds=30)
+        await db.solicitacoes.update_one(
+            {"_id": ObjectId(solicitacao_id)}, {"$set": {"updated_at": later}}
+        )
+
+        # Counted with a timestamp taken before the other writer's
+        await CnjTaskStore(db).record_result(solicitacao_id, cnj, CONCLUIDO)
+
+        stored = await db.solicitacoes.find_one({"_id": ObjectId(solicitacao_id)})
+        assert stored["cnjs_processados"] == 1
+        # Stored with millisecond precision
+        assert stored["updated_at"] > later - timedelta(milliseconds=1)
+
+    asyncio.run(scenario())
+
+
+def test_refresh_reloads_every_loaded_results_page(api, db, auth_headers, cliente):
+    """The walk DetalheSolicitacao.refreshResultados makes over the pages"""
+    created = create(api, auth_headers, cliente, valid_cnjs(8))
+    cnjs = created["cnjs"]
+    store = CnjTaskStore(db)
+    url = f"/api/solicitacoes/{created['id']}/resultados"
+
+    def page(cursor=None):
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = api.get(url, params=params, headers=auth_headers)
+        response.raise_for_status()
+        return response.json()
+
+    def refresh(loaded):
+        resultados, cursor = [], None
+        while True:
+            current = page(cursor)
+            resultados += current["resultados"]
+            cursor = current["next_cursor"]
+            if not cursor or len(resultados) >= loaded:
+                return resultados, cursor
+
+    async def report(selected, status):
+        for cnj in selected:
+            await store.record_result(created["id"], cnj, status)
+
+    asyncio.run(report(cnjs[2:6], EM_EXECUCAO))
+
+    # Two pages shown ("Carregar mais" once)
+    first = page()
+    second = page(first["next_cursor"])
+    shown = first["resultados"] + second["resultados"]
+    assert [r["cnj"] for r in shown] == cnjs[2:6]
+
+    # Results land before and inside the loaded pages
+    asyncio.run(report(cnjs[:1] + cnjs[2:4], CONCLUIDO))
+
+    refreshed, cursor = refresh(len(shown))
+    assert [r["cnj"] for r in refreshed] == [cnjs[0]] + cnjs[2:5]
+    assert [r["status"] for r in refreshed] == [CONCLUIDO] * 3 + [EM_EXECUCAO]
+
+    # "Carregar mais" continues right after the refreshed pages
+    assert [r["cnj"] for r in page(cursor)["resultados"]] == cnjs[5:6]
+
+
+def test_invalid_cnjs_are_listed_in_the_create_response(api, auth_headers, cliente):
+    [valid] = valid_cnjs(1)
+    bad_check_digits = valid[:8] + ("0" if valid[8] != "0" else "1") + valid[9:]
+
+    created = create(api, auth_headers, cliente, [valid, "123", bad_check_digits])
+    assert created["cnjs"] == [valid]
+    assert created["total_cnjs"] == 1
+    assert [(item["indice"], item["valor"]) for item in created["cnjs_invalidos"]] == [
+        (1, "123"),
+        (2, bad_check_digits),
+    ]
+
+    rejected = api.post(
+        "/api/solicitacoes/",
+        json={"cliente_id": cliente, "cnjs": [bad_check_digits]},
+        headers=auth_headers,
+    )
+    assert rejected.status_code == 400
+    assert bad_check_digits in rejected.json()["detail"]
+
+
+def test_documented_sample_cnjs_are_valid():
+    from models.solicitacao import SolicitacaoCreate
+    from utils.cnj import is_valid_cnj
+
+    example = SolicitacaoCreate.model_config["json_schema_extra"]["example"]
+    assert all(is_valid_cnj(cnj, check_digits=True) for cnj in example["cnjs"])
@@ -0,0 +1,108 @@
+"""
+Tests for background spreadsheet upload jobs
+"""
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+
+from conftest import fake_cnjs
+from config.settings import settings
+from models.status import UploadJobStatus
+from routers import solicitacoes
+
+
+def insert_job(db, user_id: str, job_status: str, age_seconds: float) -> ObjectId:
+    updated_at = datetime.utcnow() - timedelta(seconds=age_seconds)
+    job = {
+        "user_id": user_id,
+        "status": job_status,
+        "filename": "processos.xlsx",
+        "cliente_id": "cliente",
+        "servico": "buscar_documentos",
+        "created_at": updated_at,
+        "updated_at": updated_at,
+        "expira_em": updated_at + timedelta(hours=24),
+    }
+    return asyncio.run(db.upload_jobs.insert_one(job)).inserted_id
+
+
+def test_job_waits_for_a_saturated_parsing_pool(db, user, cliente, monkeypatch):
+    monkeypatch.setattr(settings, "upload_job_retry_seconds", 0)
+    monkeypatch.setattr(settings, "cnj_validate_check_digit", False)
+    cnjs = fake_cnjs(3)
+    attempts = []
+
+    async def saturated_then_free(path):
+        attempts.append(path)
+        if len(attempts) < 3:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="busy")
+        return cnjs
+
+    monkeypatch.setattr(solicitacoes, "parse_excel_cnjs", saturated_then_free)
+
+    job_id = insert_job(db, user, UploadJobStatus.PENDENTE.value, 0)
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+
+    asyncio.run(solicitacoes._run_upload_job(
+        db, job_id, path, {"cliente_id": cliente, "servico": "buscar_documentos"}, user
+    ))
+
+    job = asyncio.run(db.upload_jobs.find_one({"_id": job_id}))
+    assert len(attempts) == 3
+    assert job["status"] == UploadJobStatus.CONCLUIDO.value
+    assert job["total_cnjs"] == 3
+    assert not os.path.exists(path)
+
+
+def test_jobs_lost_to_a_restart_are_failed(db, api, user, auth_headers):
+    stale = insert_job(db, user, UploadJobStatus.EM_EXECUCAO.value, settings.upload_job_stale_seconds + 1)
+    running = insert_job(db, user, UploadJobStatus.EM_EXECUCAO.value, 1)
+
+    response = api.get(f"/api/solicitacoes/upload/jobs/{stale}", headers=auth_headers)
+    assert response.json()["status"] == UploadJobStatus.ERRO.value
+    assert response.json()["erro"]
+
+    stored = asyncio.run(db.upload_jobs.find_one({"_id": stale}))
+    assert stored["status"] == UploadJobStatus.ERRO.value
+
+    response = api.get(f"/api/solicitacoes/upload/jobs/{running}", headers=auth_headers)
+    assert response.json()["status"] == UploadJobStatus.EM_EXECUCAO.value
+
+
+def test_upload_over_the_size_limit_is_rejected(api, auth_headers, cliente, monkeypatch):
+    monkeypatch.setattr(settings, "excel_upload_max_mb", 1)
+    monkeypatch.setattr(settings, "excel_async_threshold_mb", 2)
+    spooled = []
+    mkstemp = tempfile.mkstemp
+
+    def recording_mkstemp(*args, **kwargs):
+        fd, path = mkstemp(*args, **kwargs)
+        spooled.append(path)
+        return fd, path
+
+    monkeypatch.setattr(solicitacoes.tempfile, "mkstemp", recording_mkstemp)
+
+    def upload(size: int):
+        return api.post(
+            "/api/solicitacoes/upload",
+            data={"cliente_id": cliente},
+            files={"file": ("processos.xlsx", b"x" * size)},
+            headers=auth_headers,
+        )
+
+    limit = 1024 * 1024
+    too_large = upload(limit + 1)
+    assert too_large.status_code == 413
+    assert "1 MB" in too_large.json()["detail"]
+
+    # At the limit the file is accepted (and then fails to parse)
+    assert upload(limit).status_code == 400
+
+    # The spooled files were removed either way
+    assert len(spooled) == 2
+    assert not any(os.path.exists(path) for path in spooled)
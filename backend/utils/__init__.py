@@ -4,15 +4,25 @@ Utility functions
 from .auth import (
     hash_password,
     verify_password,
+    hash_password_async,
+    verify_password_async,
     create_access_token,
+    create_stream_ticket,
     decode_access_token,
     get_current_user,
+    get_current_user_from_ticket,
+    invalidate_user,
 )
 
 __all__ = [
     "hash_password",
     "verify_password",
+    "hash_password_async",
+    "verify_password_async",
     "create_access_token",
+    "create_stream_ticket",
     "decode_access_token",
     "get_current_user",
+    "get_current_user_from_ticket",
+    "invalidate_user",
 ]
@@ -1,16 +1,20 @@
 """
 Authentication utilities - JWT and password hashing
 """
+import asyncio
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Optional
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from config.settings import settings
 from database import get_database
 from bson import ObjectId
+from utils.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +24,18 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # HTTP Bearer security
 security = HTTPBearer()
 
+# Verified token payloads ("token", <jwt>) and active user principals
+# ("user", <user_id>), so polled requests skip signature checks and the
+# users lookup. Entries live at most auth_cache_ttl_seconds.
+principal_cache = TTLCache(
+    maxsize=settings.auth_cache_max_entries, ttl=settings.auth_cache_ttl_seconds
+)
+
+# Scope of the short-lived tickets that open progress streams. Tickets are
+# sent in the URL (EventSource cannot send headers), so they are not
+# accepted as access tokens.
+STREAM_TICKET_SCOPE = "progress_stream"
+
 
 def hash_password(password: str) -> str:
     """
@@ -48,6 +64,89 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+class PasswordHashPool:
+    """
+    Runs bcrypt off the event loop on a small dedicated thread pool
+
+    bcrypt releases the GIL, so a few threads keep logins parallel while the
+    event loop keeps serving other requests. When more than ``max_pending``
+    jobs are running or queued, new ones are rejected with 503 instead of
+    piling up behind a login storm.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hash"
+        )
+        self._pending = 0
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """
+        Run a hashing function on the pool
+
+        Raises:
+            HTTPException: 503 if the pool is saturated
+        """
+        if self._pending >= self.max_pending:
+            logger.warning("Password hashing pool saturated, rejecting request")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        """Stop the worker threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_pool = PasswordHashPool(
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password on the password hashing pool
+
+    Args:
+        password: Plain text password
+
+    Returns:
+        Hashed password
+
+    Raises:
+        HTTPException: 503 if the pool is saturated
+    """
+    return await password_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the password hashing pool
+
+    Args:
+        plain_password: Plain text password
+        hashed_password: Hashed password
+
+    Returns:
+        True if password matches
+
+    Raises:
+        HTTPException: 503 if the pool is saturated
+    """
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token
@@ -77,6 +176,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def create_stream_ticket(user_id: str) -> str:
+    """
+    Create a ticket that opens the user's progress stream
+
+    Args:
+        user_id: User ID
+
+    Returns:
+        Encoded JWT ticket, valid for progress_ticket_seconds
+    """
+    return create_access_token(
+        data={"sub": user_id, "scope": STREAM_TICKET_SCOPE},
+        expires_delta=timedelta(seconds=settings.progress_ticket_seconds),
+    )
+
+
 def decode_access_token(token: str) -> Optional[dict]:
     """
     Decode and validate a JWT token
@@ -98,6 +213,19 @@ def decode_access_token(token: str) -> Optional[dict]:
         return None
 
 
+def invalidate_user(user_id: str):
+    """
+    Drop a cached user principal
+
+    Call after deactivating or changing a user so the next request reloads
+    it. Other API processes pick the change up within the cache TTL.
+
+    Args:
+        user_id: User ID
+    """
+    principal_cache.pop(("user", str(user_id)))
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db=Depends(get_database),
@@ -112,6 +240,47 @@ async def get_current_user(
     Returns:
         User document
 
+    Raises:
+        HTTPException: If authentication fails
+    """
+    return await _authenticate_token(credentials.credentials, db)
+
+
+async def get_current_user_from_ticket(
+    ticket: str = Query(..., description="Stream ticket (see create_stream_ticket)"),
+    db=Depends(get_database),
+):
+    """
+    Dependency to get current authenticated user from a ``ticket`` query parameter
+
+    For clients that cannot send headers, such as the browser EventSource.
+    Only stream tickets are accepted, so access tokens never appear in URLs.
+
+    Args:
+        ticket: Stream ticket
+        db: Database instance
+
+    Returns:
+        User document
+
+    Raises:
+        HTTPException: If authentication fails
+    """
+    return await _authenticate_token(ticket, db, scope=STREAM_TICKET_SCOPE)
+
+
+async def _authenticate_token(token: str, db, scope: Optional[str] = None):
+    """
+    Resolve the active user a JWT token belongs to
+
+    Args:
+        token: JWT access token
+        db: Database instance
+        scope: Scope the token must have (None for access tokens)
+
+    Returns:
+        User document
+
     Raises:
         HTTPException: If authentication fails
     """
@@ -121,19 +290,32 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    token = credentials.credentials
-    payload = decode_access_token(token)
+    payload = principal_cache.get(("token", token))
 
     if payload is None:
-        raise credentials_exception
+        payload = decode_access_token(token)
+
+        if payload is None:
+            raise credentials_exception
+
+        # Never keep a token past its expiration
+        ttl = payload["exp"] - time.time() if "exp" in payload else None
+        principal_cache.set(("token", token), payload, ttl=ttl)
 
     user_id: str = payload.get("sub")
-    if user_id is None:
+    if user_id is None or payload.get("scope") != scope:
         raise credentials_exception
 
+    user = principal_cache.get(("user", user_id))
+
+    if user is not None:
+        return user
+
     # Get user from database
     try:
-        user = await db.usuarios.find_one({"_id": ObjectId(user_id)})
+        user = await db.usuarios.find_one(
+            {"_id": ObjectId(user_id)}, {"senha_hash": 0}
+        )
 
         if user is None:
             raise credentials_exception
@@ -144,8 +326,11 @@ async def get_current_user(
                 detail="User account is inactive",
             )
 
+        principal_cache.set(("user", user_id), user)
         return user
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting user: {e}")
         raise credentials_exception
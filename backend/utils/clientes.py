@@ -0,0 +1,161 @@
+"""
+In-memory client registry
+
+The ``clientes`` collection is small and rarely changes but is read on
+almost every request. The registry keeps every client in memory, indexed
+by ``_id`` and ``codigo``, and reloads the whole collection when its TTL
+expires or when it is told that clients changed.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Any, Iterable, List, Optional
+from pymongo.errors import PyMongoError
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Minimum interval between reloads triggered by unknown client IDs
+MISS_RELOAD_INTERVAL = 5.0
+
+
+class ClienteRegistry:
+    """Process-wide cache of the clientes collection"""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_codigo: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def load(self, db):
+        """
+        Load every client from the database
+
+        Args:
+            db: Database instance
+        """
+        clientes = await db.clientes.find({}).to_list(length=None)
+
+        self._by_id = {str(cliente["_id"]): cliente for cliente in clientes}
+        self._by_codigo = {cliente["codigo"]: cliente for cliente in clientes}
+        self._loaded_at = time.monotonic()
+
+        logger.info(f"Client registry loaded {len(clientes)} clients")
+
+    def invalidate(self):
+        """Force a reload on the next lookup"""
+        self._loaded_at = None
+
+    def _age(self) -> float:
+        if self._loaded_at is None:
+            return float("inf")
+        return time.monotonic() - self._loaded_at
+
+    async def _refresh(self, db, max_age: float):
+        """Reload if the data is older than ``max_age`` seconds"""
+        if self._age() <= max_age:
+            return
+
+        async with self._lock:
+            # Another request may have reloaded while we waited
+            if self._age() > max_age:
+                await self.load(db)
+
+    async def get_by_id(self, db, cliente_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a client by ID
+
+        Args:
+            db: Database instance
+            cliente_id: Client ID
+
+        Returns:
+            Client document or None
+        """
+        return (await self.get_many(db, [cliente_id])).get(cliente_id)
+
+    async def get_by_codigo(self, db, codigo: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a client by code
+
+        Args:
+            db: Database instance
+            codigo: Client code (agibank, creditas, etc)
+
+        Returns:
+            Client document or None
+        """
+        await self._refresh(db, self.ttl_seconds)
+
+        if codigo not in self._by_codigo:
+            await self._refresh(db, MISS_RELOAD_INTERVAL)
+
+        return self._by_codigo.get(codigo)
+
+    async def get_many(
+        self, db, cliente_ids: Iterable[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Get several clients by ID
+
+        Unknown IDs trigger at most one reload every few seconds, so a
+        client created by another process is found shortly after.
+
+        Args:
+            db: Database instance
+            cliente_ids: Client IDs
+
+        Returns:
+            Mapping of client ID to client document (unknown IDs are omitted)
+        """
+        cliente_ids = set(cliente_ids)
+        await self._refresh(db, self.ttl_seconds)
+
+        if not cliente_ids.issubset(self._by_id):
+            await self._refresh(db, MISS_RELOAD_INTERVAL)
+
+        return {cid: self._by_id[cid] for cid in cliente_ids if cid in self._by_id}
+
+    async def list(self, db, ativo_apenas: bool = True) -> List[Dict[str, Any]]:
+        """
+        List clients sorted by name
+
+        Args:
+            db: Database instance
+            ativo_apenas: Return only active clients
+
+        Returns:
+            Client documents
+        """
+        await self._refresh(db, self.ttl_seconds)
+
+        clientes = [
+            cliente
+            for cliente in self._by_id.values()
+            if not ativo_apenas or cliente.get("ativo", True)
+        ]
+        return sorted(clientes, key=lambda cliente: cliente["nome"])
+
+    async def watch(self, db):
+        """
+        Invalidate the registry whenever the clientes collection changes
+
+        Requires a replica set (change streams). On standalone servers the
+        registry relies on its TTL only.
+
+        Args:
+            db: Database instance
+        """
+        try:
+            async with db.clientes.watch() as stream:
+                async for _change in stream:
+                    logger.info("Clients changed, invalidating registry")
+                    self.invalidate()
+        except PyMongoError as e:
+            logger.warning(f"Client change stream unavailable, using TTL only: {e}")
+
+
+# Global registry instance
+cliente_registry = ClienteRegistry(ttl_seconds=settings.cliente_registry_ttl_seconds)
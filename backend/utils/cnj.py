@@ -0,0 +1,208 @@
+"""
+CNJ process number normalization and validation
+
+A CNJ number (Resolução CNJ 65/2008) has 20 digits formatted as
+NNNNNNN-DD.AAAA.J.TR.OOOO, where DD are mod-97 check digits computed over
+the other 18: NNNNNNN AAAA J TR OOOO DD, read as one integer, is
+congruent to 1 modulo 97.
+"""
+import re
+from typing import Any, Dict, Iterable, List
+from config.settings import settings
+
+CNJ_DIGITS = 20
+
+# Leading zeros a number may have lost (the sequential number NNNNNNN is
+# never zero, so at least 14 digits remain)
+MAX_LOST_ZEROS = 6
+
+_E11 = 10 ** 11
+_E13 = 10 ** 13
+
+# Largest integer a double holds exactly; above it a numeric cell may
+# already be a different number (and still pass mod-97 by chance)
+MAX_EXACT_FLOAT = 2 ** 53
+
+# Already formatted: the common case, validated without rebuilding the string
+_FORMATTED = re.compile(r"\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}")
+
+# Anything else must only contain digits and separators
+_SEPARATED = re.compile(r"[\d\s.\-/]+")
+_NON_DIGITS = re.compile(r"\D+")
+
+
+def format_cnj(digits: str) -> str:
+    """
+    Format 20 CNJ digits as NNNNNNN-DD.AAAA.J.TR.OOOO
+
+    Args:
+        digits: CNJ digits
+
+    Returns:
+        Formatted CNJ
+    """
+    return f"{digits[:7]}-{digits[7:9]}.{digits[9:13]}.{digits[13]}.{digits[14:16]}.{digits[16:]}"
+
+
+def _zero_fill(digits: str) -> str:
+    """Restore leading zeros dropped by numeric representations"""
+    if len(digits) < CNJ_DIGITS - MAX_LOST_ZEROS:
+        raise ValueError(f"expected {CNJ_DIGITS} digits, got {len(digits)}")
+    return digits.zfill(CNJ_DIGITS)
+
+
+def has_valid_check_digits(digits: str) -> bool:
+    """
+    Verify the mod-97 check digits of a CNJ
+
+    Args:
+        digits: The 20 CNJ digits, in CNJ order
+
+    Returns:
+        True if the check digits match
+    """
+    return int(digits[:7] + digits[9:] + digits[7:9]) % 97 == 1
+
+
+def _formatted_check_digits_ok(text: str) -> bool:
+    """``has_valid_check_digits`` for a formatted CNJ, rearranging digits arithmetically"""
+    number = int(text.replace("-", "").replace(".", ""))
+    return (
+        number // _E13 * _E13 + number % _E11 * 100 + number // _E11 % 100
+    ) % 97 == 1
+
+
+def normalize_cnj(value: Any, check_digits: bool = None) -> str:
+    """
+    Normalize a CNJ given as a formatted string, raw digits or a numeric cell
+
+    Raw digits and numbers that lost their leading zeros (e.g. numeric
+    Excel cells) are zero-filled to 20 digits. Floats above 2**53 are
+    rejected: a double cannot hold every 20-digit CNJ exactly.
+
+    Args:
+        value: CNJ in any supported representation
+        check_digits: Validate the check digits (defaults to the
+            cnj_validate_check_digit setting)
+
+    Returns:
+        Formatted CNJ (NNNNNNN-DD.AAAA.J.TR.OOOO)
+
+    Raises:
+        ValueError: If the value is not a valid CNJ (message says why)
+    """
+    if check_digits is None:
+        check_digits = settings.cnj_validate_check_digit
+
+    if isinstance(value, str):
+        text = value.strip()
+
+        if _FORMATTED.fullmatch(text):
+            if check_digits and not _formatted_check_digits_ok(text):
+                raise ValueError("invalid check digits")
+            return text
+
+        if not text:
+            raise ValueError("empty")
+
+        if text.isascii() and text.isdigit():
+            digits = _zero_fill(text)
+        elif _SEPARATED.fullmatch(text):
+            digits = _NON_DIGITS.sub("", text)
+        else:
+            raise ValueError("invalid characters")
+
+    elif isinstance(value, bool) or value is None:
+        raise ValueError("empty" if value is None else "not a CNJ")
+
+    elif isinstance(value, int):
+        if value < 0:
+            raise ValueError("not a CNJ")
+        digits = _zero_fill(str(value))
+
+    elif isinstance(value, float):
+        if not value.is_integer() or value < 0:
+            raise ValueError("not a CNJ")
+        if value > MAX_EXACT_FLOAT:
+            raise ValueError("precision lost (numeric cell, store CNJs as text)")
+        digits = _zero_fill(str(int(value)))
+
+    else:
+        raise ValueError("not a CNJ")
+
+    if len(digits) != CNJ_DIGITS:
+        raise ValueError(f"expected {CNJ_DIGITS} digits, got {len(digits)}")
+
+    if check_digits and not has_valid_check_digits(digits):
+        raise ValueError("invalid check digits")
+
+    return format_cnj(digits)
+
+
+def is_valid_cnj(value: Any, check_digits: bool = None) -> bool:
+    """
+    Check whether a value is a valid CNJ in any supported representation
+
+    Args:
+        value: CNJ candidate
+        check_digits: Validate the check digits (defaults to the setting)
+
+    Returns:
+        True if the value normalizes to a valid CNJ
+    """
+    try:
+        normalize_cnj(value, check_digits)
+        return True
+    except ValueError:
+        return False
+
+
+def normalize_cnjs(values: Iterable[Any], check_digits: bool = None) -> Dict[str, Any]:
+    """
+    Normalize, validate and dedupe many CNJs in one pass
+
+    Args:
+        values: CNJ candidates in any supported representation
+        check_digits: Validate the check digits (defaults to the setting)
+
+    Returns:
+        Dict with ``cnjs`` (unique formatted CNJs, in first-seen order),
+        ``invalid`` (list of dicts with the input ``index``, ``value`` and
+        ``erro``) and ``duplicates`` (number of repeated valid inputs)
+    """
+    if check_digits is None:
+        check_digits = settings.cnj_validate_check_digit
+
+    seen: Dict[str, None] = {}
+    invalid: List[Dict[str, Any]] = []
+    duplicates = 0
+
+    # Local names: this loop runs once per spreadsheet cell
+    formatted = _FORMATTED.fullmatch
+    check_ok = _formatted_check_digits_ok
+    normalize = normalize_cnj
+
+    for index, value in enumerate(values):
+        # Fast path: an already formatted string (the common case)
+        if value.__class__ is str and formatted(value):
+            if value in seen:
+                duplicates += 1
+                continue
+            if check_digits and not check_ok(value):
+                invalid.append({"index": index, "value": value, "erro": "invalid check digits"})
+                continue
+            seen[value] = None
+            continue
+
+        try:
+            cnj = normalize(value, check_digits)
+        except ValueError as e:
+            invalid.append({"index": index, "value": value, "erro": str(e)})
+            continue
+
+        if cnj in seen:
+            duplicates += 1
+        else:
+            seen[cnj] = None
+
+    return {"cnjs": list(seen), "invalid": invalid, "duplicates": duplicates}
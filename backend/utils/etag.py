@@ -0,0 +1,52 @@
+"""
+Conditional GET helpers (ETag / If-None-Match)
+"""
+import hashlib
+from typing import Any, Dict, Optional
+
+# Polled resources must be revalidated on every request, by this user only
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts: Any) -> str:
+    """
+    Build a weak ETag from the values a representation depends on
+
+    Args:
+        parts: Values identifying the representation (timestamps, counters,
+            query parameters, ...)
+
+    Returns:
+        Weak ETag header value
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag (weak comparison)
+
+    Args:
+        if_none_match: If-None-Match request header
+        etag: Current ETag
+
+    Returns:
+        True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    """Headers sent with every response of a conditional resource"""
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
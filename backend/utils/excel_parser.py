@@ -1,28 +1,42 @@
 """
 Excel file parser for CNJ process numbers
 """
+import asyncio
 import logging
-from typing import List, Set
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, BinaryIO, Callable, Iterator, List, Optional, Union
 import openpyxl
 from io import BytesIO
 import re
+from fastapi import HTTPException, status
+from config.settings import settings
+from utils import cnj as cnj_utils
+from utils.cnj import normalize_cnj, normalize_cnjs
 
 logger = logging.getLogger(__name__)
 
+# Cells that look like an attempt at a CNJ (reported when invalid)
+_LOOKS_LIKE_CNJ = re.compile(r'\d{5,}')
+
+# Header words skipped when scanning the whole sheet
+_HEADER_WORDS = {'CNJ', 'PROCESSO', 'NÚMERO'}
+
+ExcelSource = Union[bytes, str, BinaryIO]
+
 
 def is_valid_cnj(cnj: str) -> bool:
     """
-    Validate CNJ format: NNNNNNN-DD.AAAA.J.TR.OOOO
+    Validate a CNJ, including its check digits
 
     Args:
         cnj: CNJ process number
 
     Returns:
-        True if valid CNJ format
+        True if valid CNJ
     """
-    # CNJ pattern: 7 digits - 2 digits . 4 digits . 1 digit . 2 digits . 4 digits
-    pattern = r'^\d{7}-\d{2}\.\d{4}\.\d{1}\.\d{2}\.\d{4}$'
-    return bool(re.match(pattern, cnj.strip()))
+    return cnj_utils.is_valid_cnj(cnj)
 
 
 def clean_cnj(cnj: str) -> str:
@@ -30,102 +44,119 @@ def clean_cnj(cnj: str) -> str:
     Clean and format CNJ number
 
     Args:
-        cnj: Raw CNJ string
+        cnj: Raw CNJ (formatted, raw digits or numeric)
 
     Returns:
-        Cleaned CNJ string
+        Formatted CNJ, or the stripped input if it is not a valid CNJ
     """
-    # Remove extra whitespace
-    cnj = cnj.strip()
+    try:
+        return normalize_cnj(cnj)
+    except ValueError:
+        return str(cnj).strip()
 
-    # Remove any non-digit/non-dash/non-dot characters
-    cnj = re.sub(r'[^\d\-.]', '', cnj)
 
-    return cnj
+def _iter_cnj_cells(rows: Iterator[tuple]) -> Iterator[Any]:
+    """
+    Yield the candidate CNJ cells of a sheet, row by row
 
+    Uses the column whose header (first row) is "CNJ"; without one, every
+    non-empty cell except header words is a candidate.
 
-async def parse_excel_cnjs(file_content: bytes) -> List[str]:
+    Args:
+        rows: Row value tuples (``iter_rows(values_only=True)``)
     """
-    Parse Excel file and extract CNJ process numbers
-    Looks for a column named "CNJ" in the first sheet header
+    header = next(rows, None) or ()
+
+    # Find CNJ column (look for header "CNJ" in first row)
+    cnj_column = None
+    for col_idx, value in enumerate(header):
+        if value is not None and str(value).strip().upper() == "CNJ":
+            cnj_column = col_idx
+            logger.info(f"Found CNJ column at index {col_idx + 1}")
+            break
+
+    if cnj_column is not None:
+        # Parse CNJs from the specific column
+        for row in rows:
+            if len(row) <= cnj_column:
+                continue
+            value = row[cnj_column]
+
+            # Skip empty cells
+            if value is not None and (value.__class__ is not str or value.strip()):
+                yield value
+        return
+
+    # Fallback: search all cells if no CNJ column found
+    logger.warning("CNJ column not found in header, searching all cells...")
+
+    yield from _candidate_cells(header)
+    for row in rows:
+        yield from _candidate_cells(row)
+
+
+def _candidate_cells(row: tuple) -> Iterator[Any]:
+    """Non-empty cells of a row that are not header words"""
+    for value in row:
+        if value is None:
+            continue
+
+        cell_value = str(value).strip()
+
+        # Skip empty cells or headers
+        if not cell_value or cell_value.upper() in _HEADER_WORDS:
+            continue
+
+        yield value
+
+
+def read_excel_cnjs(source: ExcelSource, check_digits: bool = None) -> List[str]:
+    """
+    Extract CNJ process numbers from an Excel file, streaming its rows
+
+    The workbook is opened read-only and rows are read as plain values, so
+    no cell objects are kept: memory grows with the distinct CNJs and the
+    shared string table, not with the number of cells. Blocking; see
+    ``parse_excel_cnjs``.
 
     Args:
-        file_content: Excel file content in bytes
+        source: Path or binary file object of the workbook (bytes are
+            accepted too)
+        check_digits: Validate the CNJ check digits (defaults to the
+            cnj_validate_check_digit setting)
 
     Returns:
-        List of unique valid CNJ numbers
+        List of unique valid CNJ numbers, sorted
 
     Raises:
         ValueError: If file cannot be parsed or no valid CNJs found
     """
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+
     try:
-        # Load workbook from bytes
-        workbook = openpyxl.load_workbook(BytesIO(file_content), data_only=True)
-
-        # Get first sheet (always use first sheet)
-        sheet = workbook.worksheets[0]
-
-        cnjs: Set[str] = set()
-        invalid_cnjs: List[str] = []
-
-        # Find CNJ column (look for header "CNJ" in first row)
-        cnj_column = None
-        header_row = 1
-
-        for col_idx, cell in enumerate(sheet[header_row], start=1):
-            if cell.value and str(cell.value).strip().upper() == "CNJ":
-                cnj_column = col_idx
-                logger.info(f"Found CNJ column at index {col_idx}")
-                break
-
-        if cnj_column:
-            # Parse CNJs from the specific column
-            for row_idx in range(header_row + 1, sheet.max_row + 1):
-                cell = sheet.cell(row=row_idx, column=cnj_column)
-
-                if cell.value:
-                    cell_value = str(cell.value).strip()
-
-                    # Skip empty cells
-                    if not cell_value:
-                        continue
-
-                    # Clean CNJ
-                    cleaned_cnj = clean_cnj(cell_value)
-
-                    # Validate CNJ
-                    if is_valid_cnj(cleaned_cnj):
-                        cnjs.add(cleaned_cnj)
-                    else:
-                        # Check if it looks like a CNJ
-                        if re.search(r'\d{5,}', cell_value):
-                            invalid_cnjs.append(cell_value)
-        else:
-            # Fallback: search all cells if no CNJ column found
-            logger.warning("CNJ column not found in header, searching all cells...")
-
-            for row in sheet.iter_rows():
-                for cell in row:
-                    if cell.value:
-                        cell_value = str(cell.value).strip()
-
-                        # Skip empty cells or headers
-                        if not cell_value or cell_value.upper() in ['CNJ', 'PROCESSO', 'NÚMERO']:
-                            continue
-
-                        # Clean CNJ
-                        cleaned_cnj = clean_cnj(cell_value)
-
-                        # Validate CNJ
-                        if is_valid_cnj(cleaned_cnj):
-                            cnjs.add(cleaned_cnj)
-                        else:
-                            # Check if it looks like a CNJ
-                            if re.search(r'\d{5,}', cell_value):
-                                invalid_cnjs.append(cell_value)
-
-        # Close workbook
-        workbook.close()
+        workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+
+        try:
+            # Get first sheet (always use first sheet)
+            sheet = workbook.worksheets[0]
+
+            # Normalize, validate and dedupe cells as they are read
+            result = normalize_cnjs(
+                _iter_cnj_cells(sheet.iter_rows(values_only=True)), check_digits
+            )
+        finally:
+            # Read-only workbooks keep the file open until closed
+            workbook.close()
+
+        cnjs = result["cnjs"]
+
+        # Only report cells that look like an attempt at a CNJ
+        invalid_cnjs = [
+            str(item["value"]).strip()
+            for item in result["invalid"]
+            if _LOOKS_LIKE_CNJ.search(str(item["value"]))
+        ]
 
         if not cnjs:
             error_msg = "Nenhum número CNJ válido encontrado no arquivo Excel"
@@ -140,10 +171,100 @@ async def parse_excel_cnjs(file_content: bytes) -> List[str]:
         if invalid_cnjs:
             logger.warning(f"Found {len(invalid_cnjs)} invalid CNJ entries")
 
-        return sorted(list(cnjs))
+        return sorted(cnjs)
 
     except openpyxl.utils.exceptions.InvalidFileException:
         raise ValueError("Formato de arquivo Excel inválido. Por favor, faça upload de um arquivo .xlsx válido")
     except Exception as e:
         logger.error(f"Error parsing Excel file: {e}")
         raise ValueError(f"Erro ao processar arquivo Excel: {str(e)}")
+
+
+class ExcelParsePool:
+    """
+    Parses spreadsheets on a small pool of worker processes
+
+    openpyxl is pure Python and holds the GIL, so parsing on a thread still
+    stalls the event loop; worker processes keep it free. When more than
+    ``max_pending`` uploads are being parsed or queued, new ones are
+    rejected with 503 instead of piling up.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created on first use; "spawn" because forking a process that runs
+        # an event loop and driver threads is unsafe
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """
+        Run a parsing function on the pool (arguments must be picklable)
+
+        Raises:
+            HTTPException: 503 if the pool is saturated
+        """
+        if self._pending >= self.max_pending:
+            logger.warning("Excel parsing pool saturated, rejecting upload")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many spreadsheets being processed, try again shortly",
+                headers={"Retry-After": "5"},
+            )
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool next time
+            logger.error("Excel parsing worker died, restarting the pool")
+            self.shutdown()
+            raise
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+excel_pool = ExcelParsePool(
+    workers=settings.excel_parse_workers,
+    max_pending=settings.excel_parse_max_pending,
+)
+
+
+async def parse_excel_cnjs(source: Union[bytes, str]) -> List[str]:
+    """
+    Parse Excel file and extract CNJ process numbers
+    Looks for a column named "CNJ" in the first sheet header
+
+    Parsing runs on the Excel parsing pool so the event loop keeps serving
+    other requests.
+
+    Args:
+        source: Path of the spooled upload, or the file content
+
+    Returns:
+        List of unique valid CNJ numbers
+
+    Raises:
+        ValueError: If file cannot be parsed or no valid CNJs found
+        HTTPException: 503 if the parsing pool is saturated
+    """
+    # Settings are passed explicitly: workers don't share this process's state
+    return await excel_pool.run(
+        read_excel_cnjs, source, settings.cnj_validate_check_digit
+    )
@@ -0,0 +1,281 @@
+"""
+In-process notifications between request handlers
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class TaskNotifier:
+    """
+    Wakes long-polling RPA requests when new tasks are created
+
+    Each ``notify`` completes the current generation's event and starts a
+    new one, so every waiter registered before the notification wakes up
+    exactly once. Only waiters in the same process are woken; other API
+    workers fall back to re-checking when their wait times out.
+    """
+
+    def __init__(self):
+        self._event = asyncio.Event()
+
+    def notify(self):
+        """Wake every request currently waiting for tasks"""
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    def listen(self) -> asyncio.Event:
+        """
+        Register interest in the next notification
+
+        Call this before checking for tasks, so a notification sent between
+        the check and ``wait`` is not lost.
+        """
+        return self._event
+
+    async def wait(self, listener: asyncio.Event, timeout: float) -> bool:
+        """
+        Wait for the notification a listener was registered for
+
+        Args:
+            listener: Value returned by ``listen``
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            True if notified, False on timeout
+        """
+        try:
+            await asyncio.wait_for(listener.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+# Fields pushed to clients when a solicitacao progresses
+PROGRESS_FIELDS = (
+    "status",
+    "total_cnjs",
+    "cnjs_processados",
+    "cnjs_sucesso",
+    "cnjs_erro",
+    "updated_at",
+    "concluido_em",
+)
+
+
+# Maximum solicitacoes read per progress poll query
+POLL_BATCH_SIZE = 500
+
+
+def progress_update(solicitacao_id: str, solicitacao: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the progress message for a solicitacao
+
+    Args:
+        solicitacao_id: Solicitacao ID
+        solicitacao: Solicitacao document or state (missing fields are omitted)
+
+    Returns:
+        Progress message
+    """
+    update = {"id": solicitacao_id}
+    update.update({field: solicitacao[field] for field in PROGRESS_FIELDS if field in solicitacao})
+    return update
+
+
+class ProgressBroker:
+    """
+    Publishes solicitacao progress to the streams of their owners
+
+    Writers in this process publish directly. When ``watch`` runs, progress
+    comes from a change stream on solicitacoes instead, so updates written
+    by other API workers and by the background workers are delivered too;
+    direct publishing is then skipped to avoid duplicates. Without a change
+    stream, ``poll`` picks up those updates for every stream of the process.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._watching = False
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        """
+        Start receiving progress for a user's solicitacoes
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Queue receiving progress messages
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        """Stop delivering progress to a queue"""
+        queues = self._subscribers.get(user_id)
+
+        if queues is None:
+            return
+
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+
+    def publish(self, user_id: str, update: Dict[str, Any]):
+        """
+        Deliver a progress message to every stream of a user
+
+        A stream that cannot keep up loses its oldest messages; each message
+        carries the full progress state, so only intermediate states are lost.
+
+        Args:
+            user_id: Owner of the solicitacao
+            update: Progress message
+        """
+        for queue in self._subscribers.get(user_id, ()):
+            self._deliver(queue, update)
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, update: Dict[str, Any]):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(update)
+
+    def publish_local(self, user_id: Optional[str], update: Dict[str, Any]):
+        """
+        Publish a change written by this process
+
+        Skipped while the change stream is delivering every change.
+        """
+        if user_id and not self._watching:
+            self.publish(user_id, update)
+
+    async def poll(self, db, interval: float):
+        """
+        Publish solicitacao changes found by polling, until cancelled
+
+        Fallback while no change stream runs: changes written by the
+        background workers and by other API workers are only seen this way.
+        One poller runs per process for every open stream, so the database
+        load does not grow with the number of streams. Each poll reads the
+        (user_id, updated_at) index for the users with an open stream, from a
+        little before the newest change seen, because concurrent writers may
+        commit out of ``updated_at`` order, and skips changes already
+        delivered.
+
+        Args:
+            db: Database instance
+            interval: Seconds between polls
+        """
+        overlap = timedelta(seconds=interval * 2)
+        seen_until = datetime.utcnow()
+        delivered: Dict[str, datetime] = {}
+
+        while True:
+            await asyncio.sleep(interval)
+
+            if self._watching or not self._subscribers:
+                # The change stream delivers every change, or nobody listens
+                seen_until = datetime.utcnow()
+                continue
+
+            since = seen_until - overlap
+
+            try:
+                async for solicitacao in self._changed_since(db, list(self._subscribers), since):
+                    solicitacao_id = str(solicitacao["_id"])
+                    updated_at = solicitacao["updated_at"]
+                    seen_until = max(seen_until, updated_at)
+
+                    if delivered.get(solicitacao_id) != updated_at:
+                        delivered[solicitacao_id] = updated_at
+                        self.publish(
+                            solicitacao["user_id"], progress_update(solicitacao_id, solicitacao)
+                        )
+
+            except PyMongoError as e:
+                logger.warning(f"Error polling solicitacao progress: {e}")
+
+            # Older changes are never read again
+            delivered = {key: value for key, value in delivered.items() if value > since}
+
+    @staticmethod
+    async def _changed_since(db, user_ids: List[str], since: datetime):
+        """Yield the users' solicitacoes changed after ``since``, oldest change first"""
+        query = {"user_id": {"$in": user_ids}, "updated_at": {"$gt": since}}
+        projection = {field: 1 for field in ("user_id",) + PROGRESS_FIELDS}
+
+        while True:
+            batch = (
+                await db.solicitacoes.find(query, projection)
+                .sort([("updated_at", 1), ("_id", 1)])
+                .limit(POLL_BATCH_SIZE)
+                .to_list(length=POLL_BATCH_SIZE)
+            )
+
+            for solicitacao in batch:
+                yield solicitacao
+
+            if len(batch) < POLL_BATCH_SIZE:
+                return
+
+            # Continue after the last change read
+            last = batch[-1]
+            query = {
+                "user_id": {"$in": user_ids},
+                "$or": [
+                    {"updated_at": {"$gt": last["updated_at"]}},
+                    {"updated_at": last["updated_at"], "_id": {"$gt": last["_id"]}},
+                ],
+            }
+
+    async def watch(self, db):
+        """
+        Publish every solicitacao change from a MongoDB change stream
+
+        Requires a replica set. On standalone servers only changes written
+        by this process are published.
+
+        Args:
+            db: Database instance
+        """
+        pipeline = [
+            {"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}},
+            {"$project": {
+                "documentKey": 1,
+                **{f"fullDocument.{field}": 1 for field in ("user_id",) + PROGRESS_FIELDS},
+            }},
+        ]
+
+        try:
+            async with db.solicitacoes.watch(pipeline, full_document="updateLookup") as stream:
+                self._watching = True
+                logger.info("Publishing solicitacao progress from change stream")
+
+                async for change in stream:
+                    solicitacao = change.get("fullDocument")
+                    if not solicitacao:
+                        continue
+
+                    self.publish(
+                        solicitacao["user_id"],
+                        progress_update(str(change["documentKey"]["_id"]), solicitacao),
+                    )
+        except PyMongoError as e:
+            logger.warning(f"Solicitacao change stream unavailable, publishing locally: {e}")
+        finally:
+            self._watching = False
+
+
+# Global notifier instance
+task_notifier = TaskNotifier()
+
+# Global progress broker instance
+progress_broker = ProgressBroker()
@@ -0,0 +1,75 @@
+"""
+Keyset (cursor) pagination helpers
+
+A cursor encodes the sort key and ``_id`` of the last document of a page.
+The next page is everything strictly after that position, which the
+database finds with an index seek instead of skipping over earlier rows.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+def encode_cursor(value: datetime, doc_id: ObjectId) -> str:
+    """
+    Build an opaque cursor for a position in a (datetime, _id) ordering
+
+    Args:
+        value: Sort key of the last document returned
+        doc_id: ``_id`` of the last document returned
+
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json.dumps([value.isoformat(), str(doc_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """
+    Decode a cursor built by ``encode_cursor``
+
+    Args:
+        cursor: Cursor string
+
+    Returns:
+        Tuple of (sort key, _id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, doc_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(value), ObjectId(doc_id)
+    except (ValueError, TypeError, InvalidId) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def after_cursor(field: str, cursor: str, descending: bool = True) -> Dict[str, Any]:
+    """
+    Build the query matching documents after a cursor position
+
+    Args:
+        field: Datetime field the results are sorted by (then by ``_id``)
+        cursor: Cursor string
+        descending: Whether results are sorted newest first
+
+    Returns:
+        MongoDB filter to combine with the rest of the query
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    value, doc_id = decode_cursor(cursor)
+    op = "$lt" if descending else "$gt"
+
+    return {
+        "$or": [
+            {field: {op: value}},
+            {field: value, "_id": {op: doc_id}},
+        ]
+    }
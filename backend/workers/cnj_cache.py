@@ -0,0 +1,175 @@
+"""
+Cross-solicitacao CNJ result cache
+
+Different users often ask for the documents of the same CNJ of the same
+client within a few days. The latest successful result for each
+(cliente_codigo, CNJ) pair is kept in the ``cnj_resultados_cache``
+collection, so new solicitacoes can reuse a fresh result instead of
+sending a bot to the court portal again.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Maximum $in size per lookup query
+LOOKUP_CHUNK_SIZE = 1000
+
+# Server error codes of an existing index with other options
+INDEX_CONFLICT_CODES = (85, 86)
+
+
+def cache_id(cliente_codigo: str, cnj: str) -> str:
+    """Cache document ID for a client/CNJ pair"""
+    return f"{cliente_codigo}_{cnj}"
+
+
+def max_age_for(cliente: Dict[str, Any]) -> timedelta:
+    """
+    How old a cached result may be for a client
+
+    Read from ``config_rpa.cache_max_age_hours`` (0 disables reuse),
+    falling back to the cnj_cache_max_age_hours setting.
+
+    Args:
+        cliente: Client document
+
+    Returns:
+        Maximum result age
+    """
+    config = cliente.get("config_rpa") or {}
+    hours = config.get("cache_max_age_hours", settings.cnj_cache_max_age_hours)
+    return timedelta(hours=max(float(hours), 0))
+
+
+class CnjResultCache:
+    """Latest successful result per (cliente_codigo, CNJ)"""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.collection = db.cnj_resultados_cache
+
+    def _update(self, entry: Dict[str, Any]) -> UpdateOne:
+        return UpdateOne(
+            {"_id": cache_id(entry["cliente_codigo"], entry["cnj"])},
+            {"$set": {
+                "cliente_codigo": entry["cliente_codigo"],
+                "cnj": entry["cnj"],
+                "documentos_encontrados": entry.get("documentos_encontrados", 0),
+                "documentos_urls": entry.get("documentos_urls") or [],
+                "solicitacao_id": entry.get("solicitacao_id"),
+                "buscado_em": entry.get("buscado_em") or datetime.utcnow(),
+            }},
+            upsert=True,
+        )
+
+    async def max_age(self) -> timedelta:
+        """Longest age at which any client may reuse a result"""
+        ages = [timedelta(hours=max(settings.cnj_cache_max_age_hours, 0))]
+        cursor = self.db.clientes.find(
+            {"config_rpa.cache_max_age_hours": {"$exists": True}}, {"config_rpa": 1}
+        )
+        async for cliente in cursor:
+            ages.append(max_age_for(cliente))
+
+        return max(ages)
+
+    async def init_ttl_index(self):
+        """
+        Let MongoDB remove results no client can reuse anymore
+
+        The TTL is the longest configured max age (setting or per-client
+        config) at startup; clients whose max age is raised later reuse
+        results up to the old TTL until the next restart.
+        """
+        ttl = int((await self.max_age()).total_seconds())
+
+        try:
+            await self.collection.create_index("buscado_em", expireAfterSeconds=ttl)
+        except OperationFailure as e:
+            if e.code not in INDEX_CONFLICT_CODES:
+                raise
+
+            # The index exists with another TTL
+            await self.db.command(
+                "collMod",
+                self.collection.name,
+                index={"keyPattern": {"buscado_em": 1}, "expireAfterSeconds": ttl},
+            )
+
+        logger.info(f"CNJ result cache entries expire after {ttl} seconds")
+
+    async def store(
+        self,
+        cliente_codigo: str,
+        cnj: str,
+        documentos_encontrados: int,
+        documentos_urls: Optional[List[str]],
+        solicitacao_id: Optional[str] = None,
+        buscado_em: Optional[datetime] = None,
+    ):
+        """
+        Store the latest result fetched for a CNJ
+
+        Args:
+            cliente_codigo: Client code
+            cnj: CNJ process number
+            documentos_encontrados: Number of documents found
+            documentos_urls: Document URLs
+            solicitacao_id: Solicitacao the result was fetched for
+            buscado_em: Fetch time (defaults to now)
+        """
+        await self.store_many([{
+            "cliente_codigo": cliente_codigo,
+            "cnj": cnj,
+            "documentos_encontrados": documentos_encontrados,
+            "documentos_urls": documentos_urls,
+            "solicitacao_id": solicitacao_id,
+            "buscado_em": buscado_em,
+        }])
+
+    async def store_many(self, entries: List[Dict[str, Any]]):
+        """
+        Store many results with one bulk write
+
+        Args:
+            entries: Dicts with the ``store`` arguments
+        """
+        if entries:
+            await self.collection.bulk_write(
+                [self._update(entry) for entry in entries], ordered=False
+            )
+
+    async def fresh(
+        self, cliente_codigo: str, cnjs: Iterable[str], max_age: timedelta
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Find results fetched recently enough to be reused
+
+        Args:
+            cliente_codigo: Client code
+            cnjs: CNJ process numbers
+            max_age: Maximum result age
+
+        Returns:
+            Mapping of CNJ to cached result
+        """
+        if max_age <= timedelta(0):
+            return {}
+
+        cnjs = list(cnjs)
+        since = datetime.utcnow() - max_age
+        found = {}
+
+        for start in range(0, len(cnjs), LOOKUP_CHUNK_SIZE):
+            ids = [cache_id(cliente_codigo, cnj) for cnj in cnjs[start:start + LOOKUP_CHUNK_SIZE]]
+            cursor = self.collection.find({"_id": {"$in": ids}, "buscado_em": {"$gte": since}})
+            async for doc in cursor:
+                found[doc["cnj"]] = doc
+
+        return found
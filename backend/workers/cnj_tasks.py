@@ -0,0 +1,978 @@
+"""
+Per-CNJ task store
+
+Each CNJ of a solicitacao is tracked as its own document in the
+``solicitacao_cnjs`` collection instead of an entry of the embedded
+``resultados`` array. Pending lookups become index range scans and result
+updates touch a small document instead of rewriting the whole solicitacao.
+
+The solicitacao counters are updated separately from the CNJ documents.
+``contabilizado`` holds the status a CNJ is counted with; while a result
+is being counted the CNJ carries the ``contagem`` ID, and the solicitacao
+applies each contagem at most once. A count interrupted by an error is
+completed by the next report of the same CNJ.
+"""
+import asyncio
+import logging
+from typing import Dict, Any, Optional, List, Iterable
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from config.settings import settings
+from models.status import SolicitacaoStatus
+from utils.notifier import progress_broker, progress_update
+from workers.cnj_cache import CnjResultCache
+
+logger = logging.getLogger(__name__)
+
+# Per-CNJ statuses (portal vocabulary)
+PENDENTE = "pendente"
+EM_EXECUCAO = "em_execucao"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+
+TERMINAL_STATUSES = (CONCLUIDO, ERRO)
+
+# RPA status vocabulary → portal vocabulary
+RPA_STATUS_MAP = {
+    "pending": PENDENTE,
+    "processing": EM_EXECUCAO,
+    "completed": CONCLUIDO,
+    "failed": ERRO,
+}
+
+# Solicitacao statuses that end the workflow
+FINAL_STATUSES = (
+    SolicitacaoStatus.CONCLUIDO.value,
+    SolicitacaoStatus.ERRO.value,
+    SolicitacaoStatus.DOCUMENTOS_NAO_ENCONTRADOS.value,
+)
+
+SOLICITACAO_STATE_PROJECTION = {
+    "user_id": 1,
+    "status": 1,
+    "total_cnjs": 1,
+    "cnjs_processados": 1,
+    "cnjs_sucesso": 1,
+    "cnjs_erro": 1,
+    "updated_at": 1,
+    "concluido_em": 1,
+}
+
+INSERT_CHUNK_SIZE = 1000
+
+# Seconds between checks while another report of the same CNJ is counted
+COUNT_WAIT_SECONDS = 0.1
+
+# Marks the CNJs of an applied contagem as counted with their status
+SETTLE_COUNT = [
+    {"$set": {"contabilizado": "$status"}},
+    {"$project": {"contagem": 0, "contagem_interrompida": 0}},
+]
+
+
+def task_id(solicitacao_id: str, cnj: str) -> str:
+    """Build the composite task ID (``<solicitacao_id>_<cnj>``)"""
+    return f"{solicitacao_id}_{cnj}"
+
+
+def normalize_status(status: str) -> str:
+    """Map an RPA status to the portal vocabulary"""
+    return RPA_STATUS_MAP.get(status, status)
+
+
+def to_resultado(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a per-CNJ document to a ResultadoProcessamento dict"""
+    return {
+        "cnj": doc["cnj"],
+        "status": doc["status"],
+        "documentos_encontrados": doc.get("documentos_encontrados", 0),
+        "documentos_urls": doc.get("documentos_urls", []),
+        "erro": doc.get("erro"),
+        "processado_em": doc.get("processado_em"),
+    }
+
+
+def counter_delta(old_status: Optional[str], new_status: str) -> Dict[str, int]:
+    """
+    Compute the solicitacao counter changes for a per-CNJ status transition
+
+    Args:
+        old_status: Previous per-CNJ status (None if unknown)
+        new_status: New per-CNJ status
+
+    Returns:
+        Increments for cnjs_processados, cnjs_sucesso and cnjs_erro
+    """
+
+    def counters(status: Optional[str]) -> Dict[str, int]:
+        return {
+            "cnjs_processados": 1 if status in TERMINAL_STATUSES else 0,
+            "cnjs_sucesso": 1 if status == CONCLUIDO else 0,
+            "cnjs_erro": 1 if status == ERRO else 0,
+        }
+
+    old, new = counters(old_status), counters(new_status)
+    return {field: new[field] - old[field] for field in new}
+
+
+def final_status(solicitacao: Dict[str, Any]) -> str:
+    """
+    Final status of a solicitacao whose CNJs all have a final result
+
+    Must match ``_final_status_expr``.
+    """
+    if solicitacao["cnjs_erro"] == solicitacao["total_cnjs"]:
+        # All failed
+        return SolicitacaoStatus.ERRO.value
+    if solicitacao["cnjs_sucesso"] > 0:
+        # At least one success
+        return SolicitacaoStatus.CONCLUIDO.value
+    # No documents found
+    return SolicitacaoStatus.DOCUMENTOS_NAO_ENCONTRADOS.value
+
+
+def _final_status_expr() -> Dict[str, Any]:
+    """Aggregation expression equivalent to ``final_status``"""
+    return {
+        "$switch": {
+            "branches": [
+                {
+                    "case": {"$eq": ["$cnjs_erro", "$total_cnjs"]},
+                    "then": SolicitacaoStatus.ERRO.value,
+                },
+                {
+                    "case": {"$gt": ["$cnjs_sucesso", 0]},
+                    "then": SolicitacaoStatus.CONCLUIDO.value,
+                },
+            ],
+            "default": SolicitacaoStatus.DOCUMENTOS_NAO_ENCONTRADOS.value,
+        }
+    }
+
+
+def _result_update(
+    status: str,
+    documentos_encontrados: int,
+    documentos_urls: Optional[List[str]],
+    erro: Optional[str],
+    now: datetime,
+) -> Dict[str, Any]:
+    """Fields set on a per-CNJ document when a result is reported"""
+    update = {
+        "status": status,
+        "documentos_encontrados": documentos_encontrados,
+        "documentos_urls": documentos_urls or [],
+        "erro": erro,
+        "processado_em": now,
+        "updated_at": now,
+    }
+
+    # A final result ends the bot's lease
+    if status in TERMINAL_STATUSES:
+        update["lease_owner"] = None
+        update["lease_expira_em"] = None
+
+    return update
+
+
+class CnjTaskStore:
+    """Reads and writes per-(solicitacao, CNJ) task documents"""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.collection = db.solicitacao_cnjs
+
+    async def create_for_solicitacao(
+        self,
+        solicitacao_id: str,
+        cliente_id: str,
+        cnjs: Iterable[str],
+        created_at: datetime,
+        cliente_codigo: Optional[str] = None,
+        cached: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> int:
+        """
+        Create one task document per CNJ
+
+        CNJs with a cached result are created already concluded with that
+        result; the others are created pending. Inserts are chunked and
+        unordered; documents that already exist are left untouched, so the
+        call is safe to retry.
+
+        Args:
+            solicitacao_id: Solicitacao ID
+            cliente_id: Client ID
+            cnjs: CNJ process numbers
+            created_at: Solicitacao creation time (used for FIFO ordering)
+            cliente_codigo: Client code (used to cache results)
+            cached: Reusable results by CNJ (see ``CnjResultCache.fresh``)
+
+        Returns:
+            Number of documents inserted
+        """
+        now = datetime.utcnow()
+        cached = cached or {}
+        docs = []
+
+        for cnj in cnjs:
+            doc = {
+                "_id": task_id(solicitacao_id, cnj),
+                "solicitacao_id": solicitacao_id,
+                "cnj": cnj,
+                "cliente_id": cliente_id,
+                "cliente_codigo": cliente_codigo,
+                "status": PENDENTE,
+                "contabilizado": PENDENTE,
+                "documentos_encontrados": 0,
+                "documentos_urls": [],
+                "erro": None,
+                "processado_em": None,
+                "lease_owner": None,
+                "lease_expira_em": None,
+                "created_at": created_at,
+                "updated_at": now,
+            }
+
+            hit = cached.get(cnj)
+            if hit:
+                doc.update(
+                    status=CONCLUIDO,
+                    contabilizado=CONCLUIDO,  # Counted when the solicitacao is created
+                    documentos_encontrados=hit["documentos_encontrados"],
+                    documentos_urls=hit["documentos_urls"],
+                    processado_em=now,
+                    cache_buscado_em=hit["buscado_em"],
+                )
+
+            docs.append(doc)
+
+        inserted = 0
+        for start in range(0, len(docs), INSERT_CHUNK_SIZE):
+            chunk = docs[start:start + INSERT_CHUNK_SIZE]
+            try:
+                result = await self.collection.insert_many(chunk, ordered=False)
+                inserted += len(result.inserted_ids)
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if any(err.get("code") != 11000 for err in errors):
+                    raise
+                inserted += e.details.get("nInserted", 0)
+
+        return inserted
+
+    def _available_query(
+        self, now: datetime, cliente_codigo: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Query for tasks without a result and without a live lease"""
+        query = {
+            "status": {"$in": [PENDENTE, EM_EXECUCAO]},
+            "lease_expira_em": {"$not": {"$gt": now}},
+        }
+
+        if cliente_codigo:
+            query["cliente_codigo"] = cliente_codigo
+
+        return query
+
+    async def pending(
+        self, limit: int, cliente_codigo: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        List tasks available to bots, oldest solicitacao first
+
+        Args:
+            limit: Maximum number of tasks
+            cliente_codigo: Filter by client code (optional)
+
+        Returns:
+            Task documents
+        """
+        cursor = (
+            self.collection.find(self._available_query(datetime.utcnow(), cliente_codigo))
+            .sort("created_at", 1)  # FIFO
+            .limit(limit)
+        )
+        return await cursor.to_list(length=limit)
+
+    async def claim(
+        self,
+        bot_id: str,
+        limit: int,
+        expira_em: datetime,
+        cliente_codigo: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Atomically lease up to ``limit`` available tasks to a bot
+
+        Args:
+            bot_id: Bot identifier
+            limit: Maximum number of tasks to lease
+            expira_em: Lease expiration
+            cliente_codigo: Filter by client code (optional)
+
+        Returns:
+            Leased task documents
+        """
+        now = datetime.utcnow()
+        claimed = []
+
+        while len(claimed) < limit:
+            doc = await self.collection.find_one_and_update(
+                self._available_query(now, cliente_codigo),
+                {
+                    "$set": {
+                        "lease_owner": bot_id,
+                        "lease_expira_em": expira_em,
+                        "updated_at": now,
+                    }
+                },
+                sort=[("created_at", 1)],
+                return_document=ReturnDocument.AFTER,
+            )
+
+            if not doc:
+                break
+
+            claimed.append(doc)
+
+        return claimed
+
+    async def renew(
+        self, bot_id: str, task_ids: List[str], expira_em: datetime
+    ) -> List[str]:
+        """
+        Extend the live leases a bot holds
+
+        Returns:
+            IDs of the renewed tasks
+        """
+        now = datetime.utcnow()
+        await self.collection.update_many(
+            {
+                "_id": {"$in": task_ids},
+                "lease_owner": bot_id,
+                "lease_expira_em": {"$gt": now},
+            },
+            {"$set": {"lease_expira_em": expira_em}},
+        )
+
+        cursor = self.collection.find(
+            {
+                "_id": {"$in": task_ids},
+                "lease_owner": bot_id,
+                "lease_expira_em": expira_em,
+            },
+            {"_id": 1},
+        )
+        return [doc["_id"] async for doc in cursor]
+
+    async def release(self, bot_id: str, task_ids: List[str]) -> int:
+        """
+        Drop the leases a bot holds so the tasks can be claimed again
+
+        Returns:
+            Number of released leases
+        """
+        result = await self.collection.update_many(
+            {"_id": {"$in": task_ids}, "lease_owner": bot_id},
+            {"$set": {"lease_owner": None, "lease_expira_em": None}},
+        )
+        return result.modified_count
+
+    async def hold(self, solicitacao_id: str, cnj: str, expira_em: datetime) -> bool:
+        """
+        Lease a task to an anonymous bot unless it is already leased
+
+        Used when a bot starts processing without claiming first.
+        """
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {
+                "_id": task_id(solicitacao_id, cnj),
+                "lease_expira_em": {"$not": {"$gt": now}},
+            },
+            {"$set": {"lease_owner": "rpa", "lease_expira_em": expira_em}},
+        )
+        return result.modified_count > 0
+
+    async def record_result(
+        self,
+        solicitacao_id: str,
+        cnj: str,
+        status: str,
+        documentos_encontrados: int = 0,
+        documentos_urls: List[str] = None,
+        erro: str = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Store the result for a CNJ and update the solicitacao counters
+
+        Counters change by the difference between the counted and the new
+        status, so re-reporting a result never counts a CNJ twice. Reports
+        of the same CNJ are counted one at a time, and retrying a report
+        that failed completes its count (see ``_count``).
+
+        Args:
+            solicitacao_id: Solicitacao ID
+            cnj: CNJ process number
+            status: Result status (RPA or portal vocabulary)
+            documentos_encontrados: Number of documents found
+            documentos_urls: Document URLs
+            erro: Error message if failed
+
+        Returns:
+            Previous and new CNJ status plus the solicitacao state after the
+            update (see ``apply_counters``), or None if the CNJ is unknown
+        """
+        status = normalize_status(status)
+        now = datetime.utcnow()
+        update = _result_update(status, documentos_encontrados, documentos_urls, erro, now)
+        contagem = ObjectId()
+
+        while True:
+            previous = await self.collection.find_one_and_update(
+                {"_id": task_id(solicitacao_id, cnj), "contagem": None},
+                [{"$set": dict(
+                    {field: {"$literal": value} for field, value in update.items()},
+                    # Documents written before contabilizado were counted
+                    # with their status
+                    contabilizado={"$ifNull": ["$contabilizado", "$status"]},
+                    contagem=contagem,
+                )}],
+                projection={"status": 1, "contabilizado": 1, "cliente_codigo": 1},
+                return_document=ReturnDocument.BEFORE,
+            )
+
+            if previous:
+                break
+
+            if not await self._wait_for_count(task_id(solicitacao_id, cnj)):
+                return None
+
+        if status == CONCLUIDO and previous.get("cliente_codigo"):
+            await CnjResultCache(self.db).store(
+                previous["cliente_codigo"],
+                cnj,
+                documentos_encontrados,
+                documentos_urls,
+                solicitacao_id=solicitacao_id,
+                buscado_em=now,
+            )
+
+        delta = counter_delta(previous.get("contabilizado", previous["status"]), status)
+        solicitacao = await self._count(solicitacao_id, contagem, delta, now)
+
+        return {
+            "status_anterior": previous["status"],
+            "status": status,
+            "solicitacao": solicitacao,
+        }
+
+    async def record_results(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Store many CNJ results with one bulk write per solicitacao
+
+        Every write is conditioned on the CNJ status read just before and on
+        the CNJ having no count in progress, so the counter delta computed
+        from that read is exact. Items whose CNJ changed in between are
+        retried one by one through ``record_result``.
+
+        Args:
+            items: Dicts with solicitacao_id, cnj, status and optionally
+                documentos_encontrados, documentos_urls and erro
+
+        Returns:
+            One outcome per item, in order, with ``success`` and ``error``
+        """
+        now = datetime.utcnow()
+
+        outcomes = [
+            {
+                "id": task_id(item["solicitacao_id"], item["cnj"]),
+                "solicitacao_id": item["solicitacao_id"],
+                "cnj": item["cnj"],
+                "status": normalize_status(item["status"]),
+                "success": False,
+                "error": None,
+            }
+            for item in items
+        ]
+
+        # The last result reported for a CNJ wins
+        latest = {}
+        for index, outcome in enumerate(outcomes):
+            if outcome["id"] in latest:
+                outcomes[latest[outcome["id"]]]["error"] = "Superseded by a later item"
+            latest[outcome["id"]] = index
+
+        cursor = self.collection.find(
+            {"_id": {"$in": list(latest)}}, {"status": 1, "cliente_codigo": 1}
+        )
+        previous, codigos = {}, {}
+        async for doc in cursor:
+            previous[doc["_id"]] = doc["status"]
+            codigos[doc["_id"]] = doc.get("cliente_codigo")
+
+        groups: Dict[str, List[int]] = {}
+        for tid, index in latest.items():
+            if tid not in previous:
+                outcomes[index]["error"] = "CNJ not found in this solicitacao"
+                continue
+            groups.setdefault(outcomes[index]["solicitacao_id"], []).append(index)
+
+        for solicitacao_id, indexes in groups.items():
+            contagem = ObjectId()
+            operations = [
+                UpdateOne(
+                    {
+                        "_id": outcomes[i]["id"],
+                        "status": previous[outcomes[i]["id"]],
+                        "contagem": None,
+                    },
+                    {
+                        "$set": dict(
+                            _result_update(
+                                outcomes[i]["status"],
+                                items[i].get("documentos_encontrados", 0),
+                                items[i].get("documentos_urls"),
+                                items[i].get("erro"),
+                                now,
+                            ),
+                            # Without a count in progress a CNJ is counted
+                            # with its status
+                            contabilizado=previous[outcomes[i]["id"]],
+                            contagem=contagem,
+                        ),
+                    },
+                )
+                for i in indexes
+            ]
+
+            result = await self.collection.bulk_write(operations, ordered=False)
+            applied, retry = indexes, []
+
+            if result.matched_count < len(operations):
+                # Someone else changed some of these CNJs; the writes that
+                # landed carry this batch's contagem until it is counted
+                cursor = self.collection.find(
+                    {
+                        "_id": {"$in": [outcomes[i]["id"] for i in indexes]},
+                        "contagem": contagem,
+                    },
+                    {"_id": 1},
+                )
+                written = {doc["_id"] async for doc in cursor}
+                applied = [i for i in indexes if outcomes[i]["id"] in written]
+                retry = [i for i in indexes if outcomes[i]["id"] not in written]
+
+            await CnjResultCache(self.db).store_many([
+                {
+                    "cliente_codigo": codigos[outcomes[i]["id"]],
+                    "cnj": outcomes[i]["cnj"],
+                    "documentos_encontrados": items[i].get("documentos_encontrados", 0),
+                    "documentos_urls": items[i].get("documentos_urls"),
+                    "solicitacao_id": solicitacao_id,
+                    "buscado_em": now,
+                }
+                for i in applied
+                if outcomes[i]["status"] == CONCLUIDO and codigos[outcomes[i]["id"]]
+            ])
+
+            if applied:
+                delta = {"cnjs_processados": 0, "cnjs_sucesso": 0, "cnjs_erro": 0}
+                for i in applied:
+                    outcomes[i]["success"] = True
+                    for field, increment in counter_delta(
+                        previous[outcomes[i]["id"]], outcomes[i]["status"]
+                    ).items():
+                        delta[field] += increment
+
+                solicitacao = await self._count(solicitacao_id, contagem, delta, now)
+
+                if solicitacao and solicitacao["finalizada"]:
+                    logger.info(
+                        f"Solicitacao {solicitacao_id} completed with status: "
+                        f"{solicitacao['finalizada']}"
+                    )
+
+            # Counted after this batch's count, so no count is held while
+            # waiting for another one
+            for i in retry:
+                retried = await self.record_result(
+                    solicitacao_id=solicitacao_id,
+                    cnj=outcomes[i]["cnj"],
+                    status=outcomes[i]["status"],
+                    documentos_encontrados=items[i].get("documentos_encontrados", 0),
+                    documentos_urls=items[i].get("documentos_urls"),
+                    erro=items[i].get("erro"),
+                )
+                outcomes[i]["success"] = retried is not None
+                if retried is None:
+                    outcomes[i]["error"] = "CNJ not found in this solicitacao"
+
+        return outcomes
+
+    async def _count(
+        self,
+        solicitacao_id: str,
+        contagem: ObjectId,
+        delta: Dict[str, int],
+        now: datetime,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Apply a contagem to the solicitacao, then mark its CNJs as counted
+
+        If this fails the contagem is flagged as interrupted, so the next
+        report of one of its CNJs completes it right away (see
+        ``_wait_for_count``).
+
+        Args:
+            solicitacao_id: Solicitacao ID
+            contagem: ID stored on the CNJs written by the report
+            delta: Counter increments of the report
+            now: Update timestamp
+
+        Returns:
+            Solicitacao state after the update (see ``apply_counters``)
+        """
+        # A zero delta can be applied any number of times
+        tracked = contagem if any(delta.values()) else None
+
+        try:
+            solicitacao = await self.apply_counters(
+                solicitacao_id, delta, now, contagem=tracked
+            )
+            await self.collection.update_many({"contagem": contagem}, SETTLE_COUNT)
+        except Exception:
+            try:
+                await self.collection.update_many(
+                    {"contagem": contagem}, {"$set": {"contagem_interrompida": True}}
+                )
+            except PyMongoError as e:
+                logger.warning(f"Could not flag interrupted contagem {contagem}: {e}")
+            raise
+
+        if tracked:
+            # Only the reporter forgets an applied contagem: one completed by
+            # another report stays, so a late duplicate cannot apply it again
+            try:
+                await self.db.solicitacoes.update_one(
+                    {"_id": ObjectId(solicitacao_id)}, {"$pull": {"contagens": contagem}}
+                )
+            except PyMongoError as e:
+                logger.warning(f"Could not clear contagem {contagem}: {e}")
+
+        return solicitacao
+
+    async def _wait_for_count(self, tid: str) -> bool:
+        """
+        Let the count in progress on a CNJ finish before writing it again
+
+        A count flagged as interrupted, or older than
+        rpa_result_settle_seconds, lost its reporter and is completed here.
+        Otherwise this waits a moment for the reporter to finish it.
+
+        Args:
+            tid: Composite task ID
+
+        Returns:
+            False if the CNJ does not exist
+        """
+        blocked = await self.collection.find_one(
+            {"_id": tid}, {"solicitacao_id": 1, "contagem": 1, "contagem_interrompida": 1}
+        )
+
+        if not blocked:
+            return False
+
+        contagem = blocked.get("contagem")
+        if contagem is None:
+            return True
+
+        age = datetime.now(timezone.utc) - contagem.generation_time
+        if (
+            not blocked.get("contagem_interrompida")
+            and age < timedelta(seconds=settings.rpa_result_settle_seconds)
+        ):
+            await asyncio.sleep(COUNT_WAIT_SECONDS)
+            return True
+
+        delta = {"cnjs_processados": 0, "cnjs_sucesso": 0, "cnjs_erro": 0}
+        async for doc in self.collection.find(
+            {"contagem": contagem}, {"status": 1, "contabilizado": 1}
+        ):
+            for field, increment in counter_delta(doc["contabilizado"], doc["status"]).items():
+                delta[field] += increment
+
+        logger.warning(
+            f"Completing interrupted contagem {contagem} of solicitacao "
+            f"{blocked['solicitacao_id']}"
+        )
+        await self.apply_counters(blocked["solicitacao_id"], delta, contagem=contagem)
+        await self.collection.update_many({"contagem": contagem}, SETTLE_COUNT)
+
+        return True
+
+    async def apply_counters(
+        self,
+        solicitacao_id: str,
+        delta: Dict[str, int],
+        now: datetime = None,
+        contagem: Optional[ObjectId] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Apply counter increments and finalize the solicitacao in one update
+
+        The update pipeline increments the counters and, when every CNJ has
+        a final result, sets the final status and ``concluido_em`` in the
+        same atomic operation. Concurrent reporters therefore never both
+        (or neither) finalize the solicitacao. The pre-update document is
+        returned by the server so exactly one caller observes the transition.
+
+        Args:
+            solicitacao_id: Solicitacao ID
+            delta: Increments for cnjs_processados, cnjs_sucesso and cnjs_erro
+            now: Update timestamp
+            contagem: Apply the increments only if this contagem was not
+                applied yet (it is recorded in ``contagens``)
+
+        Returns:
+            Solicitacao state after the update (with ``finalizada`` set to the
+            final status if this update finalized it), or None if not found
+        """
+        now = now or datetime.utcnow()
+        query = {"_id": ObjectId(solicitacao_id)}
+        increments = {
+            field: {"$add": [{"$ifNull": [f"${field}", 0]}, increment]}
+            for field, increment in delta.items()
+        }
+
+        if contagem:
+            query["contagens"] = {"$ne": contagem}
+            increments["contagens"] = {
+                "$concatArrays": [{"$ifNull": ["$contagens", []]}, [contagem]]
+            }
+
+        before = await self.db.solicitacoes.find_one_and_update(
+            query,
+            [
+                {"$set": increments},
+                {"$set": {
+                    "_finaliza": {"$cond": [
+                        {"$in": ["$status", list(FINAL_STATUSES)]},
+                        False,
+                        {"$gte": ["$cnjs_processados", "$total_cnjs"]},
+                    ]},
+                }},
+                {"$set": {
+                    "status": {"$cond": ["$_finaliza", _final_status_expr(), "$status"]},
+                    "concluido_em": {"$cond": ["$_finaliza", now, "$concluido_em"]},
+                    # Never moves back past a concurrent writer's timestamp
+                    "updated_at": {"$max": ["$updated_at", now]},
+                }},
+                {"$project": {"_finaliza": 0}},
+            ],
+            projection=SOLICITACAO_STATE_PROJECTION,
+            return_document=ReturnDocument.BEFORE,
+        )
+
+        if not before and contagem:
+            # Already applied by an earlier attempt
+            current = await self.db.solicitacoes.find_one(
+                {"_id": ObjectId(solicitacao_id)}, SOLICITACAO_STATE_PROJECTION
+            )
+            return current and dict(current, finalizada=None)
+
+        if not before:
+            return None
+
+        updated_at = max(before.get("updated_at") or now, now)
+        after = dict(before, updated_at=updated_at, finalizada=None)
+        for field, increment in delta.items():
+            after[field] = before.get(field, 0) + increment
+
+        if (
+            before["status"] not in FINAL_STATUSES
+            and after["cnjs_processados"] >= after["total_cnjs"]
+        ):
+            after["status"] = final_status(after)
+            after["concluido_em"] = now
+            after["finalizada"] = after["status"]
+
+        progress_broker.publish_local(
+            after.get("user_id"), progress_update(solicitacao_id, after)
+        )
+
+        return after
+
+    async def get(self, solicitacao_id: str, cnj: str) -> Optional[Dict[str, Any]]:
+        """Get the task document for a CNJ of a solicitacao"""
+        return await self.collection.find_one({"_id": task_id(solicitacao_id, cnj)})
+
+    async def pending_cnjs(self, solicitacao_id: str) -> List[str]:
+        """
+        List the CNJs of a solicitacao that still need a bot
+
+        CNJs answered from the result cache are created concluded and are
+        not returned.
+
+        Args:
+            solicitacao_id: Solicitacao ID
+
+        Returns:
+            Pending CNJ process numbers, in CNJ order
+        """
+        cursor = self.collection.find(
+            {"solicitacao_id": solicitacao_id, "status": PENDENTE}, {"cnj": 1}
+        ).sort("cnj", 1)
+        return [doc["cnj"] async for doc in cursor]
+
+    async def cnjs(self, solicitacao_id: str) -> List[str]:
+        """
+        List every CNJ of a solicitacao, in CNJ order
+
+        The list is not stored on the solicitacao document, which would
+        exceed the 16MB document limit for very large uploads.
+
+        Args:
+            solicitacao_id: Solicitacao ID
+
+        Returns:
+            CNJ process numbers
+        """
+        cursor = self.collection.find(
+            {"solicitacao_id": solicitacao_id}, {"_id": 0, "cnj": 1}
+        ).sort("cnj", 1)
+        return [doc["cnj"] async for doc in cursor]
+
+    async def cnjs_by_solicitacao(self, solicitacao_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        List the CNJs of several solicitacoes in one query
+
+        Returns:
+            Mapping of solicitacao ID to its CNJs, in CNJ order
+        """
+        grouped = {solicitacao_id: [] for solicitacao_id in solicitacao_ids}
+        cursor = self.collection.find(
+            {"solicitacao_id": {"$in": solicitacao_ids}},
+            {"_id": 0, "solicitacao_id": 1, "cnj": 1},
+        ).sort([("solicitacao_id", 1), ("cnj", 1)])
+
+        async for doc in cursor:
+            grouped[doc["solicitacao_id"]].append(doc["cnj"])
+
+        return grouped
+
+    async def resultados(self, solicitacao_id: str) -> List[Dict[str, Any]]:
+        """
+        Get the results reported so far for a solicitacao
+
+        Returns:
+            List of ResultadoProcessamento dicts
+        """
+        cursor = self.collection.find(
+            {"solicitacao_id": solicitacao_id, "status": {"$ne": PENDENTE}}
+        ).sort("processado_em", 1)
+        return [to_resultado(doc) async for doc in cursor]
+
+    async def resultados_page(
+        self,
+        solicitacao_id: str,
+        status: Optional[str] = None,
+        after: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 50,
+    ) -> Dict[str, Any]:
+        """
+        Get one page of the results of a solicitacao, ordered by CNJ
+
+        Served by the (solicitacao_id, status, cnj) index, so only the
+        requested page is read however large the solicitacao is.
+
+        Args:
+            solicitacao_id: Solicitacao ID
+            status: Only results with this status (optional)
+            after: Return results after this CNJ (keyset pagination)
+            skip: Number of results to skip (ignored when ``after`` is given)
+            limit: Maximum number of results to return
+
+        Returns:
+            Dict with the ResultadoProcessamento dicts of the page, the total
+            number of matching results and the CNJ to continue after (None on
+            the last page)
+        """
+        query = {
+            "solicitacao_id": solicitacao_id,
+            "status": status or {"$in": [EM_EXECUCAO, CONCLUIDO, ERRO]},
+        }
+        total = await self.collection.count_documents(query)
+
+        if after:
+            query["cnj"] = {"$gt": after}
+
+        cursor = self.collection.find(query).sort("cnj", 1)
+        if not after:
+            cursor = cursor.skip(skip)
+
+        docs = await cursor.limit(limit).to_list(length=limit)
+
+        return {
+            "resultados": [to_resultado(doc) for doc in docs],
+            "total": total,
+            "next_cursor": docs[-1]["cnj"] if len(docs) == limit else None,
+        }
+
+    async def resultados_by_solicitacao(
+        self, solicitacao_ids: List[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the results of several solicitacoes in one query
+
+        Returns:
+            Mapping of solicitacao ID to its ResultadoProcessamento dicts
+        """
+        grouped = {solicitacao_id: [] for solicitacao_id in solicitacao_ids}
+        cursor = self.collection.find(
+            {"solicitacao_id": {"$in": solicitacao_ids}, "status": {"$ne": PENDENTE}}
+        ).sort("processado_em", 1)
+
+        async for doc in cursor:
+            grouped[doc["solicitacao_id"]].append(to_resultado(doc))
+
+        return grouped
+
+    async def recount(self, solicitacao_id: str) -> Dict[str, int]:
+        """
+        Recompute the solicitacao counters from its task documents
+
+        Returns:
+            The stored counters
+        """
+        pipeline = [
+            {"$match": {"solicitacao_id": solicitacao_id}},
+            {"$group": {
+                "_id": None,
+                "cnjs_processados": {
+                    "$sum": {"$cond": [{"$in": ["$status", list(TERMINAL_STATUSES)]}, 1, 0]}
+                },
+                "cnjs_sucesso": {"$sum": {"$cond": [{"$eq": ["$status", CONCLUIDO]}, 1, 0]}},
+                "cnjs_erro": {"$sum": {"$cond": [{"$eq": ["$status", ERRO]}, 1, 0]}},
+            }},
+        ]
+
+        result = await self.collection.aggregate(pipeline).to_list(length=1)
+        counters = {
+            "cnjs_processados": result[0]["cnjs_processados"] if result else 0,
+            "cnjs_sucesso": result[0]["cnjs_sucesso"] if result else 0,
+            "cnjs_erro": result[0]["cnjs_erro"] if result else 0,
+        }
+
+        await self.db.solicitacoes.update_one(
+            {"_id": ObjectId(solicitacao_id)},
+            {"$set": counters, "$max": {"updated_at": datetime.utcnow()}},
+        )
+
+        return counters
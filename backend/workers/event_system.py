@@ -4,9 +4,11 @@ Based on MongoDB event-driven architecture from RPA project
 """
 import logging
 from typing import Dict, Any, Optional, List
-from datetime import datetime
+from datetime import datetime, timedelta
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 from models.status import EventoTipo, SolicitacaoStatus
+from workers.cnj_tasks import CnjTaskStore
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +42,8 @@ class EventPublisher:
                 "solicitacao_id": solicitacao_id,
                 "metadata": metadata or {},
                 "processado": False,
+                "lease_owner": None,
+                "lease_expira_em": None,
                 "created_at": datetime.utcnow(),
                 "processed_at": None,
             }
@@ -87,8 +91,86 @@ class EventPublisher:
             logger.error(f"Error getting pending events: {e}")
             return []
 
+    async def claim_event(
+        self,
+        owner: str,
+        lease_seconds: int,
+        tipo_evento: Optional[EventoTipo] = None,
+        event_id: Any = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Atomically lease the oldest pending event to a worker
+
+        Events whose lease expired (their worker died) are claimed again,
+        so concurrent worker replicas never process the same event at the
+        same time.
+
+        Args:
+            owner: Worker identifier
+            lease_seconds: Lease duration (renew with ``renew_event_lease``)
+            tipo_evento: Filter by event type (optional)
+            event_id: Claim this event only (optional)
+
+        Returns:
+            Claimed event, or None if nothing is available
+        """
+        now = datetime.utcnow()
+        query = {
+            "processado": False,
+            "lease_expira_em": {"$not": {"$gt": now}},
+        }
+
+        if tipo_evento:
+            query["tipo_evento"] = tipo_evento.value
+
+        if event_id is not None:
+            query["_id"] = event_id
+
+        return await self.db.eventos.find_one_and_update(
+            query,
+            {
+                "$set": {
+                    "lease_owner": owner,
+                    "lease_expira_em": now + timedelta(seconds=lease_seconds),
+                },
+                "$inc": {"tentativas": 1},
+            },
+            sort=[("created_at", 1)],  # FIFO processing
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def renew_event_lease(
+        self, event_id: Any, owner: str, lease_seconds: int
+    ) -> bool:
+        """
+        Extend a worker's live lease on an event (heartbeat)
+
+        Args:
+            event_id: Event document ID
+            owner: Worker identifier
+            lease_seconds: New lease duration from now
+
+        Returns:
+            True if the worker still holds the lease
+        """
+        now = datetime.utcnow()
+        result = await self.db.eventos.update_one(
+            {
+                "_id": event_id,
+                "processado": False,
+                "lease_owner": owner,
+                "lease_expira_em": {"$gt": now},
+            },
+            {"$set": {"lease_expira_em": now + timedelta(seconds=lease_seconds)}},
+        )
+        return result.matched_count > 0
+
     async def mark_event_processed(
-        self, event_id: Any, success: bool = True, error: str = None
+        self,
+        event_id: Any,
+        success: bool = True,
+        error: str = None,
+        owner: str = None,
     ) -> bool:
         """
         Mark an event as processed
@@ -97,6 +179,7 @@ class EventPublisher:
             event_id: Event document ID
             success: Whether processing was successful
             error: Error message if failed
+            owner: Only mark it if this worker holds the lease (optional)
 
         Returns:
             True if marked successfully
@@ -106,14 +189,17 @@ class EventPublisher:
                 "processado": True,
                 "processed_at": datetime.utcnow(),
                 "success": success,
+                "lease_expira_em": None,
             }
 
             if error:
                 update_data["error"] = error
 
-            result = await self.db.eventos.update_one(
-                {"_id": event_id}, {"$set": update_data}
-            )
+            query = {"_id": event_id}
+            if owner:
+                query["lease_owner"] = owner
+
+            result = await self.db.eventos.update_one(query, {"$set": update_data})
 
             return result.modified_count > 0
 
@@ -144,10 +230,8 @@ class SolicitacaoUpdater:
         try:
             from bson import ObjectId
 
-            update_data = {
-                "status": new_status.value,
-                "updated_at": datetime.utcnow(),
-            }
+            now = datetime.utcnow()
+            update_data = {"status": new_status.value}
 
             # Set iniciado_em when starting
             if new_status == SolicitacaoStatus.EM_EXECUCAO:
@@ -161,8 +245,10 @@ class SolicitacaoUpdater:
             ]:
                 update_data["concluido_em"] = datetime.utcnow()
 
+            # updated_at never moves back past a concurrent writer's timestamp
             result = await self.db.solicitacoes.update_one(
-                {"_id": ObjectId(solicitacao_id)}, {"$set": update_data}
+                {"_id": ObjectId(solicitacao_id)},
+                {"$set": update_data, "$max": {"updated_at": now}},
             )
 
             logger.info(f"Solicitacao {solicitacao_id} status updated to {new_status.value}")
@@ -179,10 +265,17 @@ class SolicitacaoUpdater:
         status: str,
         documentos_urls: List[str] = None,
         erro: str = None,
-    ) -> bool:
+    ) -> Optional[Dict[str, Any]]:
         """
         Add processing result for a CNJ
 
+        The result replaces the CNJ's previous one and the counters change
+        by the difference between the two statuses, in one atomic update
+        that also finalizes the solicitacao (see
+        ``CnjTaskStore.record_result``). Reporting the same or an
+        intermediate status again never counts the CNJ twice, and a report
+        whose counter update failed is completed by the next one.
+
         Args:
             solicitacao_id: Request ID
             cnj: CNJ process number
@@ -191,40 +284,29 @@ class SolicitacaoUpdater:
             erro: Error message if failed
 
         Returns:
-            True if added successfully
+            Previous and new status plus the solicitacao state, or None if
+            the CNJ is unknown or the update failed
         """
         try:
-            from bson import ObjectId
-
-            resultado = {
-                "cnj": cnj,
-                "status": status,
-                "documentos_encontrados": len(documentos_urls or []),
-                "documentos_urls": documentos_urls or [],
-                "erro": erro,
-                "processado_em": datetime.utcnow(),
-            }
-
-            # Add result to array
-            await self.db.solicitacoes.update_one(
-                {"_id": ObjectId(solicitacao_id)},
-                {
-                    "$push": {"resultados": resultado},
-                    "$inc": {
-                        "cnjs_processados": 1,
-                        "cnjs_sucesso": 1 if status == "concluido" else 0,
-                        "cnjs_erro": 1 if status == "erro" else 0,
-                    },
-                    "$set": {"updated_at": datetime.utcnow()},
-                },
+            result = await CnjTaskStore(self.db).record_result(
+                solicitacao_id=solicitacao_id,
+                cnj=cnj,
+                status=status,
+                documentos_encontrados=len(documentos_urls or []),
+                documentos_urls=documentos_urls,
+                erro=erro,
             )
 
+            if result is None:
+                logger.warning(f"CNJ {cnj} not found in solicitacao {solicitacao_id}")
+                return None
+
             logger.info(f"Result added for CNJ {cnj} in solicitacao {solicitacao_id}")
-            return True
+            return result
 
         except Exception as e:
             logger.error(f"Error adding CNJ result: {e}")
-            return False
+            return None
 
     async def get_solicitacao(self, solicitacao_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -4,17 +4,46 @@ Listens for new solicitacoes and creates tasks in the RPA format
 """
 import logging
 import asyncio
-from datetime import datetime
-from typing import Dict, Any
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
 
+from config.settings import settings
 from database import db_manager
 from models.status import EventoTipo, SolicitacaoStatus
+from utils.clientes import cliente_registry
+from utils.pagination import after_cursor, encode_cursor
+from workers.cnj_tasks import CnjTaskStore, PENDENTE, RPA_STATUS_MAP
 from workers.event_system import EventPublisher, SolicitacaoUpdater
+from workers.worker_state import WorkerState
 
 logger = logging.getLogger(__name__)
 
+# Checkpoint document of the converter in worker_state
+CONVERTER_STATE = "solicitacao_to_task_converter"
+
+# New NOVA_SOLICITACAO events
+EVENT_PIPELINE = [
+    {"$match": {
+        "operationType": "insert",
+        "fullDocument.tipo_evento": EventoTipo.NOVA_SOLICITACAO.value,
+    }},
+]
+
+# Resume token no longer in the oplog (or otherwise unusable)
+STALE_RESUME_TOKEN_CODES = (260, 280, 286)
+
+# RPA tasks inserted per insert_many
+TASK_INSERT_CHUNK_SIZE = 1000
+
+# Checkpoint document of the task monitor in worker_state
+MONITOR_STATE = "task_status_monitor"
+
 
 class SolicitacaoToTaskConverter:
     """
@@ -25,43 +54,169 @@ class SolicitacaoToTaskConverter:
         self.db = db
         self.event_publisher = EventPublisher(db)
         self.solicitacao_updater = SolicitacaoUpdater(db)
+        self.cnj_store = CnjTaskStore(db)
+        self.worker_state = WorkerState(db)
         self.is_running = False
 
+        # Lease owner identity (unique per process, readable in eventos)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
     async def start_monitoring(self):
-        """Monitor for new solicitacoes and create RPA tasks"""
+        """
+        Monitor for new solicitacoes and create RPA tasks
+
+        New events are consumed from a change stream on ``eventos``; its
+        resume token is saved after every event, so a restarted worker
+        continues where it stopped. Where change streams are unavailable
+        (standalone servers) the worker polls adaptively and retries the
+        stream every converter_stream_retry_seconds.
+        """
         logger.info("🤖 Starting Solicitacao to Task converter...")
         self.is_running = True
 
         while self.is_running:
             try:
-                # Get pending events
-                events = await self.event_publisher.get_pending_events(
-                    tipo_evento=EventoTipo.NOVA_SOLICITACAO,
-                    limit=10
-                )
+                if settings.converter_change_stream:
+                    await self._watch_events()
+                else:
+                    await self._poll_events()
 
-                for event in events:
-                    try:
-                        await self._process_solicitacao_event(event)
-                        await self.event_publisher.mark_event_processed(
-                            event["_id"],
-                            success=True
-                        )
-                    except Exception as e:
-                        logger.error(f"Error processing event {event['_id']}: {e}")
-                        await self.event_publisher.mark_event_processed(
-                            event["_id"],
-                            success=False,
-                            error=str(e)
-                        )
-
-                # Sleep before next poll
-                await asyncio.sleep(5)
+            except PyMongoError as e:
+                logger.warning(f"⚠️ Event change stream unavailable, polling instead: {e}")
+                await self._poll_events(settings.converter_stream_retry_seconds)
 
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
                 await asyncio.sleep(10)
 
+    async def _watch_events(self):
+        """Process events from the change stream until stopped"""
+        state = await self.worker_state.get(CONVERTER_STATE)
+        resume_token = state.get("resume_token")
+
+        try:
+            async with self.db.eventos.watch(
+                EVENT_PIPELINE,
+                resume_after=resume_token,
+                max_await_time_ms=1000,
+            ) as stream:
+                logger.info("📡 Watching events (resumed)" if resume_token else "📡 Watching events")
+
+                loop = asyncio.get_running_loop()
+                next_sweep = 0
+
+                while self.is_running:
+                    # Catch up with events published while no stream was open
+                    # and, periodically, with events whose worker died
+                    if loop.time() >= next_sweep:
+                        await self._process_pending()
+                        next_sweep = loop.time() + settings.event_lease_seconds
+
+                    change = await stream.try_next()
+                    if change is None:
+                        continue
+
+                    # Another replica (or the catch-up) may have claimed it
+                    event = await self.event_publisher.claim_event(
+                        self.owner,
+                        settings.event_lease_seconds,
+                        event_id=change["documentKey"]["_id"],
+                    )
+                    if event:
+                        await self._handle_event(event)
+
+                    await self.worker_state.save(
+                        CONVERTER_STATE, resume_token=stream.resume_token
+                    )
+
+        except OperationFailure as e:
+            if not resume_token or e.code not in STALE_RESUME_TOKEN_CODES:
+                raise
+
+            # Pending events are caught up when the stream is reopened
+            logger.warning(f"⚠️ Resume token expired, restarting event stream: {e}")
+            await self.worker_state.save(CONVERTER_STATE, resume_token=None)
+
+    async def _poll_events(self, duration: float = None):
+        """
+        Poll for events, quickly while busy and backing off while idle
+
+        Args:
+            duration: Seconds to poll for (until stopped if None)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration if duration else None
+        interval = settings.converter_poll_min_seconds
+
+        while self.is_running and (deadline is None or loop.time() < deadline):
+            if await self._process_pending():
+                interval = settings.converter_poll_min_seconds
+            else:
+                interval = min(interval * 2, settings.converter_poll_max_seconds)
+
+            await asyncio.sleep(interval)
+
+    async def _process_pending(self) -> int:
+        """
+        Claim and process pending events until none is available
+
+        Includes events whose lease expired because their worker died.
+        Stops after converter_batch_size events so the caller can check
+        its stream in between.
+
+        Returns:
+            Number of events processed
+        """
+        processed = 0
+
+        while self.is_running and processed < settings.converter_batch_size:
+            event = await self.event_publisher.claim_event(
+                self.owner,
+                settings.event_lease_seconds,
+                tipo_evento=EventoTipo.NOVA_SOLICITACAO,
+            )
+
+            if not event:
+                break
+
+            await self._handle_event(event)
+            processed += 1
+
+        return processed
+
+    async def _keep_lease(self, event_id: Any):
+        """Renew the lease on an event until cancelled (heartbeat)"""
+        while True:
+            await asyncio.sleep(settings.event_lease_seconds / 3)
+            if not await self.event_publisher.renew_event_lease(
+                event_id, self.owner, settings.event_lease_seconds
+            ):
+                logger.warning(f"⚠️ Lost the lease on event {event_id}")
+                return
+
+    async def _handle_event(self, event: Dict[str, Any]):
+        """Process one claimed event and mark it as processed"""
+        heartbeat = asyncio.create_task(self._keep_lease(event["_id"]))
+
+        try:
+            await self._process_solicitacao_event(event)
+            success, error = True, None
+        except Exception as e:
+            logger.error(f"Error processing event {event['_id']}: {e}")
+            success, error = False, str(e)
+        finally:
+            heartbeat.cancel()
+
+        marked = await self.event_publisher.mark_event_processed(
+            event["_id"],
+            success=success,
+            error=error,
+            owner=self.owner,
+        )
+
+        if not marked:
+            logger.warning(f"⚠️ Event {event['_id']} was reclaimed by another worker")
+
     async def stop_monitoring(self):
         """Stop monitoring"""
         logger.info("🛑 Stopping Solicitacao to Task converter...")
@@ -87,73 +242,74 @@ class SolicitacaoToTaskConverter:
             return
 
         # Get client info
-        cliente = await self.db.clientes.find_one(
-            {"_id": ObjectId(solicitacao["cliente_id"])}
-        )
+        cliente = await cliente_registry.get_by_id(self.db, solicitacao["cliente_id"])
 
         if not cliente:
             logger.error(f"Client {solicitacao['cliente_id']} not found")
             return
 
+        # CNJs answered from the result cache need no bot
+        cnjs = await self.cnj_store.pending_cnjs(solicitacao_id)
+
+        if not cnjs:
+            logger.info(f"♻️ All CNJs of solicitacao {solicitacao_id} answered from cache")
+            return
+
         # Update solicitacao status to EM_EXECUCAO
         await self.solicitacao_updater.update_status(
             solicitacao_id,
             SolicitacaoStatus.EM_EXECUCAO
         )
 
-        # Create RPA tasks for each CNJ
-        tasks_created = []
-        for cnj in solicitacao["cnjs"]:
-            task_doc = await self._create_rpa_task(
-                cnj=cnj,
-                client_name=cliente["codigo"],
-                solicitacao_id=solicitacao_id
-            )
-            if task_doc:
-                tasks_created.append(task_doc["_id"])
+        # Create RPA tasks for the pending CNJs
+        tasks_count = await self._create_rpa_tasks(
+            cnjs=cnjs,
+            client_name=cliente["codigo"],
+            solicitacao_id=solicitacao_id
+        )
 
         logger.info(
-            f"✅ Created {len(tasks_created)} RPA tasks for solicitacao {solicitacao_id}"
+            f"✅ {tasks_count} RPA tasks ready for solicitacao {solicitacao_id}"
         )
 
-        # Store task IDs in solicitacao metadata
+        # Store the task count in solicitacao metadata
         await self.db.solicitacoes.update_one(
             {"_id": ObjectId(solicitacao_id)},
             {
-                "$set": {
-                    "rpa_task_ids": [str(tid) for tid in tasks_created],
-                    "updated_at": datetime.utcnow(),
-                }
+                "$set": {"rpa_task_count": tasks_count},
+                "$max": {"updated_at": datetime.utcnow()},
             }
         )
 
-    async def _create_rpa_task(
-        self, cnj: str, client_name: str, solicitacao_id: str
-    ) -> Dict[str, Any]:
+    async def _create_rpa_tasks(
+        self, cnjs: List[str], client_name: str, solicitacao_id: str
+    ) -> int:
         """
-        Create a task in RPA format
+        Create tasks in RPA format, one per CNJ
+
+        Inserts are chunked and unordered. A unique index on
+        (portal_metadata.solicitacao_id, process_number) rejects tasks that
+        already exist, so a retried event never duplicates a task.
 
         Args:
-            cnj: CNJ process number
+            cnjs: CNJ process numbers
             client_name: Client code (agibank, creditas, etc)
             solicitacao_id: Portal solicitacao ID
 
         Returns:
-            Created task document
+            Number of tasks of these CNJs that exist (created now or before)
         """
-        try:
-            # Clean CNJ to match RPA format (remove dots and dashes if needed)
-            # Keep original format for now
-            process_number = cnj
+        now = datetime.utcnow()
 
-            # Create task document in RPA format
-            task_doc = {
-                "process_number": process_number,
+        # Keep original CNJ format for the RPA
+        task_docs = [
+            {
+                "process_number": cnj,
                 "client_name": client_name,
                 "status": "pending",  # RPA will process from pending
                 "file_path": None,
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow(),
+                "created_at": now,
+                "updated_at": now,
                 # Additional metadata for tracking back to portal
                 "portal_metadata": {
                     "solicitacao_id": solicitacao_id,
@@ -161,60 +317,104 @@ class SolicitacaoToTaskConverter:
                     "created_by": "solicitacao_worker",
                 },
             }
+            for cnj in cnjs
+        ]
 
-            # Insert into tasks collection
-            result = await self.db.tasks.insert_one(task_doc)
-
+        created = existing = 0
+        for start in range(0, len(task_docs), TASK_INSERT_CHUNK_SIZE):
+            chunk = task_docs[start:start + TASK_INSERT_CHUNK_SIZE]
+            try:
+                result = await self.db.tasks.insert_many(chunk, ordered=False)
+                created += len(result.inserted_ids)
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if any(err.get("code") != 11000 for err in errors):
+                    raise
+                created += e.details.get("nInserted", 0)
+                existing += len(errors)
+
+        if existing:
             logger.info(
-                f"✅ Created RPA task {result.inserted_id} for CNJ {cnj}"
+                f"♻️ {existing} RPA tasks of solicitacao {solicitacao_id} already existed"
             )
 
-            return {**task_doc, "_id": result.inserted_id}
-
-        except Exception as e:
-            logger.error(f"Error creating RPA task for CNJ {cnj}: {e}")
-            return None
+        return created + existing
 
 
 class TaskStatusMonitor:
     """
     Monitors RPA tasks and updates Portal solicitacoes
+
+    Changed tasks are read in (updated_at, _id) order after a watermark
+    saved in worker_state, so no per-task state is kept in memory and a
+    restarted monitor continues where it stopped. The RPA bumps
+    ``updated_at`` on every status change.
     """
 
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
         self.solicitacao_updater = SolicitacaoUpdater(db)
+        self.worker_state = WorkerState(db)
         self.is_running = False
-        self._last_checked = {}
 
     async def start_monitoring(self):
         """Monitor RPA tasks and update solicitacoes"""
         logger.info("👀 Starting Task Status Monitor...")
         self.is_running = True
 
+        state = await self.worker_state.get(MONITOR_STATE)
+        watermark = state.get("watermark")
+
         while self.is_running:
             try:
-                # Find tasks created by portal
-                tasks = await self.db.tasks.find(
-                    {"portal_metadata.source": "portal_web"}
-                ).to_list(length=100)
+                tasks = await self._changed_tasks(watermark)
 
                 for task in tasks:
-                    task_id = str(task["_id"])
-                    current_status = task["status"]
-                    last_status = self._last_checked.get(task_id)
+                    await self._update_solicitacao_from_task(task)
 
-                    # Check if status changed
-                    if last_status != current_status:
-                        await self._update_solicitacao_from_task(task)
-                        self._last_checked[task_id] = current_status
+                if tasks:
+                    # A crash before this save replays the batch on restart
+                    watermark = encode_cursor(tasks[-1]["updated_at"], tasks[-1]["_id"])
+                    await self.worker_state.save(MONITOR_STATE, watermark=watermark)
 
-                await asyncio.sleep(10)  # Check every 10 seconds
+                # Keep reading while there is a backlog
+                if len(tasks) < settings.task_monitor_batch_size:
+                    await asyncio.sleep(settings.task_monitor_interval_seconds)
 
             except Exception as e:
                 logger.error(f"Error in task monitoring: {e}")
                 await asyncio.sleep(15)
 
+    async def _changed_tasks(self, watermark: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Get the next portal tasks changed after the watermark
+
+        Only changes older than task_monitor_lag_seconds are read, so a
+        write that commits late (or from a slightly behind clock) is not
+        skipped by a watermark that already moved past it.
+
+        Args:
+            watermark: Cursor of the last task handled (None to start over)
+
+        Returns:
+            Up to task_monitor_batch_size tasks, oldest change first
+        """
+        settled = datetime.utcnow() - timedelta(seconds=settings.task_monitor_lag_seconds)
+        query = {
+            "portal_metadata.source": "portal_web",
+            "updated_at": {"$lte": settled},
+        }
+
+        if watermark:
+            query.update(after_cursor("updated_at", watermark, descending=False))
+
+        cursor = (
+            self.db.tasks.find(query)
+            .sort([("updated_at", 1), ("_id", 1)])
+            .limit(settings.task_monitor_batch_size)
+        )
+        return await cursor.to_list(length=settings.task_monitor_batch_size)
+
     async def stop_monitoring(self):
         """Stop monitoring"""
         logger.info("🛑 Stopping Task Status Monitor...")
@@ -240,14 +440,7 @@ class TaskStatusMonitor:
             logger.info(f"📊 Updating solicitacao {solicitacao_id} for CNJ {cnj}: {task_status}")
 
             # Map RPA status to portal status
-            status_map = {
-                "pending": "pendente",
-                "processing": "em_execucao",
-                "completed": "concluido",
-                "failed": "erro",
-            }
-
-            portal_status = status_map.get(task_status, "pendente")
+            portal_status = RPA_STATUS_MAP.get(task_status, PENDENTE)
 
             # Get file URLs if completed
             documentos_urls = []
@@ -256,8 +449,9 @@ class TaskStatusMonitor:
                 # We'll store the Azure blob path
                 documentos_urls = [task.get("file_path")]
 
-            # Add/Update CNJ result in solicitacao
-            await self.solicitacao_updater.add_cnj_result(
+            # Add/Update CNJ result in solicitacao (also caches concluded
+            # results and finalizes the solicitacao when it is the last CNJ)
+            result = await self.solicitacao_updater.add_cnj_result(
                 solicitacao_id=solicitacao_id,
                 cnj=cnj,
                 status=portal_status,
@@ -265,27 +459,11 @@ class TaskStatusMonitor:
                 erro=task.get("error_message") if task_status == "failed" else None
             )
 
-            # Check if all CNJs are processed
-            solicitacao = await self.solicitacao_updater.get_solicitacao(solicitacao_id)
-
-            if solicitacao:
-                if solicitacao["cnjs_processados"] >= solicitacao["total_cnjs"]:
-                    # All CNJs processed, update overall status
-                    if solicitacao["cnjs_erro"] > 0:
-                        final_status = SolicitacaoStatus.ERRO
-                    elif solicitacao["cnjs_sucesso"] > 0:
-                        final_status = SolicitacaoStatus.CONCLUIDO
-                    else:
-                        final_status = SolicitacaoStatus.DOCUMENTOS_NAO_ENCONTRADOS
-
-                    await self.solicitacao_updater.update_status(
-                        solicitacao_id,
-                        final_status
-                    )
-
-                    logger.info(
-                        f"✅ Solicitacao {solicitacao_id} completed: {final_status.value}"
-                    )
+            solicitacao = result and result["solicitacao"]
+            if solicitacao and solicitacao["finalizada"]:
+                logger.info(
+                    f"✅ Solicitacao {solicitacao_id} completed: {solicitacao['finalizada']}"
+                )
 
         except Exception as e:
             logger.error(f"Error updating solicitacao from task: {e}")
@@ -298,6 +476,9 @@ async def run_workers():
     """
     db = db_manager.db
 
+    # Task creation relies on the unique index on tasks
+    await db_manager.init_indexes()
+
     converter = SolicitacaoToTaskConverter(db)
     monitor = TaskStatusMonitor(db)
 
@@ -0,0 +1,46 @@
+"""
+Persistent worker state
+
+Workers keep small checkpoint documents (change stream resume tokens,
+watermarks) in the ``worker_state`` collection, one per worker, so a
+restarted process continues where the previous one stopped.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerState:
+    """Reads and writes worker checkpoint documents"""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db.worker_state
+
+    async def get(self, name: str) -> Dict[str, Any]:
+        """
+        Get the checkpoint of a worker
+
+        Args:
+            name: Worker name
+
+        Returns:
+            Checkpoint fields (empty if the worker never saved one)
+        """
+        return await self.collection.find_one({"_id": name}) or {}
+
+    async def save(self, name: str, **fields: Any):
+        """
+        Save checkpoint fields of a worker
+
+        Args:
+            name: Worker name
+            fields: Fields to set (``None`` clears a field)
+        """
+        await self.collection.update_one(
+            {"_id": name},
+            {"$set": {**fields, "updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
@@ -12,25 +12,96 @@ export interface ResultadoProcessamento {
   processado_em?: string;
 }
 
-export interface Solicitacao {
+export interface SolicitacaoSummary {
   id: string;
   user_id: string;
   cliente_id: string;
   cliente_nome?: string;
   servico: string;
-  cnjs: string[];
   status: string;
   total_cnjs: number;
   cnjs_processados: number;
   cnjs_sucesso: number;
   cnjs_erro: number;
-  resultados: ResultadoProcessamento[];
   created_at: string;
   updated_at: string;
   iniciado_em?: string;
   concluido_em?: string;
 }
 
+export interface Solicitacao extends SolicitacaoSummary {
+  cnjs: string[];
+  resultados: ResultadoProcessamento[];
+}
+
+export interface CnjInvalido {
+  indice: number;
+  valor: string;
+  erro: string;
+}
+
+export interface SolicitacaoCriada extends Solicitacao {
+  cnjs_invalidos: CnjInvalido[];
+}
+
+export interface SolicitacaoPage {
+  items: SolicitacaoSummary[];
+  nextCursor: string | null;
+}
+
+export interface ResultadosPage {
+  resultados: ResultadoProcessamento[];
+  total: number;
+  next_cursor: string | null;
+}
+
+export interface SolicitacaoChanges {
+  changes: SolicitacaoSummary[];
+  since: string;
+  has_more: boolean;
+}
+
+export type SolicitacaoProgress = Pick<SolicitacaoSummary, 'id'> &
+  Partial<
+    Pick<
+      SolicitacaoSummary,
+      | 'status'
+      | 'total_cnjs'
+      | 'cnjs_processados'
+      | 'cnjs_sucesso'
+      | 'cnjs_erro'
+      | 'updated_at'
+      | 'concluido_em'
+    >
+  >;
+
+export interface StreamTicket {
+  ticket: string;
+  expires_in: number;
+}
+
+export interface UploadJob {
+  id: string;
+  status: 'pendente' | 'em_execucao' | 'concluido' | 'erro';
+  filename?: string;
+  cliente_id: string;
+  servico: string;
+  solicitacao_id?: string;
+  total_cnjs?: number;
+  erro?: string;
+  created_at: string;
+  updated_at: string;
+}
+
+// Espera antes de reabrir o stream de progresso após uma falha
+const STREAM_RETRY_MS = 5000;
+
+// Intervalo de consulta de uploads processados em segundo plano
+const UPLOAD_JOB_POLL_MS = 1000;
+
+// Tempo máximo de espera por um upload processado em segundo plano
+const UPLOAD_JOB_TIMEOUT_MS = 10 * 60 * 1000;
+
 export interface CreateSolicitacaoDto {
   cliente_id: string;
   servico: string;
@@ -45,11 +116,89 @@ export const solicitacoesApi = {
     skip?: number;
     limit?: number;
     status?: string;
-  }): Promise<Solicitacao[]> {
-    const response = await api.get<Solicitacao[]>('/solicitacoes', { params });
+  }): Promise<SolicitacaoSummary[]> {
+    const response = await api.get<SolicitacaoSummary[]>('/solicitacoes', { params });
     return response.data;
   },
 
+  /**
+   * List one page of user's solicitacoes using cursor pagination
+   */
+  async listPage(params?: {
+    cursor?: string;
+    limit?: number;
+    status?: string;
+  }): Promise<SolicitacaoPage> {
+    const response = await api.get<SolicitacaoSummary[]>('/solicitacoes', { params });
+    return {
+      items: response.data,
+      nextCursor: response.headers['x-next-cursor'] ?? null,
+    };
+  },
+
+  /**
+   * List user's solicitacoes changed since a sync token
+   * Call without `since` to get the token for the current state
+   */
+  async changes(since?: string): Promise<SolicitacaoChanges> {
+    const response = await api.get<SolicitacaoChanges>('/solicitacoes/changes', {
+      params: { since },
+    });
+    return response.data;
+  },
+
+  /**
+   * Get a short-lived ticket that opens the progress stream
+   */
+  async streamTicket(): Promise<StreamTicket> {
+    const response = await api.post<StreamTicket>('/solicitacoes/stream/ticket');
+    return response.data;
+  },
+
+  /**
+   * Subscribe to progress updates of user's solicitacoes (Server-Sent Events)
+   * Each connection uses a new ticket, so the access token never goes in the URL
+   * Returns a function that closes the stream
+   */
+  subscribeProgress(onProgress: (update: SolicitacaoProgress) => void): () => void {
+    let source: EventSource | null = null;
+    let retry: ReturnType<typeof setTimeout> | undefined;
+    let closed = false;
+
+    const reconnect = () => {
+      if (!closed) retry = setTimeout(connect, STREAM_RETRY_MS);
+    };
+
+    const connect = async () => {
+      try {
+        const { ticket } = await solicitacoesApi.streamTicket();
+        if (closed) return;
+
+        source = new EventSource(
+          `${api.defaults.baseURL}/solicitacoes/stream?ticket=${encodeURIComponent(ticket)}`
+        );
+        source.addEventListener('progress', (event) => {
+          onProgress(JSON.parse((event as MessageEvent).data));
+        });
+        // EventSource would retry the same URL, whose ticket has expired
+        source.onerror = () => {
+          source?.close();
+          reconnect();
+        };
+      } catch {
+        reconnect();
+      }
+    };
+
+    connect();
+
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      source?.close();
+    };
+  },
+
   /**
    * Get solicitacao by ID
    */
@@ -58,16 +207,45 @@ export const solicitacoesApi = {
     return response.data;
   },
 
+  /**
+   * Get solicitacao summary by ID (without the CNJ list and results)
+   */
+  async getSummaryById(id: string): Promise<SolicitacaoSummary> {
+    const fields = [
+      'user_id', 'cliente_id', 'cliente_nome', 'servico', 'status', 'total_cnjs',
+      'cnjs_processados', 'cnjs_sucesso', 'cnjs_erro', 'created_at', 'updated_at',
+      'iniciado_em', 'concluido_em',
+    ];
+    const response = await api.get<SolicitacaoSummary>(`/solicitacoes/${id}`, {
+      params: { fields: fields.join(',') },
+    });
+    return response.data;
+  },
+
+  /**
+   * List one page of a solicitacao's per-CNJ results
+   */
+  async listResultados(
+    id: string,
+    params?: { cursor?: string; limit?: number; status?: string }
+  ): Promise<ResultadosPage> {
+    const response = await api.get<ResultadosPage>(`/solicitacoes/${id}/resultados`, { params });
+    return response.data;
+  },
+
   /**
    * Create new solicitacao
+   * Invalid CNJs are left out and listed in `cnjs_invalidos`
    */
-  async create(data: CreateSolicitacaoDto): Promise<Solicitacao> {
-    const response = await api.post<Solicitacao>('/solicitacoes', data);
+  async create(data: CreateSolicitacaoDto): Promise<SolicitacaoCriada> {
+    const response = await api.post<SolicitacaoCriada>('/solicitacoes', data);
     return response.data;
   },
 
   /**
    * Create solicitacao from Excel upload
+   * Large files are processed in the background (202 + job); the job is
+   * polled until the solicitacao exists
    */
   async createFromExcel(
     file: File,
@@ -79,9 +257,37 @@ export const solicitacoesApi = {
     formData.append('cliente_id', clienteId);
     formData.append('servico', servico);
 
-    const response = await api.post<Solicitacao>('/solicitacoes/upload', formData, {
+    const response = await api.post<Solicitacao | UploadJob>('/solicitacoes/upload', formData, {
       headers: { 'Content-Type': 'multipart/form-data' },
     });
+
+    if (response.status !== 202) {
+      return response.data as Solicitacao;
+    }
+
+    let job = response.data as UploadJob;
+    const deadline = Date.now() + UPLOAD_JOB_TIMEOUT_MS;
+    while (job.status === 'pendente' || job.status === 'em_execucao') {
+      if (Date.now() >= deadline) {
+        throw new Error(
+          'O arquivo ainda está sendo processado. Verifique a solicitação em Acompanhamento em alguns minutos.'
+        );
+      }
+      await new Promise((resolve) => setTimeout(resolve, UPLOAD_JOB_POLL_MS));
+      job = await solicitacoesApi.getUploadJob(job.id);
+    }
+
+    if (job.status === 'erro' || !job.solicitacao_id) {
+      throw new Error(job.erro ?? 'Erro ao processar arquivo Excel');
+    }
+    return solicitacoesApi.getById(job.solicitacao_id);
+  },
+
+  /**
+   * Get the status of a background upload job
+   */
+  async getUploadJob(id: string): Promise<UploadJob> {
+    const response = await api.get<UploadJob>(`/solicitacoes/upload/jobs/${id}`);
     return response.data;
   },
 };
@@ -35,7 +35,7 @@ export function CNJInput({ value, onChange, label = 'Número CNJ', error }: CNJI
           value={value}
           onChange={handleChange}
           onBlur={handleBlur}
-          placeholder="0001234-56.2022.8.26.0100"
+          placeholder="0001234-42.2022.8.26.0100"
           maxLength={25}
           className={`pr-10 ${error ? 'border-red-500' : ''} ${showValidation && isValid ? 'border-green-500' : ''}`}
         />
@@ -2,12 +2,12 @@ import { Download, RefreshCw, Eye } from 'lucide-react';
 import { Button } from './ui/button';
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from './ui/table';
 import { StatusTag } from './StatusTag';
-import { Solicitacao } from '../api';
+import { SolicitacaoSummary } from '../api';
 import { Badge } from './ui/badge';
 import { useNavigate } from 'react-router-dom';
 
 interface TableSolicitacoesProps {
-  solicitacoes: Solicitacao[];
+  solicitacoes: SolicitacaoSummary[];
   loading?: boolean;
   onRefresh?: () => void;
   onDownload?: (id: string) => void;
@@ -77,7 +77,7 @@ export function TableSolicitacoes({
                   <TableCell>{solicitacao.servico}</TableCell>
                   <TableCell>
                     <Badge variant="outline">
-                      {solicitacao.cnjs.length} {solicitacao.cnjs.length === 1 ? 'processo' : 'processos'}
+                      {solicitacao.total_cnjs} {solicitacao.total_cnjs === 1 ? 'processo' : 'processos'}
                     </Badge>
                   </TableCell>
                   <TableCell>
@@ -1,13 +1,13 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '../components/ui/card';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '../components/ui/select';
 import { TableSolicitacoes } from '../components/TableSolicitacoes';
-import { Solicitacao, solicitacoesAPI, clientesAPI, Cliente } from '../api';
+import { SolicitacaoSummary, solicitacoesAPI, clientesAPI, Cliente } from '../api';
 import { Label } from '../components/ui/label';
 import { toast } from 'sonner@2.0.3';
 
 export function Acompanhamento() {
-  const [solicitacoes, setSolicitacoes] = useState<Solicitacao[]>([]);
+  const [solicitacoes, setSolicitacoes] = useState<SolicitacaoSummary[]>([]);
   const [clientes, setClientes] = useState<Cliente[]>([]);
   const [loading, setLoading] = useState(true);
   const [clienteFilter, setClienteFilter] = useState<string>('all');
@@ -29,15 +29,52 @@ export function Acompanhamento() {
     }
   };
 
+  // Espelho da lista para o handler de eventos e buscas em andamento
+  const lista = useRef<SolicitacaoSummary[]>([]);
+  const buscando = useRef(new Set<string>());
+
+  useEffect(() => {
+    lista.current = solicitacoes;
+  }, [solicitacoes]);
+
+  // Solicitação que ainda não está na lista (criada em outra aba ou por um
+  // upload em segundo plano): busca o resumo e insere na ordem de criação
+  const adicionarSolicitacao = async (id: string) => {
+    if (buscando.current.has(id)) return;
+    buscando.current.add(id);
+
+    try {
+      const nova = await solicitacoesAPI.getSummaryById(id);
+      setSolicitacoes((atual) => {
+        if (atual.some((s) => s.id === id)) return atual;
+
+        // Mais antiga que a lista carregada: não pertence a esta página
+        const maisAntiga = atual[atual.length - 1];
+        if (maisAntiga && nova.created_at < maisAntiga.created_at) return atual;
+
+        return [nova, ...atual].sort((a, b) => b.created_at.localeCompare(a.created_at));
+      });
+    } catch (error) {
+      // Aparece na próxima vez que a página for carregada
+    } finally {
+      buscando.current.delete(id);
+    }
+  };
+
   useEffect(() => {
     loadData();
 
-    // Atualização automática a cada 15 segundos
-    const interval = setInterval(() => {
-      loadData();
-    }, 15000);
+    // Atualização em tempo real via Server-Sent Events
+    return solicitacoesAPI.subscribeProgress((update) => {
+      if (!lista.current.some((s) => s.id === update.id)) {
+        adicionarSolicitacao(update.id);
+        return;
+      }
 
-    return () => clearInterval(interval);
+      setSolicitacoes((atual) =>
+        atual.map((s) => (s.id === update.id ? { ...s, ...update } : s))
+      );
+    });
   }, []);
 
   const filteredSolicitacoes = solicitacoes.filter((s) => {
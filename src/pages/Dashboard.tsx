@@ -1,22 +1,27 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Button } from '../components/ui/button';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '../components/ui/card';
 import { TableSolicitacoes } from '../components/TableSolicitacoes';
-import { Solicitacao, solicitacoesAPI } from '../api';
+import { SolicitacaoSummary, solicitacoesAPI } from '../api';
 import { Plus, FileText, TrendingUp, Clock } from 'lucide-react';
 import { Skeleton } from '../components/ui/skeleton';
 import { toast } from 'sonner@2.0.3';
 
 export function Dashboard() {
-  const [solicitacoes, setSolicitacoes] = useState<Solicitacao[]>([]);
+  const [solicitacoes, setSolicitacoes] = useState<SolicitacaoSummary[]>([]);
   const [loading, setLoading] = useState(true);
   const navigate = useNavigate();
 
+  // Token de sincronização: atualizações trazem apenas o que mudou
+  const since = useRef<string>();
+
   const loadSolicitacoes = async () => {
     setLoading(true);
     try {
+      const { since: token } = await solicitacoesAPI.changes();
       const data = await solicitacoesAPI.list();
+      since.current = token;
       setSolicitacoes(data);
     } catch (error) {
       toast.error('Erro ao carregar solicitações');
@@ -25,6 +30,30 @@ export function Dashboard() {
     }
   };
 
+  const refreshSolicitacoes = async () => {
+    if (!since.current) return loadSolicitacoes();
+
+    try {
+      let page;
+      do {
+        page = await solicitacoesAPI.changes(since.current);
+        since.current = page.since;
+
+        const changed = page.changes;
+        if (changed.length > 0) {
+          setSolicitacoes((atual) => {
+            const ids = new Set(changed.map((s) => s.id));
+            return [...changed, ...atual.filter((s) => !ids.has(s.id))].sort((a, b) =>
+              b.created_at.localeCompare(a.created_at)
+            );
+          });
+        }
+      } while (page.has_more);
+    } catch (error) {
+      toast.error('Erro ao atualizar solicitações');
+    }
+  };
+
   useEffect(() => {
     loadSolicitacoes();
   }, []);
@@ -128,7 +157,7 @@ export function Dashboard() {
           ) : (
             <TableSolicitacoes
               solicitacoes={solicitacoes.slice(0, 5)}
-              onRefresh={loadSolicitacoes}
+              onRefresh={refreshSolicitacoes}
               onDownload={handleDownload}
             />
           )}
@@ -1,34 +1,86 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { Button } from '../components/ui/button';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '../components/ui/card';
 import { ProcessoStatusCard } from '../components/ProcessoStatusCard';
 import { StatusTag } from '../components/StatusTag';
 import { Skeleton } from '../components/ui/skeleton';
-import { Solicitacao, solicitacoesAPI } from '../api';
+import { ResultadoProcessamento, SolicitacaoSummary, solicitacoesAPI } from '../api';
 import { ArrowLeft, Download, RefreshCw, Calendar, Building2, Briefcase } from 'lucide-react';
 import { toast } from 'sonner@2.0.3';
 import { Progress } from '../components/ui/progress';
 import { Separator } from '../components/ui/separator';
 
+const RESULTADOS_PAGE_SIZE = 50;
+
+// Status de solicitações que não recebem mais resultados
+const FINAL_STATUSES = ['concluido', 'erro', 'documentos_nao_encontrados', 'cancelado'];
+
 export function DetalheSolicitacao() {
   const { id } = useParams<{ id: string }>();
   const navigate = useNavigate();
-  const [solicitacao, setSolicitacao] = useState<Solicitacao | null>(null);
+  const [solicitacao, setSolicitacao] = useState<SolicitacaoSummary | null>(null);
+  const [resultados, setResultados] = useState<ResultadoProcessamento[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
 
+  // Quantidade de resultados exibidos (inclui as páginas de "Carregar mais")
+  const loaded = useRef(0);
+
+  // CNJs processados quando os resultados exibidos foram carregados
+  const [processadosCarregados, setProcessadosCarregados] = useState(0);
+
+  // Resultados são paginados; "Carregar mais" acrescenta a próxima página
+  const loadResultados = async (cursor?: string) => {
+    if (!id) return;
+
+    const page = await solicitacoesAPI.listResultados(id, { cursor, limit: RESULTADOS_PAGE_SIZE });
+    loaded.current = (cursor ? loaded.current : 0) + page.resultados.length;
+    setResultados((atual) => (cursor ? [...atual, ...page.resultados] : page.resultados));
+    setNextCursor(page.next_cursor);
+  };
+
+  // Recarrega todas as páginas já exibidas, nos mesmos limites de página,
+  // para que uma atualização não descarte o que o usuário já carregou
+  const refreshResultados = async (processados: number) => {
+    if (!id) return;
+
+    const alvo = loaded.current;
+    const lista: ResultadoProcessamento[] = [];
+    let cursor: string | null = null;
+
+    do {
+      const page = await solicitacoesAPI.listResultados(id, {
+        cursor: cursor ?? undefined,
+        limit: RESULTADOS_PAGE_SIZE,
+      });
+      lista.push(...page.resultados);
+      cursor = page.next_cursor;
+    } while (cursor && lista.length < alvo);
+
+    // "Carregar mais" foi usado enquanto recarregava: a próxima atualização recarrega
+    if (loaded.current !== alvo) return;
+
+    loaded.current = lista.length;
+    setResultados(lista);
+    setNextCursor(cursor);
+    setProcessadosCarregados(processados);
+  };
+
   const loadSolicitacao = async () => {
     if (!id) return;
     
     setLoading(true);
     try {
-      const data = await solicitacoesAPI.getById(id);
+      const data = await solicitacoesAPI.getSummaryById(id);
       if (!data) {
         toast.error('Solicitação não encontrada');
         navigate('/dashboard');
         return;
       }
       setSolicitacao(data);
+      await loadResultados();
+      setProcessadosCarregados(data.cnjs_processados);
     } catch (error) {
       toast.error('Erro ao carregar solicitação');
     } finally {
@@ -38,15 +90,21 @@ export function DetalheSolicitacao() {
 
   useEffect(() => {
     loadSolicitacao();
-    
-    // Auto-refresh a cada 10 segundos se houver processos em andamento
-    const interval = setInterval(() => {
-      if (solicitacao?.status === 'em_execucao' || solicitacao?.status === 'pendente') {
-        loadSolicitacao();
+
+    // Progresso em tempo real via Server-Sent Events. Os resultados não são
+    // recarregados a cada atualização: só quando a solicitação termina ou
+    // quando o usuário pede (ver "Atualizar resultados")
+    const unsubscribe = solicitacoesAPI.subscribeProgress((update) => {
+      if (update.id !== id) return;
+
+      setSolicitacao((atual) => (atual ? { ...atual, ...update } : atual));
+
+      if (update.status && FINAL_STATUSES.includes(update.status)) {
+        refreshResultados(update.cnjs_processados ?? 0);
       }
-    }, 10000);
+    });
 
-    return () => clearInterval(interval);
+    return unsubscribe;
   }, [id]);
 
   const handleDownload = async () => {
@@ -112,6 +170,7 @@ export function DetalheSolicitacao() {
 
   const statusCounts = getStatusCounts();
   const progress = getProgress();
+  const novosResultados = solicitacao.cnjs_processados - processadosCarregados;
 
   return (
     <div className="space-y-6">
@@ -226,15 +285,29 @@ export function DetalheSolicitacao() {
 
       <Card>
         <CardHeader>
-          <CardTitle>Status Individual dos Processos</CardTitle>
-          <CardDescription>
-            Acompanhe o status de cada número CNJ separadamente
-          </CardDescription>
+          <div className="flex items-start justify-between">
+            <div>
+              <CardTitle>Status Individual dos Processos</CardTitle>
+              <CardDescription>
+                Acompanhe o status de cada número CNJ separadamente
+              </CardDescription>
+            </div>
+            {novosResultados > 0 && (
+              <Button
+                variant="outline"
+                size="sm"
+                onClick={() => refreshResultados(solicitacao.cnjs_processados)}
+              >
+                <RefreshCw className="h-4 w-4 mr-2" />
+                Atualizar resultados ({novosResultados} novos)
+              </Button>
+            )}
+          </div>
         </CardHeader>
         <CardContent>
           <div className="grid gap-4 md:grid-cols-2">
-            {solicitacao.resultados && solicitacao.resultados.length > 0 ? (
-              solicitacao.resultados.map((resultado) => (
+            {resultados.length > 0 ? (
+              resultados.map((resultado) => (
                 <ProcessoStatusCard key={resultado.cnj} processo={resultado} />
               ))
             ) : (
@@ -244,6 +317,13 @@ export function DetalheSolicitacao() {
               </div>
             )}
           </div>
+          {nextCursor && (
+            <div className="flex justify-center mt-4">
+              <Button variant="outline" onClick={() => loadResultados(nextCursor)}>
+                Carregar mais
+              </Button>
+            </div>
+          )}
         </CardContent>
       </Card>
     </div>
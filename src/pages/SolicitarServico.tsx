@@ -89,12 +89,20 @@ export function SolicitarServico() {
     setLoading(true);
     try {
       const cnjs = getCNJList();
-      await solicitacoesAPI.create({
+      const criada = await solicitacoesAPI.create({
         cliente_id: clienteId,
         servico,
         cnjs,
       });
-      
+
+      // O formato é validado aqui; os dígitos verificadores, no servidor
+      if (criada.cnjs_invalidos.length > 0) {
+        toast.warning(
+          `${criada.cnjs_invalidos.length} CNJ(s) inválido(s) ignorado(s): ` +
+            criada.cnjs_invalidos.slice(0, 3).map((item) => item.valor).join(', ')
+        );
+      }
+
       toast.success('Solicitação enviada com sucesso!');
       navigate('/acompanhamento');
     } catch (error) {
@@ -141,7 +149,7 @@ export function SolicitarServico() {
           
           <TabsContent value="manual" className="space-y-2">
             <Textarea
-              placeholder="Insira um número CNJ por linha&#10;0001234-56.2022.8.26.0100&#10;4000312-69.2025.8.26.0441"
+              placeholder="Insira um número CNJ por linha&#10;0001234-42.2022.8.26.0100&#10;4000312-69.2025.8.26.0441"
               value={cnjsText}
               onChange={(e) => setCnjsText(e.target.value)}
               rows={8}